@@ -0,0 +1,142 @@
+# backend_python/applications.py
+# Application status transitions, applied in batches inside one transaction.
+#
+# Concurrency: the pets behind a batch are locked (SELECT ... FOR UPDATE, in id order so two
+# batches cannot deadlock) before their applications are re-read and changed. Two shelters
+# (or two tabs) approving applications for the same pet therefore serialize on that pet's row
+# only; batches for other pets proceed in parallel. Application updates are additionally
+# compare-and-set on the previous status, which keeps SQLite (no row locks) consistent too.
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from .models import Application, Pet, PetStatus
+from .pet_cache import PetKey, pet_key
+from .schemas import ApplicationStatus
+
+PENDING, UNDER_REVIEW, APPROVED, REJECTED = (s.value for s in ApplicationStatus)
+OPEN_STATUSES = (PENDING, UNDER_REVIEW)
+
+# Allowed moves; approved and rejected are final.
+TRANSITIONS = {
+    PENDING: {UNDER_REVIEW, APPROVED, REJECTED},
+    UNDER_REVIEW: {PENDING, APPROVED, REJECTED},
+    APPROVED: set(),
+    REJECTED: set(),
+}
+
+
+class ApplicationTransitionError(Exception):
+    """The batch was not applied. `errors` has one entry per offending application."""
+
+    def __init__(self, status_code: int, errors: List[dict]):
+        super().__init__(errors)
+        self.status_code = status_code
+        self.errors = errors
+
+
+@dataclass
+class TransitionOutcome:
+    applications: List[Application]                    # the requested applications, in request order
+    auto_rejected: List[int] = field(default_factory=list)  # competing applications rejected by approvals
+    pet_changes: List[Tuple[PetKey, Pet]] = field(default_factory=list)  # (key before, pet after) per changed pet
+
+
+def apply_transitions(db: Session, shelter_id: int, transitions: Dict[int, str]) -> TransitionOutcome:
+    """
+    Move each application in `transitions` (id -> new status) for the given shelter, all or
+    nothing, and commit. Approving an application marks its pet adopted and rejects the other
+    open applications for it; putting one under review marks an available pet pending, and
+    taking the last one out of review puts that pet back to available.
+    Raises ApplicationTransitionError (nothing applied) on unknown, foreign or invalid entries,
+    including a batch that approves one application and keeps another for the same pet open.
+    """
+    ids = sorted(transitions)
+    owners = dict(db.query(Application.id, Application.shelter_id).filter(Application.id.in_(ids)))
+    missing = [i for i in ids if i not in owners]
+    if missing:
+        raise ApplicationTransitionError(404, [{"id": i, "error": "Application not found."} for i in missing])
+    foreign = [i for i in ids if owners[i] != shelter_id]
+    if foreign:
+        raise ApplicationTransitionError(403, [{"id": i, "error": "Not authorized to update this application."} for i in foreign])
+
+    # Lock order: pets, then applications, each by id.
+    pet_ids = sorted({pet_id for (pet_id,) in db.query(Application.pet_id).filter(Application.id.in_(ids))})
+    pets = {pet.id: pet for pet in db.query(Pet).filter(Pet.id.in_(pet_ids)).order_by(Pet.id).with_for_update()}
+    applications = {a.id: a for a in db.query(Application).filter(Application.id.in_(ids)).order_by(Application.id).with_for_update()}
+
+    errors = []
+    approvals: Dict[int, List[int]] = defaultdict(list)  # pet_id -> approved application ids
+    for i in ids:
+        current, new = applications[i].status, transitions[i]
+        if new != current and new not in TRANSITIONS.get(current, set()):
+            errors.append({"id": i, "error": f"Cannot change status from {current} to {new}."})
+        if new == APPROVED and current != APPROVED:
+            approvals[applications[i].pet_id].append(i)
+    for pet_id, approved_ids in approvals.items():
+        if len(approved_ids) > 1:
+            errors.extend({"id": i, "error": "Only one application per pet can be approved."} for i in approved_ids)
+        elif pets[pet_id].status == PetStatus.adopted:
+            errors.append({"id": approved_ids[0], "error": "This pet has already been adopted."})
+    # An approval rejects the pet's other open applications; the batch must not ask to keep one open.
+    errors.extend({"id": i, "error": "Another application for this pet is approved in this batch."} for i in ids
+                  if applications[i].pet_id in approvals and transitions[i] in OPEN_STATUSES)
+    if errors:
+        raise ApplicationTransitionError(409, errors)
+
+    old_keys = {pet_id: pet_key(pet) for pet_id, pet in pets.items()}
+    old_status = {pet_id: pet.status for pet_id, pet in pets.items()}
+
+    # Compare-and-set, grouped so a batch costs one UPDATE per distinct (from, to) pair.
+    groups: Dict[Tuple[str, str], List[int]] = defaultdict(list)
+    for i in ids:
+        if transitions[i] != applications[i].status:
+            groups[(applications[i].status, transitions[i])].append(i)
+    for (current, new), group in groups.items():
+        result = db.execute(
+            update(Application).where(Application.id.in_(group), Application.status == current)
+            .values(status=new).execution_options(synchronize_session=False)
+        )
+        if result.rowcount != len(group):
+            db.rollback()
+            raise ApplicationTransitionError(409, [{"id": i, "error": "Application was changed concurrently; retry."} for i in group])
+
+    auto_rejected: List[int] = []
+    if approvals:
+        approved_pets = list(approvals)
+        approved_ids = [i for group in approvals.values() for i in group]
+        auto_rejected = [i for (i,) in db.query(Application.id).filter(
+            Application.pet_id.in_(approved_pets), Application.status.in_(OPEN_STATUSES),
+            Application.id.notin_(approved_ids)
+        )]
+        if auto_rejected:
+            db.execute(update(Application).where(Application.id.in_(auto_rejected))
+                       .values(status=REJECTED).execution_options(synchronize_session=False))
+        for pet_id in approved_pets:
+            pets[pet_id].status = PetStatus.adopted
+
+    left_review = set()  # pets with an application taken out of review by this batch
+    for i in ids:
+        pet = pets[applications[i].pet_id]
+        if transitions[i] == UNDER_REVIEW and pet.status == PetStatus.available:
+            pet.status = PetStatus.pending
+        elif applications[i].status == UNDER_REVIEW and transitions[i] in (PENDING, REJECTED):
+            left_review.add(pet.id)
+    left_review -= set(approvals)
+    if left_review:
+        still_reviewed = {pet_id for (pet_id,) in db.query(Application.pet_id).filter(
+            Application.pet_id.in_(left_review), Application.status == UNDER_REVIEW
+        ).distinct()}
+        for pet_id in left_review - still_reviewed:
+            if pets[pet_id].status == PetStatus.pending:
+                pets[pet_id].status = PetStatus.available
+
+    changed = [(old_keys[pet_id], pet) for pet_id, pet in pets.items() if pet.status != old_status[pet_id]]
+    db.commit()
+    for application in applications.values():
+        db.refresh(application)
+    return TransitionOutcome(applications=[applications[i] for i in transitions], auto_rejected=auto_rejected,
+                             pet_changes=changed)
@@ -0,0 +1,83 @@
+# backend_python/auth.py
+# Caches for resolving an Authorization header to a user profile without a DB round trip.
+import hashlib
+import os
+import time
+from typing import Optional
+
+from .cache import LRUCache
+from .invalidation import RESYNC, invalidation_bus, invalidation_handler
+from .schemas import UserProfileDisplay
+
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000"))
+# How long a verified token is trusted before it is verified again (capped by its own expiry).
+AUTH_TOKEN_CACHE_TTL_SECONDS = float(os.getenv("AUTH_TOKEN_CACHE_TTL_SECONDS", "300"))
+# How long a profile is served from memory; writes invalidate it sooner (see invalidate_profile).
+AUTH_PROFILE_CACHE_TTL_SECONDS = float(os.getenv("AUTH_PROFILE_CACHE_TTL_SECONDS", "60"))
+# Set FIREBASE_AUTH=1 (with firebase_admin installed and initialised) to verify real ID tokens.
+FIREBASE_AUTH_ENABLED = os.getenv("FIREBASE_AUTH", "0") == "1"
+
+PROFILE_CHANGED = "profile"  # invalidation bus message: {"user_id": ...}
+
+_verified_tokens = LRUCache(max_entries=AUTH_CACHE_MAX_ENTRIES, ttl_seconds=AUTH_TOKEN_CACHE_TTL_SECONDS)
+_profiles = LRUCache(max_entries=AUTH_CACHE_MAX_ENTRIES, ttl_seconds=AUTH_PROFILE_CACHE_TTL_SECONDS)
+
+
+def _token_key(id_token: str) -> str:
+    # Keep digests rather than raw bearer tokens in memory.
+    return hashlib.sha256(id_token.encode("utf-8")).hexdigest()
+
+
+def verify_id_token(id_token: str) -> str:
+    """
+    Return the Firebase UID for an ID token, verifying it at most once per cache TTL.
+    Raises whatever the verifier raises for an invalid token.
+    """
+    key = _token_key(id_token)
+    uid = _verified_tokens.get(key)
+    if uid is not None:
+        return uid
+
+    ttl = None
+    if FIREBASE_AUTH_ENABLED:
+        # firebase_admin keeps Google's signing certificates in a local HTTP cache
+        # (respecting their max-age), so only a cold start fetches them.
+        from firebase_admin import auth as firebase_auth
+        decoded_token = firebase_auth.verify_id_token(id_token)
+        uid = decoded_token["uid"]
+        ttl = min(AUTH_TOKEN_CACHE_TTL_SECONDS, decoded_token["exp"] - time.time())
+    else:
+        # FOR LOCAL DEVELOPMENT / TESTING ONLY (TEMPORARY BYPASS):
+        # This assumes the token itself is the UID. NOT SECURE FOR PRODUCTION!
+        uid = id_token
+
+    if ttl is None or ttl > 0:
+        _verified_tokens.set(key, uid, ttl_seconds=ttl)
+    return uid
+
+
+def get_cached_profile(user_id: str) -> Optional[UserProfileDisplay]:
+    return _profiles.get(user_id)
+
+
+def cache_profile(profile) -> UserProfileDisplay:
+    """Snapshot an ORM UserProfile (safe to share across requests/sessions) and cache it."""
+    snapshot = UserProfileDisplay.model_validate(profile)
+    _profiles.set(snapshot.user_id, snapshot)
+    return snapshot
+
+
+def invalidate_profile(user_id: str) -> None:
+    """Call after committing any change to a user's profile (evicts it in every worker)."""
+    _profiles.delete(user_id)
+    invalidation_bus.publish(PROFILE_CHANGED, user_id=user_id)
+
+
+@invalidation_handler(PROFILE_CHANGED)
+def _profile_changed_elsewhere(user_id: str) -> None:
+    _profiles.delete(user_id)
+
+
+@invalidation_handler(RESYNC)
+def _drop_profiles() -> None:
+    _profiles.clear()
@@ -0,0 +1,6 @@
+# backend_python/benchmarks
+# Standalone performance scripts. Run them from the repository root, e.g.:
+#   python -m backend_python.benchmarks.bench_concurrency
+#   python -m backend_python.benchmarks.bench_api --scale 100k   # per-endpoint throughput and latency
+#   python -m backend_python.benchmarks.bench_serialization       # pet list JSON encoding paths
+#   python -m backend_python.benchmarks.bench_startup             # worker cold start (imports + schema check)
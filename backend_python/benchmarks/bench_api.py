@@ -0,0 +1,333 @@
+# backend_python/benchmarks/bench_api.py
+"""
+HTTP load benchmark for the PetPals API.
+
+Drives the ASGI app in-process (httpx + ASGITransport, so no network or server process is
+involved) against a database seeded with synthetic data, one endpoint at a time, and reports
+throughput and p50/p95/p99 latency per endpoint. Results are written as JSON; pass an earlier
+results file as --baseline to flag regressions (exit status 1).
+
+    python -m backend_python.benchmarks.bench_api --scale 100k --requests 500 --concurrency 20
+    python -m backend_python.benchmarks.bench_api --scale 1k --output after.json --baseline before.json
+
+By default a scratch SQLite file is used. --database-url points it at another (disposable!)
+database instead; pets are only seeded up to --scale, so a seeded database can be reused.
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+SCENARIOS = ["profile", "list", "list_filter", "detail", "create", "update", "delete", "apply"]
+
+BENCH_SHELTER_UID = "bench-shelter"
+BENCH_ADOPTER_UID = "bench-adopter"
+
+
+def parse_scale(value: str) -> int:
+    """"1k" -> 1000, "100k" -> 100000, "1m" -> 1000000, plain integers as-is."""
+    value = value.strip().lower()
+    multiplier = {"k": 1000, "m": 1000000}.get(value[-1:], 1)
+    number = value[:-1] if multiplier > 1 else value
+    try:
+        return int(float(number) * multiplier)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid scale: {value!r}")
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Linear-interpolated percentile of an ascending list (p in 0..100)."""
+    if not sorted_values:
+        return 0.0
+    rank = (len(sorted_values) - 1) * p / 100.0
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def summarize(latencies: List[float], statuses: Dict[int, int], errors: int, elapsed: float) -> dict:
+    ordered = sorted(latencies)
+    ms = lambda seconds: round(seconds * 1000, 3)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "status_codes": {str(code): count for code, count in sorted(statuses.items())},
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            "min": ms(ordered[0]) if ordered else 0.0,
+            "mean": ms(sum(ordered) / len(ordered)) if ordered else 0.0,
+            "p50": ms(percentile(ordered, 50)),
+            "p95": ms(percentile(ordered, 95)),
+            "p99": ms(percentile(ordered, 99)),
+            "max": ms(ordered[-1]) if ordered else 0.0,
+        },
+    }
+
+
+def make_image(index: int) -> bytes:
+    # A distinct (small) JPEG per request, so content-addressed storage cannot dedupe them.
+    from PIL import Image
+    image = Image.new("RGB", (640, 480), (index % 256, (index // 256) % 256, (index * 7) % 256))
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=80)
+    return buffer.getvalue()
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def prepare_environment(args) -> str:
+    """
+    Point the app at the benchmark database and a scratch working directory (uploaded images
+    are written under ./static). Must run before backend_python.main is imported.
+    """
+    workdir = tempfile.mkdtemp(prefix="petpals-bench-")
+    os.makedirs(os.path.join(workdir, "static"))
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    if args.no_cache:
+        os.environ["PET_CACHE_TTL_SECONDS"] = "0"
+    os.chdir(workdir)
+    return workdir
+
+
+def seed(scale: int, targets: int) -> dict:
+    """
+    Seed pets (and proportional profiles/applications) up to `scale`, create the two
+    benchmark users and `targets` pets owned by the benchmark shelter for update/delete.
+    """
+    from backend_python.bulk_import import bulk_insert
+    from backend_python.database import SessionLocal
+    from backend_python.migrations import migrate
+    from backend_python.models import Pet, UserProfile
+    from backend_python.seed_db import seed_synthetic
+    from sqlalchemy import func
+
+    migrate()
+    db = SessionLocal()
+    try:
+        missing = scale - db.query(func.count(Pet.id)).scalar()
+        if missing > 0:
+            print(f"Seeding {missing:,} pets...")
+            seed_synthetic(pets=missing, profiles=max(10, missing // 100), applications=missing // 10)
+
+        users = {}
+        for uid, role in ((BENCH_SHELTER_UID, "shelter"), (BENCH_ADOPTER_UID, "adopter")):
+            profile = db.query(UserProfile).filter(UserProfile.user_id == uid).first()
+            if not profile:
+                profile = UserProfile(user_id=uid, email=f"{uid}@example.com", full_name=f"Bench {role.title()}",
+                                      role=role, preferences="playful young dog" if role == "adopter" else None)
+                db.add(profile)
+                db.commit()
+            users[role] = profile.id
+
+        first_target = (db.query(func.max(Pet.id)).scalar() or 0) + 1
+        bulk_insert(db.connection(), Pet.__table__, [
+            {"id": first_target + i, "name": f"Bench {i}", "age": "2 years", "species": "dog", "breed": "Mixed",
+             "description": "Benchmark target.", "temperament": "Calm", "medical_needs": "None",
+             "status": "available", "gender": "female", "image_url": None, "owner_id": users["shelter"]}
+            for i in range(targets)
+        ])
+        db.commit()
+        # Reads and applications pick from the seeded pets, never from the ones being deleted.
+        min_id, max_id = db.query(func.min(Pet.id), func.max(Pet.id)).filter(Pet.id < first_target).one()
+        if min_id is None:
+            min_id, max_id = first_target, first_target + targets - 1
+        return {"min_id": min_id, "max_id": max_id,
+                "targets": list(range(first_target, first_target + targets)), "dialect": db.get_bind().dialect.name}
+    finally:
+        db.close()
+
+
+def build_scenarios(state: dict, rng: random.Random) -> Dict[str, Callable]:
+    """Each scenario maps a request index to the keyword arguments for one httpx request."""
+    from backend_python.models import PetGender, PetSpecies, PetStatus
+    from backend_python.pagination import encode_cursor
+
+    shelter = {"Authorization": BENCH_SHELTER_UID}
+    adopter = {"Authorization": BENCH_ADOPTER_UID}
+    random_id = lambda: rng.randint(state["min_id"], state["max_id"])
+    update_targets = list(state["targets"])
+    delete_targets = list(state["targets"])
+
+    def list_filter(i):
+        params = {"limit": 20, "after": encode_cursor(random_id())}
+        for name, enum in (("species", PetSpecies), ("status", PetStatus), ("gender", PetGender)):
+            if rng.random() < 0.5:
+                params[name] = rng.choice(list(enum)).value
+        return {"method": "GET", "url": "/api/pets", "params": params}
+
+    def create(i):
+        return {"method": "POST", "url": "/api/pets", "headers": shelter,
+                "data": {"name": f"Created {i}", "age": "1 year", "species": "Cat", "breed": "Tabby",
+                         "description": "Created by the benchmark.", "gender": "Male"},
+                "files": {"image": (f"bench-{i}.jpg", make_image(i), "image/jpeg")}}
+
+    def update(i):
+        return {"method": "PUT", "url": f"/api/pets/{update_targets[i % len(update_targets)]}", "headers": shelter,
+                "data": {"description": f"Updated {i}", "temperament": rng.choice(["Calm", "Playful", "Shy"])}}
+
+    def apply(i):
+        return {"method": "POST", "url": "/api/applications", "headers": adopter,
+                "json": {"pet_id": random_id(), "user_id": BENCH_ADOPTER_UID, "shelter_id": 1,
+                         "full_name": "Bench Adopter", "email": "bench-adopter@example.com", "phone": "555-0100",
+                         "address": "1 Bench Street", "why_adopt": "Benchmarking."}}
+
+    return {
+        "profile": lambda i: {"method": "GET", "url": "/api/auth/profile", "headers": adopter},
+        "list": lambda i: {"method": "GET", "url": "/api/pets", "params": {"limit": 20}},
+        "list_filter": list_filter,
+        "detail": lambda i: {"method": "GET", "url": f"/api/pets/{random_id()}"},
+        "create": create,
+        "update": update,
+        # Each delete consumes one target pet, so there are never more deletes than targets.
+        "delete": lambda i: {"method": "DELETE", "url": f"/api/pets/{delete_targets.pop()}", "headers": shelter},
+        "apply": apply,
+    }
+
+
+async def run_scenario(client, build: Callable, n_requests: int, concurrency: int) -> dict:
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    errors = 0
+    next_index = 0
+
+    async def worker():
+        nonlocal errors, next_index
+        while next_index < n_requests:
+            index = next_index
+            next_index += 1
+            request = build(index)  # built outside the timed section (e.g. image encoding)
+            start = time.perf_counter()
+            try:
+                response = await client.request(**request)
+                code = response.status_code
+            except Exception:
+                code = 0
+            latencies.append(time.perf_counter() - start)
+            statuses[code] = statuses.get(code, 0) + 1
+            if code == 0 or code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, statuses, errors, time.perf_counter() - start)
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Regressions against a baseline results file: p95 up or throughput down by more than `tolerance`."""
+    regressions = []
+    for name, current in results["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(name)
+        if not before:
+            continue
+        p95, old_p95 = current["latency_ms"]["p95"], before["latency_ms"]["p95"]
+        rps, old_rps = current["throughput_rps"], before["throughput_rps"]
+        if old_p95 and p95 > old_p95 * (1 + tolerance):
+            regressions.append(f"{name}: p95 {old_p95:.2f} -> {p95:.2f} ms")
+        if old_rps and rps < old_rps * (1 - tolerance):
+            regressions.append(f"{name}: throughput {old_rps:.1f} -> {rps:.1f} req/s")
+    return regressions
+
+
+async def amain(args) -> int:
+    output = os.path.abspath(args.output)
+    baseline = json.load(open(args.baseline)) if args.baseline else None
+    workdir = prepare_environment(args)
+
+    import httpx
+    from backend_python import main
+
+    scenarios = args.endpoints or SCENARIOS
+    targets = args.requests if ("update" in scenarios or "delete" in scenarios) else 0
+    started = time.perf_counter()
+    state = seed(args.scale, targets)
+    print(f"Database ready in {time.perf_counter() - started:.1f}s "
+          f"({state['dialect']}, pet ids {state['min_id']}..{state['max_id']}, workdir {workdir})")
+
+    # Emulate application startup (threadpool sizing, schema checks) as under uvicorn.
+    await main.on_startup()
+    builders = build_scenarios(state, random.Random(args.seed))
+    results = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": state["dialect"],
+            "scale": args.scale,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "threadpool": main.THREADPOOL_SIZE,
+            "response_cache": not args.no_cache,
+        },
+        "endpoints": {},
+    }
+
+    transport = httpx.ASGITransport(app=main.app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            print(f"{'endpoint':<12} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+            for name in scenarios:
+                build = builders[name]
+                if args.warmup and name not in ("create", "update", "delete", "apply"):
+                    await run_scenario(client, build, args.warmup, args.concurrency)
+                summary = await run_scenario(client, build, args.requests, args.concurrency)
+                results["endpoints"][name] = summary
+                latency = summary["latency_ms"]
+                print(f"{name:<12} {summary['throughput_rps']:>9.1f} {latency['p50']:>9.2f} "
+                      f"{latency['p95']:>9.2f} {latency['p99']:>9.2f} {summary['errors']:>7}")
+    finally:
+        await main.job_queue.stop()
+        main.on_shutdown()
+
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+
+    if baseline:
+        regressions = compare(results, baseline, args.max_regression)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.max_regression:.0%} against {args.baseline}")
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=parse_scale, default=parse_scale("1k"), help="pets in the database: 1k, 100k, 1m, ...")
+    parser.add_argument("--requests", type=int, default=200, help="measured requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=20, help="unmeasured requests before each read endpoint")
+    parser.add_argument("--endpoints", type=lambda v: v.split(","), help=f"comma separated subset of {','.join(SCENARIOS)}")
+    parser.add_argument("--database-url", help="benchmark against this (disposable) database instead of a scratch SQLite file")
+    parser.add_argument("--no-cache", action="store_true", help="disable the pet response cache")
+    parser.add_argument("--output", default="bench-api-results.json")
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="allowed p95/throughput change (0.2 = 20%%)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+    unknown = set(args.endpoints or []) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown endpoints: {', '.join(sorted(unknown))}")
+    return args
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(amain(parse_args(sys.argv[1:]))))
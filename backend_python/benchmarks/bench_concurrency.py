@@ -0,0 +1,126 @@
+# backend_python/benchmarks/bench_concurrency.py
+"""
+Concurrency benchmark for GET /api/pets.
+
+Compares the old handler shape (an `async def` endpoint calling the synchronous Session,
+which blocks the event loop) against the current threadpool-offloaded handler, under many
+concurrent requests. A fixed per-statement delay emulates the network round trip to Postgres
+so the numbers are meaningful against a local SQLite file.
+
+Both variants run the same handler body (main.get_pets: same query, same serialization) behind
+the same middleware, with the pet response cache off, so the difference is only where the
+synchronous work runs.
+
+    python -m backend_python.benchmarks.bench_concurrency --requests 400 --concurrency 50
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+# Settings are read at import time, so point the app at a scratch database first. Every
+# request must reach the database: with the response cache on, the threadpool variant would
+# mostly measure cache hits.
+_DB_FILE = os.path.join(tempfile.mkdtemp(prefix="petpals-bench-"), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_DB_FILE}"
+os.environ["PET_CACHE_TTL_SECONDS"] = "0"
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import event
+
+from backend_python import main
+from backend_python.migrations import migrate
+from backend_python.models import Pet, PetSpecies, PetStatus, PetGender
+
+
+def seed(n_pets: int):
+    migrate()
+    db = main.SessionLocal()
+    try:
+        db.add_all([
+            Pet(name=f"Pet {i}", age="2 years", species=PetSpecies.dog, breed="Mixed",
+                status=PetStatus.available, gender=PetGender.female)
+            for i in range(n_pets)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+
+def add_db_latency(latency_s: float):
+    # Sleeping inside the cursor hook holds the connection like a real round trip would.
+    @event.listens_for(main.get_engine(), "before_cursor_execute")
+    def _delay(conn, cursor, statement, parameters, context, executemany):
+        time.sleep(latency_s)
+
+
+def build_blocking_app() -> FastAPI:
+    """The pre-threadpool handler shape: `async def` running the same sync handler body on the event loop."""
+    legacy = FastAPI()
+    legacy.user_middleware = list(main.app.user_middleware)  # same middleware stack as main.app
+
+    @legacy.get("/api/pets")
+    async def get_pets(limit: int = 20):
+        # Session is managed inline: a threadpool-run get_db teardown could not release the
+        # connection while the loop itself is blocked waiting on the pool.
+        db = main.SessionLocal()
+        try:
+            return main.get_pets(species=None, status=None, gender=None, limit=limit, after=None, fields=None,
+                                 format=None, accept=None, if_none_match=None, db=db)
+        finally:
+            db.close()
+
+    return legacy
+
+
+async def run(app, n_requests: int, concurrency: int, path: str):
+    transport = httpx.ASGITransport(app=app)
+    sem = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one():
+            async with sem:
+                r = await client.get(path)
+                r.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(n_requests)))
+        return time.perf_counter() - start
+
+
+async def amain(args):
+    seed(args.pets)
+    add_db_latency(args.db_latency_ms / 1000.0)
+    # Emulate application startup so the threadpool is sized as in production.
+    await main.on_startup()
+
+    results = []
+    for label, app, path in (
+        ("blocking (async def + sync Session)", build_blocking_app(), "/api/pets?limit=20"),
+        ("threadpool (current handlers)", main.app, "/api/pets?limit=20"),
+    ):
+        elapsed = await run(app, args.requests, args.concurrency, path)
+        results.append((label, elapsed, args.requests / elapsed))
+    await main.job_queue.stop()
+    main.on_shutdown()
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}, "
+          f"{args.db_latency_ms} ms simulated DB latency, threadpool {main.THREADPOOL_SIZE}")
+    for label, elapsed, rps in results:
+        print(f"  {label:<40} {elapsed:8.2f} s  {rps:9.1f} req/s")
+    print(f"  speedup: {results[1][2] / results[0][2]:.1f}x")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--pets", type=int, default=200)
+    parser.add_argument("--db-latency-ms", type=float, default=5.0)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    asyncio.run(amain(parse_args(sys.argv[1:])))
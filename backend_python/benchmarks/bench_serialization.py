@@ -0,0 +1,105 @@
+# backend_python/benchmarks/bench_serialization.py
+"""
+Serialization benchmark for pet list responses (the work GET /api/pets does on a cache miss).
+
+Compares, for the same N pets:
+  fastapi-default  ORM objects -> PetDisplay.model_validate per row -> jsonable_encoder -> json.dumps
+                   (what a `response_model=List[PetDisplay]` endpoint returning ORM objects does)
+  type-adapter     ORM objects -> one pre-built TypeAdapter(List[PetDisplay]) -> dump_json
+  fast-path        column tuples -> plain dicts -> orjson (serialization.pet_rows_to_json)
+
+Each variant includes its query, since loading ORM objects is part of the cost being removed.
+All three must produce the same JSON; the benchmark checks that before timing.
+
+    python -m backend_python.benchmarks.bench_serialization --pets 10000 50000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+# The modules read DATABASE_URL at import time, so point them at a scratch database first.
+_DB_FILE = os.path.join(tempfile.mkdtemp(prefix="petpals-bench-"), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_DB_FILE}"
+
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from backend_python.database import SessionLocal, engine
+from backend_python.migrations import migrate
+from backend_python.models import Pet
+from backend_python.schemas import PetDisplay
+from backend_python.seed_db import seed_synthetic
+from backend_python.serialization import PET_DISPLAY_COLUMNS, orjson, pet_rows_to_json
+
+_adapter = TypeAdapter(List[PetDisplay])
+
+
+def fastapi_default(db, limit):
+    pets = db.query(Pet).order_by(Pet.id).limit(limit).all()
+    return json.dumps(jsonable_encoder([PetDisplay.model_validate(p) for p in pets]),
+                      separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def type_adapter(db, limit):
+    pets = db.query(Pet).order_by(Pet.id).limit(limit).all()
+    return _adapter.dump_json(_adapter.validate_python(pets, from_attributes=True))
+
+
+def fast_path(db, limit):
+    return pet_rows_to_json(db.query(*PET_DISPLAY_COLUMNS).order_by(Pet.id).limit(limit).all())
+
+
+VARIANTS = [("fastapi-default", fastapi_default), ("type-adapter", type_adapter), ("fast-path", fast_path)]
+
+
+def measure(fn, limit, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        db = SessionLocal()  # fresh session each time: no identity map reuse between runs
+        try:
+            start = time.perf_counter()
+            fn(db, limit)
+            best = min(best, time.perf_counter() - start)
+        finally:
+            db.close()
+    return best
+
+
+def main(args):
+    migrate()
+    seed_synthetic(pets=max(args.pets), profiles=100, applications=0)
+    # Give some pets content-addressed images so image_variants is exercised as well.
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "UPDATE pets SET image_url = '/static/images/pets/' || printf('%064x', id) || '.jpg' WHERE id % 2 = 0")
+
+    print(f"JSON encoder: {'orjson' if orjson is not None else 'json (orjson not installed)'}, best of {args.repeat}")
+    for n in args.pets:
+        db = SessionLocal()
+        try:
+            outputs = [json.loads(fn(db, n)) for _, fn in VARIANTS]
+        finally:
+            db.close()
+        assert all(o == outputs[0] for o in outputs), "variants produced different JSON"
+
+        timings = [(label, measure(fn, n, args.repeat)) for label, fn in VARIANTS]
+        baseline = timings[0][1]
+        print(f"{n:,} pets")
+        for label, seconds in timings:
+            print(f"  {label:<16} {seconds * 1000:9.1f} ms  {n / seconds:12,.0f} rows/s  {baseline / seconds:5.1f}x")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pets", type=int, nargs="+", default=[10000, 50000])
+    parser.add_argument("--repeat", type=int, default=5)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    main(parse_args(sys.argv[1:]))
@@ -0,0 +1,102 @@
+# backend_python/benchmarks/bench_startup.py
+"""
+Cold-start benchmark: what a freshly spawned worker pays before it can serve a request.
+
+Each run is a new Python process (so imports are really cold) against an already
+migrated and seeded database, and measures
+  import   `import backend_python.main`
+  startup  the startup hook, with the number of SQL statements it sent
+for two startup paths:
+  create-all  what startup used to do: Base.metadata.create_all (reflects every table),
+              ensure_indexes (one existence check per declared index) and the search DDL
+  migrations  the current startup: one schema-version query (migrations.check_schema)
+
+    python -m backend_python.benchmarks.bench_startup --runs 10
+    python -m backend_python.benchmarks.bench_startup --database-url postgresql://...   # disposable DB
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+MODES = ["create-all", "migrations"]
+
+
+def child(mode: str) -> dict:
+    """Runs inside the spawned process; prints its timings as JSON."""
+    started = time.perf_counter()
+    from backend_python import main
+    imported = time.perf_counter()
+
+    from sqlalchemy import event
+    from backend_python.database import get_engine
+    from backend_python.migrations import check_schema
+
+    statements = []
+    event.listen(get_engine(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+    before = time.perf_counter()
+    if mode == "create-all":
+        from backend_python.models import Base, ensure_indexes
+        from backend_python.search import ensure_search_schema
+        engine = get_engine()
+        Base.metadata.create_all(engine)
+        ensure_indexes(engine)
+        with engine.begin() as conn:
+            ensure_search_schema(conn)
+    else:
+        # on_startup's work, minus the event loop and threadpool hops around it
+        check_schema(main.configure_engine())
+    finished = time.perf_counter()
+    main.on_shutdown()
+    return {"import_ms": (imported - started) * 1000, "startup_ms": (finished - before) * 1000,
+            "statements": len(statements)}
+
+
+def run_child(mode: str, env: dict, workdir: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-m", "backend_python.benchmarks.bench_startup", "--child", mode],
+        env=env, cwd=workdir, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(args):
+    workdir = tempfile.mkdtemp(prefix="petpals-bench-")
+    os.makedirs(os.path.join(workdir, "static"), exist_ok=True)  # main mounts ./static
+    env = dict(os.environ)
+    env["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.getcwd(), env.get("PYTHONPATH")]))
+    subprocess.run(
+        [sys.executable, "-c", "from backend_python.seed_db import seed_synthetic; "
+                               f"seed_synthetic(pets={args.pets}, profiles=100, applications=100)"],
+        env=env, cwd=workdir, check=True, capture_output=True,
+    )
+
+    print(f"{args.runs} cold starts per mode, medians")
+    print(f"{'mode':<12} {'import ms':>10} {'startup ms':>11} {'statements':>11}")
+    for mode in MODES:
+        runs = [run_child(mode, env, workdir) for _ in range(args.runs)]
+        print(f"{mode:<12} {statistics.median(r['import_ms'] for r in runs):>10.1f} "
+              f"{statistics.median(r['startup_ms'] for r in runs):>11.2f} "
+              f"{statistics.median(r['statements'] for r in runs):>11.0f}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--pets", type=int, default=1000)
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args(sys.argv[1:])
+    if args.child:
+        print(json.dumps(child(args.child)))
+    else:
+        main(args)
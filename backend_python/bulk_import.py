@@ -0,0 +1,154 @@
+# backend_python/bulk_import.py
+# Streaming CSV/NDJSON pet import and batched bulk inserts.
+import codecs
+import csv
+import io
+import json
+import os
+from typing import Any, BinaryIO, Dict, Iterator, List, Sequence, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import Table, insert
+
+from .models import Pet
+from .schemas import PetImportRow, PetImportError, PetImportResult
+
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "1000"))
+# Error details kept in the response; further failures are only counted.
+IMPORT_MAX_REPORTED_ERRORS = int(os.getenv("IMPORT_MAX_REPORTED_ERRORS", "1000"))
+
+
+class ImportAborted(Exception):
+    """
+    The rest of a CSV could not be read (bad UTF-8, a malformed or oversized field). Batches
+    committed before `row` stay imported; import_pets sets `inserted` to how many rows that was.
+    """
+
+    def __init__(self, row: int, reason: str):
+        super().__init__(f"Row {row}: {reason}")
+        self.row = row
+        self.reason = reason
+        self.inserted = 0
+
+
+def _lines(stream: BinaryIO) -> Iterator[bytes]:
+    # Raw lines, decoded one at a time by the caller rather than by a TextIOWrapper (which
+    # decodes whole blocks), so a bad byte is reported at its own row.
+    for index, line in enumerate(stream):
+        yield line[len(codecs.BOM_UTF8):] if index == 0 and line.startswith(codecs.BOM_UTF8) else line
+
+
+def iter_import_rows(stream: BinaryIO, fmt: str) -> Iterator[Tuple[int, Any]]:
+    """
+    Yield (row number, parsed row) from a CSV (with a header line) or NDJSON byte stream,
+    one row at a time. A row that cannot be parsed is yielded as a ValueError. A CSV that
+    cannot be read past some row raises ImportAborted, since its later rows cannot be
+    told apart reliably.
+    """
+    if fmt == "csv":
+        number = 0
+        try:
+            reader = csv.DictReader(line.decode("utf-8") for line in _lines(stream))
+            for number, row in enumerate(reader, start=1):
+                # Empty CSV cells mean "not provided" (so defaults such as status still apply).
+                yield number, {k: v for k, v in row.items() if k is not None and v != ""}
+        except UnicodeDecodeError:
+            raise ImportAborted(number + 1, "the file is not valid UTF-8.")
+        except csv.Error as e:
+            raise ImportAborted(number + 1, f"malformed CSV ({e}).")
+    else:
+        for number, line in enumerate(_lines(stream), start=1):
+            try:
+                text = line.decode("utf-8")
+            except UnicodeDecodeError:
+                yield number, ValueError("Row is not valid UTF-8.")
+                continue
+            if not text.strip():
+                continue
+            try:
+                yield number, json.loads(text)
+            except ValueError as e:
+                yield number, ValueError(f"Invalid JSON: {e}")
+
+
+def _copy_value(value) -> str:
+    # Postgres COPY text format
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+def bulk_insert(connection, table: Table, rows: Sequence[Dict[str, Any]]) -> None:
+    """
+    Insert many rows in one round trip: COPY on Postgres, a single executemany
+    INSERT elsewhere. All rows must have the same keys; enum columns take member names.
+    """
+    if not rows:
+        return
+    if connection.dialect.name == "postgresql":
+        columns = list(rows[0].keys())
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write("\t".join(_copy_value(row[c]) for c in columns))
+            buffer.write("\n")
+        buffer.seek(0)
+        cursor = connection.connection.cursor()  # the raw DBAPI (psycopg2) connection
+        try:
+            cursor.copy_expert(f"COPY {table.name} ({', '.join(columns)}) FROM STDIN", buffer)
+        finally:
+            cursor.close()
+    else:
+        connection.execute(insert(table), list(rows))
+
+
+def import_pets(db, rows: Iterator[Tuple[int, Any]], owner_id: int, batch_size: int = None) -> PetImportResult:
+    """
+    Validate rows against PetImportRow and insert the valid ones in batches, committing
+    after each batch so memory and lock time stay bounded however large the file is.
+    On ImportAborted the pending batch is rolled back and the error re-raised with the
+    number of rows already committed.
+    """
+    batch_size = batch_size or IMPORT_BATCH_SIZE
+    inserted, failed = 0, 0
+    errors: List[PetImportError] = []
+    batch: List[Dict[str, Any]] = []
+
+    def flush():
+        nonlocal inserted
+        bulk_insert(db.connection(), Pet.__table__, batch)
+        db.commit()
+        inserted += len(batch)
+        batch.clear()
+
+    try:
+        for number, raw in rows:
+            try:
+                if isinstance(raw, Exception):
+                    raise raw
+                if not isinstance(raw, dict):
+                    raise ValueError("Row must be an object.")
+                row = PetImportRow.model_validate(raw)
+            except ValidationError as e:
+                failed += 1
+                if len(errors) < IMPORT_MAX_REPORTED_ERRORS:
+                    errors.append(PetImportError(row=number, errors=[
+                        f"{'.'.join(str(p) for p in err['loc']) or 'row'}: {err['msg']}" for err in e.errors()
+                    ]))
+                continue
+            except ValueError as e:
+                failed += 1
+                if len(errors) < IMPORT_MAX_REPORTED_ERRORS:
+                    errors.append(PetImportError(row=number, errors=[str(e)]))
+                continue
+
+            batch.append({**row.model_columns(), "owner_id": owner_id})
+            if len(batch) >= batch_size:
+                flush()
+    except ImportAborted as e:
+        db.rollback()
+        e.inserted = inserted
+        raise
+    flush()
+    return PetImportResult(inserted=inserted, failed=failed, errors=errors)
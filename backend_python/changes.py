@@ -0,0 +1,172 @@
+# backend_python/changes.py
+# Server-Sent Events feed of pet changes (GET /api/pets/changes), so clients can follow
+# availability instead of re-polling GET /api/pets.
+#
+# - Every committed pet create/update/delete (via sync_pet_views, or from another worker over the
+#   invalidation bus) becomes one event with the next sequence number. The event is encoded to
+#   SSE bytes once, in the writing thread, and the same bytes object is queued to every
+#   subscriber: one more dashboard costs a queue slot, not an encode.
+# - Fan-out is a single call_soon_threadsafe per event; the loop then offers it to each
+#   subscriber's bounded queue. A subscriber that falls CHANGE_FEED_QUEUE_SIZE events behind is
+#   disconnected and is expected to reconnect with Last-Event-ID.
+# - The last CHANGE_FEED_HISTORY events are kept for resume. A Last-Event-ID that is too old,
+#   from before a restart or from another worker gets a `reset` event instead: refetch, then follow.
+#
+# Event ids are "<epoch>:<seq>". The epoch is random per feed (so per worker process); seq
+# increases by one per event. Each worker numbers its events independently (events from other
+# workers are re-published under local numbers), so an id is only meaningful to the feed that
+# issued it: an id with another epoch always gets a `reset`, never a partial replay.
+import asyncio
+import json
+import os
+import threading
+import uuid
+from collections import deque
+from typing import Deque, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from .schemas import PetDisplay
+
+CHANGE_FEED_HISTORY = int(os.getenv("CHANGE_FEED_HISTORY", "1000"))      # events kept for Last-Event-ID
+CHANGE_FEED_QUEUE_SIZE = int(os.getenv("CHANGE_FEED_QUEUE_SIZE", "256"))  # per client, then dropped
+CHANGE_FEED_HEARTBEAT_SECONDS = float(os.getenv("CHANGE_FEED_HEARTBEAT_SECONDS", "15"))
+CHANGE_FEED_RETRY_MS = 3000  # client reconnect delay, sent once per stream
+
+SSE_MEDIA_TYPE = "text/event-stream"
+HEARTBEAT = b": keepalive\n\n"
+
+
+def sse_event(event_id: Optional[str], event: str, data: str) -> bytes:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {data}\n\n".encode("utf-8")
+
+
+class FeedEvent:
+    __slots__ = ("seq", "owner_ids", "payload")
+
+    def __init__(self, seq: int, owner_ids: Optional[FrozenSet[int]], payload: bytes):
+        self.seq = seq
+        self.owner_ids = owner_ids  # shelters the pet belonged to before/after; None = every subscriber
+        self.payload = payload
+
+    def matches(self, owner_id: Optional[int]) -> bool:
+        return owner_id is None or self.owner_ids is None or owner_id in self.owner_ids
+
+
+class Subscriber:
+    def __init__(self, owner_id: Optional[int], queue_size: int):
+        self.owner_id = owner_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.last_seq = 0
+        self.dropped = False
+
+    def offer(self, event: FeedEvent) -> None:
+        if self.dropped or event.seq <= self.last_seq:
+            return  # already sent (replayed from history) or being dropped
+        if not event.matches(self.owner_id):
+            return
+        self.last_seq = event.seq
+        try:
+            self.queue.put_nowait(event.payload)
+        except asyncio.QueueFull:
+            self.dropped = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)  # end of stream: reconnect with Last-Event-ID
+
+
+class PetChangeFeed:
+    def __init__(self, history: int = CHANGE_FEED_HISTORY, queue_size: int = CHANGE_FEED_QUEUE_SIZE):
+        self._lock = threading.Lock()
+        self.epoch = uuid.uuid4().hex[:12]
+        self._seq = 0
+        self._history: Deque[FeedEvent] = deque(maxlen=history)
+        self._queue_size = queue_size
+        self._subscribers: Set[Subscriber] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    # --- Publishing (any thread) ---
+
+    def publish(self, op: str, pet_id: Optional[int] = None, pet=None,
+                owner_ids: Optional[Iterable[Optional[int]]] = None) -> int:
+        """
+        Record one change and send it to the subscribers. `pet` is the row after the change
+        (None on delete); `owner_ids` the shelters it concerns (None: everybody, e.g. a reset).
+        """
+        pet_json = PetDisplay.model_validate(pet).model_dump_json() if pet is not None else "null"
+        with self._lock:
+            self._seq += 1
+            seq = self._seq
+            data = f'{{"seq":{seq},"op":{json.dumps(op)},"id":{json.dumps(pet_id)},"pet":{pet_json}}}'
+            event = FeedEvent(seq, frozenset(owner_ids) if owner_ids is not None else None,
+                              sse_event(self._event_id(seq), op if op == "reset" else "pet", data))
+            self._history.append(event)
+            loop = self._loop if self._subscribers else None
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._fan_out, event)
+        return seq
+
+    def _event_id(self, seq: int) -> str:
+        return f"{self.epoch}:{seq}"
+
+    def _parse_event_id(self, event_id: str) -> Optional[int]:
+        """The seq of an id this feed issued; None for a malformed id or another feed's (epoch)."""
+        epoch, _, seq = event_id.strip().partition(":")
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        return int(seq)
+
+    def _fan_out(self, event: FeedEvent) -> None:
+        for subscriber in list(self._subscribers):
+            subscriber.offer(event)
+
+    # --- Subscribing (event loop) ---
+
+    def subscribe(self, last_event_id: Optional[str], owner_id: Optional[int]) -> Tuple[Subscriber, List[bytes]]:
+        """Register a subscriber; returns it and the events to send first (replay, or a reset)."""
+        subscriber = Subscriber(owner_id, self._queue_size)
+        with self._lock:
+            self._loop = asyncio.get_running_loop()
+            self._subscribers.add(subscriber)
+            subscriber.last_seq = self._seq
+            backlog = []
+            if last_event_id is not None:
+                oldest = self._history[0].seq if self._history else self._seq + 1
+                last = self._parse_event_id(last_event_id)
+                if last is not None and oldest - 1 <= last <= self._seq:
+                    backlog = [e.payload for e in self._history if e.seq > last and e.matches(owner_id)]
+                else:
+                    # Unknown position (another worker, a restart, or too far back): the client must refetch.
+                    backlog = [sse_event(self._event_id(self._seq), "reset", '{"reason":"resume_unavailable"}')]
+        return subscriber, backlog
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"epoch": self.epoch, "subscribers": len(self._subscribers), "last_seq": self._seq,
+                    "history": len(self._history), "oldest_seq": self._history[0].seq if self._history else None}
+
+    async def stream(self, last_event_id: Optional[str] = None, owner_id: Optional[int] = None,
+                     heartbeat: float = CHANGE_FEED_HEARTBEAT_SECONDS):
+        """The SSE body for one client: retry hint, replay/reset, then live events and heartbeats."""
+        subscriber, backlog = self.subscribe(last_event_id, owner_id)
+        try:
+            yield f"retry: {CHANGE_FEED_RETRY_MS}\n\n".encode("ascii")
+            for payload in backlog:
+                yield payload
+            while True:
+                try:
+                    payload = await asyncio.wait_for(subscriber.queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield HEARTBEAT
+                    continue
+                if payload is None:
+                    return  # too slow: dropped
+                yield payload
+        finally:
+            self.unsubscribe(subscriber)
+
+
+pet_change_feed = PetChangeFeed()
@@ -0,0 +1,131 @@
+# backend_python/compression.py
+# Negotiated gzip for API responses above a size threshold.
+#
+# A small ASGI middleware of our own rather than a subclass of Starlette's GZipMiddleware: the
+# behaviour needed here (flush every streamed chunk, never touch SSE) has to hold on the
+# Starlette version pinned in requirements.txt, whose responder has neither hook.
+import gzip
+import io
+import os
+
+from starlette.datastructures import Headers, MutableHeaders
+
+GZIP_MIN_SIZE = int(os.getenv("GZIP_MIN_SIZE", "1024"))  # bytes; smaller bodies are sent as-is
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))           # 9 costs much more CPU for a few % smaller
+# Not compressed here: /static serves images (already compressed) and its own precompressed .gz/.br files.
+GZIP_SKIP_PREFIXES = ("/static",)
+# Server-Sent Events are passed through: a compressor would hold events back, and proxies buffer them.
+GZIP_EXCLUDED_CONTENT_TYPES = ("text/event-stream",)
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """
+    Whether an Accept-Encoding header allows gzip: listed with a q-value above 0, or not listed
+    and covered by `*`. "gzip;q=0" refuses it; a malformed q-value counts as a refusal.
+    """
+    wildcard = False
+    for coding in accept_encoding.split(","):
+        name, *params = (part.strip() for part in coding.split(";"))
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        name = name.lower()
+        if name == "gzip":
+            return q > 0
+        if name == "*":
+            wildcard = q > 0
+    return wildcard
+
+
+class _FlushingGZipResponder:
+    """Compresses one response; each streamed chunk is sync-flushed so it reaches the client now."""
+
+    def __init__(self, app, minimum_size: int, compresslevel: int):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.send = None
+        self.initial_message = None
+        self.started = False
+        self.passthrough = False
+        self.gzip_buffer = io.BytesIO()
+        self.gzip_file = gzip.GzipFile(mode="wb", fileobj=self.gzip_buffer, compresslevel=compresslevel)
+
+    async def __call__(self, scope, receive, send):
+        self.send = send
+        with self.gzip_buffer, self.gzip_file:
+            await self.app(scope, receive, self.send_with_gzip)
+
+    async def _start(self) -> None:
+        if not self.started:
+            self.started = True
+            await self.send(self.initial_message)
+
+    async def send_with_gzip(self, message) -> None:
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            # Held back until the first body chunk decides the headers.
+            self.initial_message = message
+            headers = Headers(raw=message["headers"])
+            self.passthrough = ("content-encoding" in headers
+                                or headers.get("content-type", "").startswith(GZIP_EXCLUDED_CONTENT_TYPES))
+            return
+        if message_type != "http.response.body" or self.passthrough:
+            await self._start()
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if not self.started:
+            if len(body) < self.minimum_size and not more_body:
+                await self._start()
+                await self.send(message)
+                return
+            headers = MutableHeaders(raw=self.initial_message["headers"])
+            headers["Content-Encoding"] = "gzip"
+            headers.add_vary_header("Accept-Encoding")
+            del headers["Content-Length"]
+            body = self._compress(body, more_body)
+            if not more_body:
+                headers["Content-Length"] = str(len(body))
+            await self._start()
+        else:
+            body = self._compress(body, more_body)
+        await self.send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+    def _compress(self, body: bytes, more_body: bool) -> bytes:
+        self.gzip_file.write(body)
+        if more_body:
+            # Z_SYNC_FLUSH: each streamed chunk reaches the client now instead of sitting in zlib's buffer.
+            self.gzip_file.flush()
+        else:
+            self.gzip_file.close()
+        data = self.gzip_buffer.getvalue()
+        self.gzip_buffer.seek(0)
+        self.gzip_buffer.truncate()
+        return data
+
+
+class CompressionMiddleware:
+    """
+    gzip for clients that accept it, minus /static, flushing every chunk of a streaming
+    (e.g. NDJSON) response so compression does not hold back time-to-first-byte.
+    SSE (text/event-stream) and already encoded responses are never compressed.
+    """
+
+    def __init__(self, app, minimum_size: int = GZIP_MIN_SIZE, compresslevel: int = GZIP_LEVEL):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.compresslevel = compresslevel
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] != "http" or scope["path"].startswith(GZIP_SKIP_PREFIXES)
+                or not accepts_gzip(Headers(scope=scope).get("accept-encoding", ""))):
+            await self.app(scope, receive, send)
+            return
+        await _FlushingGZipResponder(self.app, self.minimum_size, self.compresslevel)(scope, receive, send)
@@ -1,22 +1,148 @@
 import os
+import threading
+import time
 from dotenv import load_dotenv
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.pool import QueuePool
 
-# Load environment variables from .env file
+# Load environment variables from .env file.
+# The one place this happens: every other module imports database (directly or through models)
+# before reading its own settings, so they all see the .env values.
 load_dotenv()
 
-# Load DATABASE_URL from environment variables (assuming it's in .env)
-DATABASE_URL = os.getenv("DATABASE_URL")
-if not DATABASE_URL:
-    raise ValueError("DATABASE_URL environment variable not set. Please create a .env file.")
 
-# Configure the database engine
-engine = create_engine(DATABASE_URL, echo=False) # set echo=True for debugging SQL queries
+def get_database_url() -> str:
+    """DATABASE_URL from the environment (assuming it's in .env), read when the engine is first needed."""
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        raise ValueError("DATABASE_URL environment variable not set. Please create a .env file.")
+    return database_url
+
+# --- Connection pool settings ---
+# One engine (and so one pool) per process. Size it against the number of threads that
+# can query at once (THREADPOOL_SIZE in main.py) times the number of workers.
+# Like DATABASE_URL, these are read when an engine is built, not at import.
+def pool_settings() -> dict:
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),      # seconds to wait for a free connection
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "1") == "1",     # test connections on checkout
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),      # seconds before a connection is replaced
+    }
+
+
+def statement_timeout_ms() -> int:
+    return int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))  # Postgres only, 0 = no limit
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long callers wait to check out a connection."""
+
+    def __init__(self, creator, pool_size: int = 5, max_overflow: int = 10, **kwargs):
+        super().__init__(creator, pool_size=pool_size, max_overflow=max_overflow, **kwargs)
+        self.max_overflow = max_overflow  # as configured (QueuePool only keeps it privately)
+        self._stats_lock = threading.Lock()
+        self.wait_count = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        self.timeouts = 0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            with self._stats_lock:
+                self.wait_count += 1
+                self.wait_time_total += waited
+                self.wait_time_max = max(self.wait_time_max, waited)
+
+
+def create_db_engine(database_url: str = None, **overrides):
+    """
+    The single place engines are built. Pool sizing, pre-ping, recycling and the
+    statement timeout come from the DB_* environment variables, read at this point.
+    """
+    url = make_url(database_url or get_database_url())
+    kwargs = {"echo": False}  # set echo=True for debugging SQL queries
+    if not (url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")):
+        # In-memory SQLite uses a single shared connection; everything else gets a sized pool.
+        kwargs.update(poolclass=InstrumentedQueuePool, **pool_settings())
+    timeout_ms = statement_timeout_ms()
+    if url.get_backend_name() == "postgresql" and timeout_ms > 0:
+        kwargs["connect_args"] = {"options": f"-c statement_timeout={timeout_ms}"}
+    kwargs.update(overrides)
+    return create_engine(url, **kwargs)
+
+
+def pool_stats(bind=None) -> dict:
+    """Live numbers for sizing the pool: connections in use, overflow and checkout waits."""
+    pool = (bind if bind is not None else get_engine()).pool
+    stats = {"pool_class": type(pool).__name__, "status": pool.status()}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            pool_size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+        )
+    if isinstance(pool, InstrumentedQueuePool):
+        stats.update(
+            max_overflow=pool.max_overflow,
+            checkouts=pool.wait_count,
+            checkout_timeouts=pool.timeouts,
+            wait_time_total_ms=round(pool.wait_time_total * 1000, 3),
+            wait_time_avg_ms=round(pool.wait_time_total * 1000 / pool.wait_count, 3) if pool.wait_count else 0.0,
+            wait_time_max_ms=round(pool.wait_time_max * 1000, 3),
+        )
+    return stats
+
+
+# --- The process-wide engine ---
+# Built on first use rather than at import, so importing the app (or a tool that never
+# touches the database) does not parse settings, load the driver or size a pool.
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = create_db_engine()
+                SessionLocal.configure(bind=_engine)
+    return _engine
+
+
+class _LazySessionmaker(sessionmaker):
+    """sessionmaker whose engine is created by the first session rather than at import."""
+
+    def __call__(self, **local_kw):
+        if _engine is None:
+            get_engine()
+        return super().__call__(**local_kw)
+
 
 # Configure a sessionmaker for database interactions
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = _LazySessionmaker(autocommit=False, autoflush=False)
+
+
+def __getattr__(name):
+    # `from .database import engine` keeps working for scripts; it builds the engine on access.
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Base class for your models
 Base = declarative_base()
@@ -27,4 +153,4 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
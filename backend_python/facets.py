@@ -0,0 +1,130 @@
+# backend_python/facets.py
+# Pet counts by species x status x gender, and per shelter (owner_id), for GET /api/pets/facets.
+#
+# The aggregate is one GROUP BY query over `pets`, held in memory as
+# (species, status, gender, owner_id) -> count and then adjusted by the pet write handlers
+# (via sync_pet_views) as each write commits, so a read never touches the database. The
+# encoded response is kept until the next change.
+#
+# Other workers' writes arrive over the invalidation bus and are applied the same way. A write
+# racing the (re)build query, or a missed notification, is not seen incrementally; the aggregate
+# is therefore also rebuilt from the table every FACET_REFRESH_SECONDS (one cheap grouped query,
+# at most once per interval, while stale counts keep being served).
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from .models import Pet
+from .pet_cache import CachedResponse, PetKey, _value, make_etag
+from .serialization import dumps
+
+FACET_REFRESH_SECONDS = float(os.getenv("FACET_REFRESH_SECONDS", "60"))
+
+FacetKey = Tuple[str, str, str, Optional[int]]  # species, status, gender, owner_id
+
+
+def _facet_key(key: PetKey) -> FacetKey:
+    return (key.species, key.status, key.gender, key.owner_id)
+
+
+class PetFacetCounts:
+    def __init__(self, refresh_seconds: float = FACET_REFRESH_SECONDS):
+        self._refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()        # guards the counts and the encoded response
+        self._build_lock = threading.Lock()  # one (re)build at a time
+        self._counts: Optional[Counter] = None
+        self._built_at = 0.0
+        self._response: Optional[CachedResponse] = None
+
+    def ensure_built(self, db: Session) -> None:
+        if self._counts is not None and time.monotonic() - self._built_at < self._refresh_seconds:
+            return
+        if self._counts is None:
+            self._build_lock.acquire()  # nothing to serve yet: wait for the first build
+        elif not self._build_lock.acquire(blocking=False):
+            return  # another request is refreshing; serve the current counts meanwhile
+        try:
+            if self._counts is not None and time.monotonic() - self._built_at < self._refresh_seconds:
+                return
+            rows = db.query(Pet.species, Pet.status, Pet.gender, Pet.owner_id, func.count(Pet.id)) \
+                .group_by(Pet.species, Pet.status, Pet.gender, Pet.owner_id)
+            counts = Counter({(_value(species), _value(status), _value(gender), owner_id): n
+                              for species, status, gender, owner_id, n in rows})
+            with self._lock:
+                self._counts = counts
+                self._built_at = time.monotonic()
+                self._response = None
+        finally:
+            self._build_lock.release()
+
+    def reset(self) -> None:
+        """Drop the aggregate; it is rebuilt on the next read (after bulk writes)."""
+        with self._lock:
+            self._counts = None
+            self._response = None
+
+    def apply(self, old: Optional[PetKey], new: Optional[PetKey]) -> None:
+        """Move one pet between buckets after a committed create (old=None), update or delete (new=None)."""
+        old_key = _facet_key(old) if old is not None else None
+        new_key = _facet_key(new) if new is not None else None
+        if old_key == new_key:
+            return
+        with self._lock:
+            if self._counts is None:
+                return
+            if old_key is not None:
+                self._counts[old_key] -= 1
+                if self._counts[old_key] <= 0:
+                    del self._counts[old_key]
+            if new_key is not None:
+                self._counts[new_key] += 1
+            self._response = None
+
+    def response(self, db: Session, owner_ids: Optional[Iterable[int]] = None) -> CachedResponse:
+        """The encoded facets (all shelters, or only `owner_ids` under by_owner), building them if needed."""
+        while True:
+            self.ensure_built(db)
+            with self._lock:
+                if self._counts is None:
+                    continue  # reset() ran between the build and here: build again
+                if owner_ids is None and self._response is not None:
+                    return self._response
+                body = dumps(self._summarize(set(owner_ids) if owner_ids is not None else None))
+                entry = CachedResponse(body=body, etag=make_etag(body))
+                if owner_ids is None:
+                    self._response = entry
+                return entry
+
+    def _summarize(self, owner_ids) -> dict:
+        by_species: Dict[str, int] = defaultdict(int)
+        by_status: Dict[str, int] = defaultdict(int)
+        by_gender: Dict[str, int] = defaultdict(int)
+        combinations: Dict[Tuple[str, str, str], int] = defaultdict(int)
+        by_owner: Dict[int, dict] = {}
+        for (species, status, gender, owner_id), n in self._counts.items():
+            by_species[species] += n
+            by_status[status] += n
+            by_gender[gender] += n
+            combinations[(species, status, gender)] += n
+            if owner_id is not None and (owner_ids is None or owner_id in owner_ids):
+                owner = by_owner.setdefault(owner_id, {"total": 0, "by_status": defaultdict(int)})
+                owner["total"] += n
+                owner["by_status"][status] += n
+        return {
+            "total": sum(by_species.values()),
+            "by_species": dict(sorted(by_species.items())),
+            "by_status": dict(sorted(by_status.items())),
+            "by_gender": dict(sorted(by_gender.items())),
+            "counts": [{"species": s, "status": st, "gender": g, "count": n}
+                       for (s, st, g), n in sorted(combinations.items())],
+            "by_owner": {str(owner_id): {"total": o["total"], "by_status": dict(sorted(o["by_status"].items()))}
+                         for owner_id, o in sorted(by_owner.items())},
+        }
+
+
+pet_facets = PetFacetCounts()
@@ -0,0 +1,176 @@
+# backend_python/images.py
+# Pre-generated, resized derivatives of content-addressed pet images.
+# Kept free of database imports: the worker processes import this module.
+import logging
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+from .uploads import UPLOAD_DIRECTORY, UPLOAD_URL_PREFIX
+
+logger = logging.getLogger(__name__)
+
+DERIVED_DIRECTORY = os.path.join(UPLOAD_DIRECTORY, "derived")
+DERIVED_URL_PREFIX = f"{UPLOAD_URL_PREFIX}/derived"
+
+# Bounding boxes (max width, max height) for each derivative size.
+DERIVATIVE_SIZES = {
+    "thumb": (160, 160),
+    "card": (480, 360),
+}
+# JPEG for universal support plus WebP as the compact modern format.
+DERIVATIVE_FORMATS = {
+    "jpg": {"format": "JPEG", "quality": 82, "optimize": True, "progressive": True},
+    "webp": {"format": "WEBP", "quality": 78, "method": 4},
+}
+
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+# A released image is deleted this long after the write that released it, so an upload of the
+# same (content-addressed) file that is still in flight can commit its pet first.
+IMAGE_DELETE_GRACE_SECONDS = float(os.getenv("IMAGE_DELETE_GRACE_SECONDS", "60"))
+
+# Any single plain file name under the upload prefix, including legacy UUID-named uploads: no
+# separators, so no way out of the directory (used with fullmatch, as is the pattern below).
+_UPLOAD_URL = re.compile(rf"{re.escape(UPLOAD_URL_PREFIX)}/(?P<filename>[\w.-]+)")
+# Matches URLs produced by uploads.save_upload: /static/images/pets/<sha256>.<ext>
+# (used with fullmatch: a trailing newline or path segment does not match either).
+_CONTENT_ADDRESSED_URL = re.compile(rf"{re.escape(UPLOAD_URL_PREFIX)}/(?P<filename>(?P<sha256>[0-9a-f]{{64}})\.\w+)")
+
+_pool: Optional[ProcessPoolExecutor] = None
+# Hashes whose derivatives are known to be on disk (only positives are remembered: a missing
+# set is looked up again until the derivatives job has written it).
+_ready = set()
+
+
+def content_hash(image_url: Optional[str]) -> Optional[str]:
+    """The sha256 of a content-addressed image URL, or None for legacy/external URLs."""
+    if not image_url:
+        return None
+    match = _CONTENT_ADDRESSED_URL.fullmatch(image_url)
+    return match.group("sha256") if match else None
+
+
+def stored_image_path(image_url: Optional[str]) -> Optional[str]:
+    """
+    The file behind an uploaded image URL (content-addressed, or a legacy UUID-named upload),
+    resolved (symlinks included) and checked to lie directly in UPLOAD_DIRECTORY; None for any
+    other URL. Image URLs are read back from the database, so they are never turned into paths
+    any other way.
+    """
+    match = _UPLOAD_URL.fullmatch(image_url or "")
+    if not match:
+        return None
+    root = os.path.realpath(UPLOAD_DIRECTORY)
+    path = os.path.realpath(os.path.join(root, match.group("filename")))
+    return path if os.path.dirname(path) == root else None
+
+
+def derivative_filename(sha256: str, size: str, fmt: str) -> str:
+    return f"{sha256}-{size}.{fmt}"
+
+
+def derivatives_ready(sha256: str) -> bool:
+    """Whether every derivative of the image has been written (each file is moved into place whole)."""
+    if sha256 in _ready:
+        return True
+    if all(os.path.isfile(os.path.join(DERIVED_DIRECTORY, derivative_filename(sha256, size, fmt)))
+           for size in DERIVATIVE_SIZES for fmt in DERIVATIVE_FORMATS):
+        _ready.add(sha256)
+        return True
+    return False
+
+
+def derivative_urls(image_url: Optional[str]) -> Optional[Dict[str, str]]:
+    """
+    URLs of the resized variants of an image, e.g. {"thumb": ..., "thumb_webp": ..., "card": ...}.
+    Returns None when the image is not content addressed, or until the derivatives job has
+    written its variants (clients use image_url meanwhile).
+    """
+    sha256 = content_hash(image_url)
+    if not sha256 or not derivatives_ready(sha256):
+        return None
+    urls = {}
+    for size in DERIVATIVE_SIZES:
+        for fmt in DERIVATIVE_FORMATS:
+            key = size if fmt == "jpg" else f"{size}_{fmt}"
+            urls[key] = f"{DERIVED_URL_PREFIX}/{derivative_filename(sha256, size, fmt)}"
+    return urls
+
+
+def generate_derivatives(source_path: str, sha256: str) -> int:
+    """
+    Write every size/format derivative of `source_path`. Runs in a worker process.
+    Existing files are skipped, so re-running is cheap. Returns the number written.
+    """
+    from PIL import Image, ImageOps
+
+    os.makedirs(DERIVED_DIRECTORY, exist_ok=True)
+    written = 0
+    with Image.open(source_path) as original:
+        original = ImageOps.exif_transpose(original)
+        if original.mode not in ("RGB", "L"):
+            original = original.convert("RGB")
+        for size, box in DERIVATIVE_SIZES.items():
+            resized = original.copy()
+            resized.thumbnail(box, Image.LANCZOS)
+            for fmt, options in DERIVATIVE_FORMATS.items():
+                target = os.path.join(DERIVED_DIRECTORY, derivative_filename(sha256, size, fmt))
+                if os.path.exists(target):
+                    continue
+                tmp = f"{target}.{os.getpid()}.part"
+                resized.save(tmp, **options)
+                os.replace(tmp, target)
+                written += 1
+    return written
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # "spawn" avoids forking a process that is running threadpool handlers.
+        _pool = ProcessPoolExecutor(max_workers=IMAGE_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def build_derivatives(source_path: str, sha256: str) -> int:
+    """
+    Generate derivatives in the process pool (the resizing is CPU bound) and wait for them.
+    Called from background jobs; a source deleted in the meantime is skipped.
+    """
+    if not os.path.exists(source_path):
+        logger.info("Image %s is gone; no derivatives to build", source_path)
+        return 0
+    return _get_pool().submit(generate_derivatives, source_path, sha256).result()
+
+
+def delete_image(image_url: Optional[str]) -> None:
+    """
+    Remove a stored upload and any derivatives generated from it. Only files directly in
+    UPLOAD_DIRECTORY are ever deleted (see stored_image_path); other URLs are left alone.
+    """
+    image_path = stored_image_path(image_url)
+    if image_path is None:
+        if image_url:
+            logger.warning("Not deleting %r: not an uploaded image", image_url)
+        return
+    if os.path.isfile(image_path):
+        os.remove(image_path)
+    sha256 = content_hash(image_url)
+    if sha256 is None:
+        return  # legacy upload: no derivatives were ever built for it
+    _ready.discard(sha256)
+    derived_root = os.path.realpath(DERIVED_DIRECTORY)
+    for size in DERIVATIVE_SIZES:
+        for fmt in DERIVATIVE_FORMATS:
+            path = os.path.realpath(os.path.join(derived_root, derivative_filename(sha256, size, fmt)))
+            if os.path.dirname(path) == derived_root and os.path.isfile(path):
+                os.remove(path)
+
+
+def shutdown_image_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True)
+        _pool = None
@@ -0,0 +1,212 @@
+# backend_python/invalidation.py
+# Cross-worker invalidation bus for the in-process caches (pet responses, facets, search index,
+# recommender, change feed, auth profiles).
+#
+# With several uvicorn workers each process holds its own copies, and a write handled by one
+# worker must evict the matching entries everywhere. After committing, the writing worker
+# applies the change locally and publishes one small JSON notification; every other worker
+# receives it on a listener thread and runs the handlers registered for its kind
+# (@invalidation_handler), which evict or update the same keys locally.
+#
+# Transport (INVALIDATION_BUS): Unix datagram sockets, the only supported one. Each worker binds
+# a socket in INVALIDATION_SOCKET_DIR and a publisher sends to every socket in it; sockets left
+# behind by dead workers are removed on the first failed send. This covers the workers of one
+# host only: workers spread over several hosts have no cross-worker invalidation and rely on
+# the caches' TTLs. "socket" and "auto" (default) both select it; "off" disables the bus.
+#
+# Delivery is best effort. When the listener loses its transport (notifications sent meanwhile
+# are gone) the RESYNC handlers run after reconnecting and drop everything derived; the caches'
+# own TTLs bound staleness for anything else that is missed.
+import glob
+import hashlib
+import json
+import logging
+import os
+import select
+import socket
+import tempfile
+import threading
+import uuid
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+from .database import get_database_url
+
+logger = logging.getLogger("petpals.invalidation")
+
+INVALIDATION_BUS = os.getenv("INVALIDATION_BUS", "auto")                  # auto | socket | off
+INVALIDATION_SOCKET_DIR = os.getenv("INVALIDATION_SOCKET_DIR", "")        # default: per database, under the temp dir
+INVALIDATION_SEND_TIMEOUT = float(os.getenv("INVALIDATION_SEND_TIMEOUT", "1"))  # per socket, if a worker is stuck
+INVALIDATION_RECONNECT_SECONDS = float(os.getenv("INVALIDATION_RECONNECT_SECONDS", "2"))
+
+RESYNC = "resync"  # run locally (no data) when notifications may have been missed
+
+_handlers: Dict[str, List[Callable]] = defaultdict(list)
+
+
+def invalidation_handler(kind: str):
+    """Register `fn(**data)` to apply notifications of `kind` published by other workers."""
+    def register(fn):
+        _handlers[kind].append(fn)
+        return fn
+    return register
+
+
+class UnixSocketTransport:
+    name = "socket"
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.path = os.path.join(directory, f"{os.getpid()}-{uuid.uuid4().hex[:8]}.sock")
+        self._inbox: Optional[socket.socket] = None
+        self._outbox: Optional[socket.socket] = None
+
+    def open(self) -> None:
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        self._inbox = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._inbox.bind(self.path)
+        self._outbox = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._outbox.settimeout(INVALIDATION_SEND_TIMEOUT)
+
+    def send(self, payload: str) -> None:
+        data = payload.encode("utf-8")
+        for path in glob.glob(os.path.join(self.directory, "*.sock")):
+            if path == self.path:
+                continue
+            try:
+                self._outbox.sendto(data, path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                _unlink(path)  # its worker is gone
+            except socket.timeout:
+                logger.warning("Invalidation to %s dropped: receiver not draining", path)
+
+    def receive(self, timeout: float) -> List[str]:
+        if not select.select([self._inbox], [], [], timeout)[0]:
+            return []
+        return [self._inbox.recv(65536).decode("utf-8")]
+
+    def close(self) -> None:
+        for sock in (self._inbox, self._outbox):
+            if sock is not None:
+                sock.close()
+        self._inbox = self._outbox = None
+        _unlink(self.path)
+
+
+def _unlink(path: str) -> None:
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+def default_socket_dir() -> str:
+    """One directory per database, so workers of the same deployment (and only those) find each other."""
+    digest = hashlib.blake2b(get_database_url().encode("utf-8"), digest_size=6).hexdigest()
+    return os.path.join(tempfile.gettempdir(), f"petpals-invalidation-{digest}")
+
+
+def make_transport(mode: str = INVALIDATION_BUS):
+    if mode in ("auto", "socket"):
+        if not hasattr(socket, "AF_UNIX"):
+            logger.warning("Unix sockets unavailable; cross-worker invalidation is off")
+            return None
+        return UnixSocketTransport(INVALIDATION_SOCKET_DIR or default_socket_dir())
+    if mode != "off":
+        logger.warning("Unsupported INVALIDATION_BUS=%r (only socket is); cross-worker invalidation is off", mode)
+    return None
+
+
+class InvalidationBus:
+    """Publishes this worker's changes and applies the other workers' on a listener thread."""
+
+    def __init__(self, mode: str = INVALIDATION_BUS):
+        self._mode = mode
+        self._origin = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._transport = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.sent = 0
+        self.received = 0
+        self.errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._transport is not None
+
+    def start(self) -> None:
+        if self._thread is not None or self._mode == "off":
+            return
+        transport = make_transport(self._mode)
+        if transport is None:
+            return
+        transport.open()  # at startup, so a misconfigured bus fails loudly rather than silently
+        self._transport = transport
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="petpals-invalidation", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join(timeout=5)
+            self._thread = None
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+
+    def publish(self, kind: str, **data) -> None:
+        """Tell the other workers about a committed change. Call after commit; never raises."""
+        transport = self._transport
+        if transport is None:
+            return
+        payload = json.dumps({"o": self._origin, "k": kind, "d": data}, separators=(",", ":"))
+        try:
+            transport.send(payload)
+            self.sent += 1
+        except Exception:
+            self.errors += 1
+            logger.exception("Could not publish %s invalidation", kind)
+
+    def _run(self) -> None:
+        transport = self._transport
+        while not self._stop.is_set():
+            try:
+                for payload in transport.receive(timeout=1.0):
+                    self._dispatch(payload)
+            except Exception:
+                if self._stop.is_set():
+                    return
+                self.errors += 1
+                logger.exception("Invalidation listener failed; reconnecting")
+                transport.close()
+                if self._stop.wait(INVALIDATION_RECONNECT_SECONDS):
+                    return
+                try:
+                    transport.open()
+                except Exception:
+                    continue  # retried on the next pass (receive fails on the closed transport)
+                self._apply(RESYNC, {})
+
+    def _dispatch(self, payload: str) -> None:
+        message = json.loads(payload)
+        if message.get("o") == self._origin:
+            return  # our own NOTIFY: already applied locally
+        self.received += 1
+        self._apply(message["k"], message.get("d") or {})
+
+    def _apply(self, kind: str, data: dict) -> None:
+        for handler in _handlers.get(kind, ()):
+            try:
+                handler(**data)
+            except Exception:
+                self.errors += 1
+                logger.exception("Invalidation handler for %s failed", kind)
+
+    def stats(self) -> dict:
+        transport = self._transport
+        return {"enabled": self.enabled, "transport": transport.name if transport is not None else None,
+                "origin": self._origin, "sent": self.sent, "received": self.received, "errors": self.errors}
+
+
+invalidation_bus = InvalidationBus()
@@ -0,0 +1,253 @@
+# backend_python/jobs.py
+# Durable background jobs for request side-effects (image clean-up, thumbnails, and later
+# emails or notifications), so handlers do not do that work inline.
+#
+# - enqueue(db, kind, **payload) adds a row to `jobs` in the handler's own transaction: the job
+#   exists exactly when the write it belongs to was committed, and the workers are woken on commit.
+# - JobQueue runs JOB_WORKERS workers on the event loop. Handlers (plain functions registered
+#   with @job_handler) run in a dedicated thread pool of that size, not the request threadpool.
+# - Claiming is a compare-and-set UPDATE (plus FOR UPDATE SKIP LOCKED on Postgres), so several
+#   processes can share the table. A claim is a lease: a job whose process died mid-run is
+#   picked up again once JOB_LEASE_SECONDS have passed. Nothing is lost across restarts, and
+#   handlers must therefore be idempotent (delivery is at least once).
+# - A failing job is retried with exponential backoff (JOB_BACKOFF_SECONDS doubling, capped at
+#   JOB_BACKOFF_MAX_SECONDS, with jitter) up to its max_attempts, then dead-lettered
+#   (status "dead"). Dead jobs are listed at /health/jobs and can be requeued with
+#   `python -m backend_python.jobs --retry-dead`.
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import func, or_, update
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from .database import SessionLocal
+from .models import Job
+
+logger = logging.getLogger("petpals.jobs")
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))                        # jobs running at once per process
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_BACKOFF_SECONDS = float(os.getenv("JOB_BACKOFF_SECONDS", "2"))      # first retry delay
+JOB_BACKOFF_MAX_SECONDS = float(os.getenv("JOB_BACKOFF_MAX_SECONDS", "600"))
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "300"))        # longer than any job should take
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "5"))          # for jobs enqueued by other processes
+JOB_ENABLED = os.getenv("JOB_ENABLED", "1") == "1"                      # 0: enqueue only (e.g. API-only workers)
+
+QUEUED, RUNNING, DEAD = "queued", "running", "dead"
+
+_handlers: Dict[str, Callable] = {}
+
+
+def job_handler(kind: str):
+    """Register `fn(db, **payload)` as the handler for jobs of `kind`."""
+    def register(fn):
+        _handlers[kind] = fn
+        return fn
+    return register
+
+
+def enqueue(db: Session, kind: str, delay: float = 0, max_attempts: int = None, **payload) -> Job:
+    """
+    Add a job to the caller's transaction; it runs after (and only if) the caller commits.
+    `payload` must be JSON serializable.
+    """
+    job = Job(kind=kind, payload=json.dumps(payload), status=QUEUED, attempts=0,
+              max_attempts=max_attempts or JOB_MAX_ATTEMPTS,
+              run_at=datetime.utcnow() + timedelta(seconds=delay))
+    db.add(job)
+    db.info["petpals_jobs_enqueued"] = True
+    return job
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _wake_on_commit(session):
+    if session.info.pop("petpals_jobs_enqueued", False):
+        job_queue.wake()
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _forget_on_rollback(session):
+    session.info.pop("petpals_jobs_enqueued", None)
+
+
+def backoff_seconds(attempts: int) -> float:
+    """Delay before retry number `attempts` (1-based): base * 2^(n-1), capped, +/-25% jitter."""
+    delay = min(JOB_BACKOFF_MAX_SECONDS, JOB_BACKOFF_SECONDS * (2 ** (attempts - 1)))
+    return delay * random.uniform(0.75, 1.25)
+
+
+# --- Claiming and finishing (run in the job threads) ---
+
+def claim_job(lease_seconds: float = JOB_LEASE_SECONDS) -> Optional[Job]:
+    """Take the oldest due job (or one whose lease expired) and lease it; None if there is none."""
+    with SessionLocal() as db:
+        now = datetime.utcnow()
+        due = or_(
+            (Job.status == QUEUED) & (Job.run_at <= now),
+            (Job.status == RUNNING) & (Job.locked_until < now),
+        )
+        query = db.query(Job.id, Job.status).filter(due).order_by(Job.run_at, Job.id).limit(1)
+        if db.get_bind().dialect.name == "postgresql":
+            query = query.with_for_update(skip_locked=True)
+        row = query.first()
+        if row is None:
+            return None
+        claimed = db.execute(
+            update(Job).where(Job.id == row.id, Job.status == row.status, due)
+            .values(status=RUNNING, attempts=Job.attempts + 1,
+                    locked_until=now + timedelta(seconds=lease_seconds))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        if not claimed:
+            return None  # another worker got it first
+        job = db.get(Job, row.id)
+        db.expunge(job)
+        return job
+
+
+def run_job(job: Job) -> None:
+    """Run one claimed job and record the outcome: delete it, schedule a retry, or dead-letter it."""
+    handler = _handlers.get(job.kind)
+    error = None
+    started = time.perf_counter()
+    with SessionLocal() as db:
+        try:
+            if handler is None:
+                raise LookupError(f"no handler registered for job kind {job.kind!r}")
+            handler(db, **json.loads(job.payload))
+            db.commit()
+        except Exception:
+            db.rollback()
+            error = traceback.format_exc(limit=5)
+
+        if error is None:
+            db.query(Job).filter(Job.id == job.id).delete(synchronize_session=False)
+            logger.debug("Job %s (%s) done in %.1f ms", job.id, job.kind, (time.perf_counter() - started) * 1000)
+        elif job.attempts >= job.max_attempts or handler is None:
+            db.query(Job).filter(Job.id == job.id).update(
+                {"status": DEAD, "locked_until": None, "last_error": error}, synchronize_session=False)
+            logger.error("Job %s (%s) dead-lettered after %d attempts: %s",
+                         job.id, job.kind, job.attempts, error.strip().splitlines()[-1])
+        else:
+            delay = backoff_seconds(job.attempts)
+            db.query(Job).filter(Job.id == job.id).update(
+                {"status": QUEUED, "locked_until": None, "last_error": error,
+                 "run_at": datetime.utcnow() + timedelta(seconds=delay)}, synchronize_session=False)
+            logger.warning("Job %s (%s) failed (attempt %d/%d), retrying in %.1fs: %s",
+                           job.id, job.kind, job.attempts, job.max_attempts, delay, error.strip().splitlines()[-1])
+        db.commit()
+
+
+# --- The queue ---
+
+class JobQueue:
+    """JOB_WORKERS worker coroutines on the event loop, each claiming and running one job at a time."""
+
+    def __init__(self, workers: int = JOB_WORKERS, poll_interval: float = JOB_POLL_INTERVAL):
+        self._workers = workers
+        self._poll_interval = poll_interval
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = False
+
+    def start(self) -> None:
+        """Call from the event loop (application startup)."""
+        if self._tasks:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="petpals-job")
+        self._stopping = False
+        self._tasks = [self._loop.create_task(self._work()) for _ in range(self._workers)]
+
+    def wake(self) -> None:
+        """Thread-safe: new jobs were committed."""
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def _work(self) -> None:
+        while not self._stopping:
+            self._wakeup.clear()  # before claiming, so a commit during the claim is not missed
+            try:
+                job = await self._loop.run_in_executor(self._executor, claim_job)
+                if job is not None:
+                    await self._loop.run_in_executor(self._executor, run_job, job)
+                    continue
+            except Exception:
+                logger.exception("Job worker error")  # e.g. database unavailable; try again later
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self._poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def stop(self, timeout: float = 30) -> None:
+        """Stop claiming and give running jobs `timeout` seconds; unfinished ones are retried after their lease."""
+        if not self._tasks:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        _, pending = await asyncio.wait(self._tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        self._executor.shutdown(wait=False)
+        self._tasks, self._loop = [], None
+
+
+job_queue = JobQueue()
+
+
+# --- Inspection ---
+
+def job_stats(dead_limit: int = 20) -> dict:
+    with SessionLocal() as db:
+        counts = dict(db.query(Job.status, func.count(Job.id)).group_by(Job.status))
+        dead = db.query(Job).filter(Job.status == DEAD).order_by(Job.id.desc()).limit(dead_limit).all()
+        return {
+            "enabled": JOB_ENABLED, "workers": JOB_WORKERS,
+            "counts": {s: counts.get(s, 0) for s in (QUEUED, RUNNING, DEAD)},
+            "dead": [{"id": j.id, "kind": j.kind, "payload": json.loads(j.payload), "attempts": j.attempts,
+                      "error": ((j.last_error or "").strip().splitlines() or [""])[-1], "created_at": j.created_at.isoformat()}
+                     for j in dead],
+        }
+
+
+def retry_dead_jobs(ids: Optional[List[int]] = None) -> int:
+    """Requeue dead-lettered jobs (all, or the given ids) with a fresh set of attempts."""
+    with SessionLocal() as db:
+        query = db.query(Job).filter(Job.status == DEAD)
+        if ids:
+            query = query.filter(Job.id.in_(ids))
+        count = query.update({"status": QUEUED, "attempts": 0, "run_at": datetime.utcnow()}, synchronize_session=False)
+        db.commit()
+        return count
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Inspect or requeue PetPals background jobs.")
+    parser.add_argument("--retry-dead", nargs="*", type=int, metavar="ID",
+                        help="requeue dead-lettered jobs (all of them when no ids are given)")
+    args = parser.parse_args(argv)
+    if args.retry_dead is not None:
+        print(f"Requeued {retry_dead_jobs(args.retry_dead)} job(s).")
+    else:
+        print(json.dumps(job_stats(), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,37 +1,120 @@
 # backend_python/main.py
 import os
-from dotenv import load_dotenv
+from contextlib import asynccontextmanager
+from dataclasses import asdict
 from typing import Optional, List
 from datetime import datetime
-import uuid
+import json
+import asyncio
 
-from fastapi import FastAPI, Depends, HTTPException, status, UploadFile, File, Form, APIRouter, Header
-from fastapi.staticfiles import StaticFiles
+from anyio import to_thread
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy import or_
+from fastapi import FastAPI, Depends, HTTPException, status, UploadFile, File, Form, APIRouter, Header, Query, \
+                    Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import PlainTextResponse, StreamingResponse
+
+from sqlalchemy.orm import Session
+from sqlalchemy import or_, func
+from sqlalchemy.orm import selectinload
 
 from fastapi.middleware.cors import CORSMiddleware
 
 # IMPORTANT FIX: Changed to relative imports for models and schemas
-from .models import Base, Owner, Pet, PetSpecies, PetStatus, PetGender, Application, Message, UserProfile
+from .database import get_engine, SessionLocal, get_db, pool_stats
+from .models import Owner, Pet, PetSpecies, PetStatus, PetGender, Application, Message, UserProfile
 from .schemas import PetCreate, PetDisplay, ApplicationCreate, ApplicationDisplay, \
-                    MessageCreate, MessageDisplay, UserProfileCreate, UserProfileDisplay
-
-# Load environment variables from .env file
-load_dotenv()
+                    MessageCreate, MessageDisplay, UserProfileCreate, UserProfileDisplay, PetImportResult, PetFacets, \
+                    UnreadCount, ApplicationWithPet, ApplicationStatus, ApplicationStatusUpdate, ApplicationStatusCounts, \
+                    ApplicationBatchStatusUpdate, ApplicationBatchStatusResult
+from .pet_cache import PetKey, pet_response_cache, pet_key, cached_json_response
+from .uploads import save_upload, UploadSizeLimitMiddleware, UPLOAD_URL_PREFIX
+from .auth import verify_id_token, get_cached_profile, cache_profile, invalidate_profile
+from .static_files import CachedStaticFiles
+from .images import build_derivatives, delete_image, shutdown_image_pool, IMAGE_DELETE_GRACE_SECONDS
+from .search import search_pet_ids, pet_search_index
+from .facets import pet_facets
+from .changes import pet_change_feed, SSE_MEDIA_TYPE
+from .invalidation import RESYNC, invalidation_bus, invalidation_handler
+from .recommendations import pet_recommender, preference_vector
+from .bulk_import import import_pets, iter_import_rows, ImportAborted
+from .serialization import PET_DISPLAY_COLUMNS, PET_DISPLAY_FIELDS, pet_rows_to_json, pet_rows_to_ndjson, \
+                           NDJSON_MEDIA_TYPE, wants_ndjson, stream_ndjson, ndjson_lines
+from .compression import CompressionMiddleware
+from .pagination import MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, encode_cursor, decode_cursor, parse_fields
+from .metrics import METRICS_ENABLED, MetricsMiddleware, instrument_engine, render_metrics, timed
+from .applications import apply_transitions, ApplicationTransitionError
+from .messaging import message_hub, message_event, unread_event, inbox_query, thread_query, \
+                       count_unread, unread_by_sender, mark_read
+from .slow_queries import SLOW_QUERY_LOG, install_slow_query_log, slow_query_log, shutdown_slow_query_log
+from .migrations import check_schema
+from .jobs import JOB_ENABLED, enqueue, job_handler, job_queue, job_stats
+from .replicas import ReadRoutingMiddleware, replica_set, read_session, is_replica_session, pin_scope, PETS_SCOPE, \
+                      shutdown_replicas, PIN_HEADER
+
+# Environment variables (.env) are loaded once, by database.py, before any of the settings below are read.
+
+# --- Concurrency ---
+# All route handlers below are plain `def` functions: the SQLAlchemy Session is synchronous,
+# so FastAPI runs each handler (and the get_db/get_current_user dependencies) in its worker
+# threadpool instead of on the event loop. A slow query then only occupies one thread.
+# Keep this at or below the DB connection pool capacity so threads do not queue on connections.
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", "40"))
 
 # --- Database Configuration ---
-DATABASE_URL = os.getenv("DATABASE_URL")
-if not DATABASE_URL:
-    raise ValueError("DATABASE_URL environment variable not set. Please create a .env file.")
-
-engine = create_engine(DATABASE_URL, echo=False)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# The engine, its connection pool and SessionLocal are built once, in database.py, on first
+# use (at startup below) rather than at import.
+
+# --- Startup / shutdown ---
+_engine_configured = False
+
+def configure_engine():
+    """Build the engine and attach the per-statement instrumentation (once per process)."""
+    global _engine_configured
+    engine = get_engine()
+    if not _engine_configured:
+        _engine_configured = True
+        if METRICS_ENABLED:
+            instrument_engine(engine)
+        # Opt-in (SLOW_QUERY_LOG=1): statements over SLOW_QUERY_THRESHOLD_MS, with sampled
+        # EXPLAIN plans, are logged and listed at /health/slow-queries.
+        if SLOW_QUERY_LOG:
+            install_slow_query_log(engine)
+    return engine
+
+async def on_startup():
+    to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    engine = await to_thread.run_sync(configure_engine)
+    # One version query when the schema is current; pending migrations otherwise (migrations.py).
+    version = await to_thread.run_sync(check_schema, engine)
+    print(f"Database schema at version {version}.")
+    replica_set.start()  # no-op unless DATABASE_REPLICA_URLS is set
+    # Other workers' writes on this host evict this worker's caches (Unix sockets, see invalidation.py).
+    await to_thread.run_sync(invalidation_bus.start)
+    if JOB_ENABLED:
+        job_queue.start()  # picks up jobs left over from before a restart, too
+
+def on_shutdown():
+    shutdown_image_pool()
+    shutdown_slow_query_log()
+    shutdown_replicas()
+    invalidation_bus.stop()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await on_startup()
+    try:
+        yield
+    finally:
+        await job_queue.stop()  # before the image pool its jobs use
+        on_shutdown()
 
 # --- FastAPI Application Instance ---
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+
+# --- Upload size limit ---
+# Added first, so it sits inside CORS (a browser can read the 413): image uploads over
+# UPLOAD_MAX_BYTES are refused before their body is spooled to disk (uploads.py).
+app.add_middleware(UploadSizeLimitMiddleware)
 
 # --- CORS Middleware ---
 origins = [
@@ -47,53 +130,84 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "Server-Timing", PIN_HEADER],  # Let the browser read the cursor, timings and read pin
 )
 
+# --- Compression ---
+# gzip for clients that accept it, on bodies over GZIP_MIN_SIZE (streamed NDJSON is flushed per chunk).
+app.add_middleware(CompressionMiddleware)
+
+# --- Read replicas ---
+# With DATABASE_REPLICA_URLS set, read-only endpoints (get_read_db below) are served from replicas;
+# this tracks writes per request so the writing client's next reads stay on the primary.
+if replica_set.enabled:
+    app.add_middleware(ReadRoutingMiddleware)
+
+# --- Metrics ---
+# Added last so it is the outermost middleware and times the whole request.
+# Per-route latency, status codes, in-flight requests and SQL counts/time are served at /metrics
+# (SQL timing is attached to the engine in configure_engine).
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # Mount Static Files Directory
 # Ensure your static files (e.g., images) are in a folder named 'static'
 # at the root of your backend project (e.g., backend_python/static/)
-app.mount("/static", StaticFiles(directory="static"), name="static")
-
-# Dependency to get DB session
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# CachedStaticFiles adds immutable caching for content-addressed images, strong ETags
+# and (with STATIC_PRECOMPRESSED=1) serving of .br/.gz siblings.
+app.mount("/static", CachedStaticFiles(directory="static"), name="static")
 
 # Dependency to get the current authenticated user profile
 # IMPORTANT: This needs proper Firebase token verification in a real app.
-# For debugging, we are temporarily simplifying token verification.
-async def get_current_user(
+# For debugging, we are temporarily simplifying token verification (see auth.verify_id_token).
+def get_current_user(
     x_firebase_id_token: str = Header(..., alias="Authorization"),
     db: Session = Depends(get_db)
 ):
     """
     Dependency to get the current authenticated user profile from the database
     by verifying the Firebase ID Token (or a placeholder for now).
+    Verified tokens and profiles are cached in memory (auth.py), so a warm request
+    does not touch the database; the Session from get_db is only used on a miss.
     """
+    return authenticate(x_firebase_id_token, db)
+
+# Read-only endpoints take their session from a replica when configured (see replicas.py).
+# Pet reads share the "pets" pin, so cached pet responses are only refilled from the primary
+# right after a pet write.
+get_read_db = read_session()
+get_pet_read_db = read_session(PETS_SCOPE)
+
+def get_current_reader(
+    x_firebase_id_token: str = Header(..., alias="Authorization"),
+    db: Session = Depends(get_read_db)
+):
+    """get_current_user for read-only endpoints: a profile cache miss is looked up on a replica."""
+    return authenticate(x_firebase_id_token, db)
+
+def authenticate(authorization: str, db: Session) -> UserProfileDisplay:
+    """Resolve an Authorization value (for HTTP requests and WebSockets alike) to a profile, or raise 401."""
     try:
         # Assuming token is "Bearer <id_token>"
-        id_token = x_firebase_id_token.replace("Bearer ", "")
-        
-        # In a real app, you would verify the token with Firebase Admin SDK:
-        # from firebase_admin import auth
-        # decoded_token = auth.verify_id_token(id_token)
-        # user_id = decoded_token['uid']
-        
-        # FOR LOCAL DEVELOPMENT / TESTING ONLY (TEMPORARY BYPASS):
-        # This assumes the token itself is the UID. NOT SECURE FOR PRODUCTION!
-        user_id = id_token 
+        id_token = authorization.replace("Bearer ", "")
+        user_id = verify_id_token(id_token)
+
+        user_profile = get_cached_profile(user_id)
+        if user_profile:
+            return user_profile
 
         # Fetch user profile from your database using the user_id
         user_profile = db.query(UserProfile).filter(UserProfile.user_id == user_id).first()
+        if not user_profile and is_replica_session(db):
+            # A profile registered moments ago may not have reached the replica yet.
+            with SessionLocal() as primary:
+                user_profile = primary.query(UserProfile).filter(UserProfile.user_id == user_id).first()
         if not user_profile:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User profile not found in backend DB. Please register profile after Firebase login."
             )
-        return user_profile
+        return cache_profile(user_profile)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -101,10 +215,100 @@ async def get_current_user(
         )
 
 
+# --- Derived pet views ---
+# In-process caches and indexes built from the pets table. Every committed pet write calls
+# this with the pet's state before the write (None on create) and after it (None on delete);
+# the other workers get the same change over the invalidation bus (invalidation.py).
+PET_CHANGED = "pet"          # {"old": PetKey fields or None, "new": PetKey fields or None}
+PETS_RESET = "pets.reset"
+
+def sync_pet_views(old_key: Optional[PetKey], pet: Optional[Pet]):
+    new_key = pet_key(pet) if pet is not None else None
+    apply_pet_change(old_key, new_key, pet)
+    invalidation_bus.publish(PET_CHANGED, old=asdict(old_key) if old_key is not None else None,
+                             new=asdict(new_key) if new_key is not None else None)
+
+def apply_pet_change(old_key: Optional[PetKey], new_key: Optional[PetKey], pet: Optional[Pet]):
+    pin_scope(PETS_SCOPE)
+    pet_response_cache.invalidate(old_key, new_key)
+    pet_facets.apply(old_key, new_key)
+    op = "create" if old_key is None else "delete" if new_key is None else "update"
+    pet_change_feed.publish(op, (new_key or old_key).id, pet,
+                            owner_ids={key.owner_id for key in (old_key, new_key) if key is not None})
+    if pet is not None:
+        pet_search_index.upsert(pet)
+        pet_recommender.upsert(pet)
+    else:
+        pet_search_index.remove(old_key.id)
+        pet_recommender.remove(old_key.id)
+
+
+# Another worker committed a pet write: evict the same entries here. The row itself (for the
+# search index, recommender and change feed) is read back from the primary.
+@invalidation_handler(PET_CHANGED)
+def _pet_changed_elsewhere(old: Optional[dict], new: Optional[dict]):
+    old_key = PetKey(**old) if old is not None else None
+    new_key = PetKey(**new) if new is not None else None
+    if new_key is None:
+        apply_pet_change(old_key, None, None)
+        return
+    with SessionLocal() as db:
+        pet = db.get(Pet, new_key.id)
+        if pet is None:  # deleted meanwhile; its delete notification follows
+            pet_response_cache.invalidate(old_key, new_key)
+            pet_facets.apply(old_key, new_key)
+            return
+        apply_pet_change(old_key, new_key, pet)
+
+# After bulk writes it is cheaper to drop the derived views and let them rebuild lazily.
+def reset_pet_views():
+    reset_local_pet_views()
+    invalidation_bus.publish(PETS_RESET)
+
+# Also run when this worker may have missed notifications (the bus reconnected).
+@invalidation_handler(PETS_RESET)
+@invalidation_handler(RESYNC)
+def reset_local_pet_views():
+    pin_scope(PETS_SCOPE)
+    pet_response_cache.clear()
+    pet_facets.reset()
+    pet_change_feed.publish("reset")  # too many changes to list: followers refetch
+    pet_search_index.reset()
+    pet_recommender.reset()
+
+
+# --- Background jobs ---
+# File work is not done in the request: it is enqueued in the request's transaction (jobs.py)
+# and runs once that commits, retried on failure and kept across restarts.
+DELETE_IMAGE_JOB = "image.delete"
+IMAGE_DERIVATIVES_JOB = "image.derivatives"
+
+# Images are content addressed, so several pets can point at the same file.
+def release_image(db: Session, image_url: Optional[str]):
+    if image_url:
+        enqueue(db, DELETE_IMAGE_JOB, delay=IMAGE_DELETE_GRACE_SECONDS, image_url=image_url)
+
+@job_handler(DELETE_IMAGE_JOB)
+def delete_unused_image(db: Session, image_url: str):
+    # Checked when the job runs, not when it was enqueued: a pet saved since may use the same file.
+    if db.query(Pet.id).filter(Pet.image_url == image_url).first():
+        return
+    delete_image(image_url)
+
+@job_handler(IMAGE_DERIVATIVES_JOB)
+def build_image_derivatives(db: Session, source_path: str, sha256: str):
+    build_derivatives(source_path, sha256)
+    # image_variants is only advertised once the files exist: refresh the pets showing this image.
+    image_url = f"{UPLOAD_URL_PREFIX}/{os.path.basename(source_path)}"
+    for pet in db.query(Pet).filter(Pet.image_url == image_url):
+        sync_pet_views(pet_key(pet), pet)
+
+
 api_router = APIRouter(prefix="/api")
 
+
 @api_router.post("/auth/register-profile", response_model=UserProfileDisplay, status_code=status.HTTP_201_CREATED)
-async def register_user_profile(profile_data: UserProfileCreate, db: Session = Depends(get_db)):
+def register_user_profile(profile_data: UserProfileCreate, db: Session = Depends(get_db)):
     # Check if a user with this user_id or email already exists
     existing_user_by_id = db.query(UserProfile).filter(UserProfile.user_id == profile_data.user_id).first()
     if existing_user_by_id:
@@ -124,18 +328,16 @@ async def register_user_profile(profile_data: UserProfileCreate, db: Session = D
     db.add(db_profile)
     db.commit()
     db.refresh(db_profile)
+    invalidate_profile(db_profile.user_id)
     return db_profile
 
 @api_router.get("/auth/profile", response_model=UserProfileDisplay)
-async def get_user_profile(
-    current_user: UserProfileDisplay = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
+def get_user_profile(current_user: UserProfileDisplay = Depends(get_current_reader)):
     return current_user
 
 
 @api_router.post("/pets", response_model=PetDisplay, status_code=status.HTTP_201_CREATED)
-async def create_pet(
+def create_pet(
     name: str = Form(...),
     age: str = Form(...),
     species: PetSpecies = Form(...),
@@ -151,16 +353,10 @@ async def create_pet(
     if current_user.role != 'shelter':
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only shelters can add pets.")
 
-    # Save the image file
-    UPLOAD_DIRECTORY = "static/images/pets"
-    os.makedirs(UPLOAD_DIRECTORY, exist_ok=True)
-    file_extension = os.path.splitext(image.filename)[1]
-    unique_filename = f"{uuid.uuid4()}{file_extension}"
-    file_path = os.path.join(UPLOAD_DIRECTORY, unique_filename)
-    with open(file_path, "wb") as buffer:
-        buffer.write(await image.read())
-
-    image_url = f"/static/images/pets/{unique_filename}"
+    # Save the image file (content addressed) and build its thumbnails in the background
+    with timed("upload"):
+        stored = save_upload(image)
+    image_url = stored.url
 
     pet_data = PetCreate(
         name=name,
@@ -172,38 +368,213 @@ async def create_pet(
         medical_needs=medical_needs,
         gender=gender
     )
-    db_pet = Pet(**pet_data.model_dump(), owner_id=current_user.id, image_url=image_url)
+    db_pet = Pet(**pet_data.model_columns(), owner_id=current_user.id, image_url=image_url)
     db.add(db_pet)
+    enqueue(db, IMAGE_DERIVATIVES_JOB, source_path=stored.path, sha256=stored.sha256)
     db.commit()
     db.refresh(db_pet)
+    sync_pet_views(None, db_pet)
     return db_pet
 
+@api_router.post("/pets/import", response_model=PetImportResult)
+def import_pets_bulk(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$"),
+    db: Session = Depends(get_db),
+    current_user: UserProfileDisplay = Depends(get_current_user)
+):
+    """
+    Bulk-create pets for the calling shelter from a CSV (header row required) or NDJSON file.
+    The file is read row by row and inserted in batches; invalid rows are skipped and
+    reported with their row number. `format` defaults from the file name/content type.
+    A file that cannot be read to the end (not UTF-8, broken CSV) stops the import with a 400
+    saying how many rows were already imported.
+    """
+    if current_user.role != 'shelter':
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only shelters can add pets.")
+    if not format:
+        is_csv = (file.filename or "").lower().endswith(".csv") or file.content_type == "text/csv"
+        format = "csv" if is_csv else "ndjson"
+    try:
+        result = import_pets(db, iter_import_rows(file.file, format), owner_id=current_user.id)
+    except ImportAborted as e:
+        if e.inserted:
+            reset_pet_views()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Import stopped at row {e.row}: {e.reason} {e.inserted} rows before it were imported."
+        )
+    if result.inserted:
+        reset_pet_views()
+    return result
+
 @api_router.get("/pets", response_model=List[PetDisplay])
-async def get_pets(
+def get_pets(
     species: Optional[PetSpecies] = None,
     status: Optional[PetStatus] = None,
     gender: Optional[PetGender] = None,
-    db: Session = Depends(get_db)
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    fields: Optional[str] = None,
+    format: Optional[str] = Query(None, pattern="^(json|ndjson)$"),
+    accept: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_pet_read_db)
 ):
-    query = db.query(Pet)
+    """
+    List pets, optionally filtered.
+
+    - `limit` + `after` page through the results in `Pet.id` order (keyset pagination).
+      The cursor for the next page is returned in the `X-Next-Cursor` header. Without
+      `limit` the whole filtered list is returned, as before paging existed.
+    - `fields` is a comma separated projection (e.g. `fields=name,species,image_url`);
+      only those columns (plus `id`) are selected and returned.
+
+    Responses are served from the in-process pet cache and carry an ETag;
+    a matching `If-None-Match` gets a 304.
+
+    With `format=ndjson` (or `Accept: application/x-ndjson`) the rows are streamed, one JSON
+    object per line, straight from the DB cursor and bypassing the cache; `limit` is optional
+    there, so whole-inventory exports stay flat in memory.
+    """
+    try:
+        columns = parse_fields(fields, PetDisplay.model_fields) if fields else None
+        after_id = decode_cursor(after)[0] if after else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    streaming = wants_ndjson(format, accept)
+    if not streaming:
+        cache_key = pet_response_cache.list_key(species, status, gender, limit, after, fields)
+        cached = pet_response_cache.get(cache_key)
+        if cached:
+            return cached_json_response(cached, if_none_match)
+
+    generation = pet_response_cache.generation()  # before the query: see PetResponseCache
+    # Plain column tuples rather than ORM objects: see serialization.py
+    query = db.query(*([getattr(Pet, c) for c in columns] if columns else PET_DISPLAY_COLUMNS))
     if species:
         query = query.filter(Pet.species == species)
     if status:
         query = query.filter(Pet.status == status)
     if gender:
         query = query.filter(Pet.gender == gender)
-    pets = query.all()
-    return pets
+    if after_id is not None:
+        query = query.filter(Pet.id > after_id)
+    query = query.order_by(Pet.id)
+
+    if streaming:
+        if limit:
+            query = query.limit(limit)
+        return StreamingResponse(stream_ndjson(query.statement, pet_rows_to_ndjson(columns or PET_DISPLAY_FIELDS),
+                                               bind=db.get_bind()),
+                                 media_type=NDJSON_MEDIA_TYPE)
+
+    next_cursor = None
+    if limit:
+        # Fetch one extra row to know whether another page exists.
+        pets = query.limit(limit + 1).all()
+        if len(pets) > limit:
+            pets = pets[:limit]
+            next_cursor = encode_cursor(pets[-1].id)
+    else:
+        pets = query.all()
+
+    with timed("serialize"):
+        # Trusted DB rows are encoded directly (no per-row PetDisplay validation); partial rows
+        # from a `fields` projection are encoded as-is, without image_variants.
+        body = pet_rows_to_json(pets, columns or PET_DISPLAY_FIELDS)
+    cached = pet_response_cache.put_list(
+        cache_key, body,
+        headers={NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {},
+        after_id=after_id,
+        last_id=pets[-1].id if next_cursor else None,
+        generation=generation,
+    )
+    return cached_json_response(cached, if_none_match)
+
+@api_router.get("/recommendations", response_model=List[PetDisplay])
+def get_recommendations(
+    limit: int = Query(10, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+    current_user: UserProfileDisplay = Depends(get_current_user)
+):
+    """
+    Available pets ranked against the caller's UserProfile.preferences
+    (species, gender, age, temperament, medical needs), best match first.
+    """
+    pet_recommender.ensure_built(db)
+    ranked = pet_recommender.top_k(preference_vector(current_user.preferences), limit)
+    if not ranked:
+        return []
+    pets_by_id = {pet.id: pet for pet in db.query(Pet).filter(Pet.id.in_([pet_id for pet_id, _ in ranked]))}
+    return [pets_by_id[pet_id] for pet_id, _ in ranked if pet_id in pets_by_id]
+
+# Declared before /pets/{pet_id} so "facets" is not parsed as a pet id.
+@api_router.get("/pets/facets", response_model=PetFacets)
+def get_pet_facets(
+    owner_id: Optional[List[int]] = Query(None),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_pet_read_db)
+):
+    """
+    Pet counts by species x status x gender (plus per-dimension totals) and per shelter
+    (`by_owner`, keyed by owner_id; repeat `owner_id=` to only get those shelters).
+    Served from an in-memory aggregate that pet writes keep current (facets.py).
+    """
+    return cached_json_response(pet_facets.response(db, owner_id), if_none_match)
+
+@api_router.get("/pets/changes")
+async def get_pet_changes(
+    owner_id: Optional[int] = None,
+    last_event_id: Optional[str] = Header(None),
+    since: Optional[str] = Query(None, description="Last event id seen, for clients that cannot send Last-Event-ID"),
+):
+    """
+    Server-Sent Events stream of pet creates, updates (e.g. available -> pending) and deletes,
+    each with an "<epoch>:<seq>" event id (seq increasing). Reconnecting with Last-Event-ID
+    replays what was missed; a `reset` event means the position is unknown (e.g. the id came
+    from another worker) and the client should refetch GET /api/pets. `owner_id` limits the stream to one shelter's pets.
+    No database access: events come from the pet write handlers (changes.py).
+    """
+    return StreamingResponse(
+        pet_change_feed.stream(last_event_id or since, owner_id),
+        media_type=SSE_MEDIA_TYPE,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},  # no proxy buffering
+    )
+
+# Declared before /pets/{pet_id} so "search" is not parsed as a pet id.
+@api_router.get("/pets/search", response_model=List[PetDisplay])
+def search_pets(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_pet_read_db)
+):
+    """
+    Ranked full-text search across name, breed, description and temperament.
+    Uses the indexed tsvector column on Postgres and an in-memory inverted index elsewhere.
+    """
+    ranked = search_pet_ids(db, q, limit)
+    if not ranked:
+        return []
+    pets_by_id = {pet.id: pet for pet in db.query(Pet).filter(Pet.id.in_([pet_id for pet_id, _ in ranked]))}
+    return [pets_by_id[pet_id] for pet_id, _ in ranked if pet_id in pets_by_id]
 
 @api_router.get("/pets/{pet_id}", response_model=PetDisplay)
-async def get_pet_by_id(pet_id: int, db: Session = Depends(get_db)):
-    pet = db.query(Pet).filter(Pet.id == pet_id).first()
-    if not pet:
-        raise HTTPException(status_code=404, detail="Pet not found")
-    return pet
+def get_pet_by_id(pet_id: int, if_none_match: Optional[str] = Header(None), db: Session = Depends(get_pet_read_db)):
+    cached = pet_response_cache.get(pet_response_cache.detail_key(pet_id))
+    if not cached:
+        generation = pet_response_cache.generation()
+        pet = db.query(Pet).filter(Pet.id == pet_id).first()
+        if not pet:
+            raise HTTPException(status_code=404, detail="Pet not found")
+        with timed("serialize"):
+            body = PetDisplay.model_validate(pet).model_dump_json().encode("utf-8")
+        cached = pet_response_cache.put_detail(pet_id, body, generation)
+    return cached_json_response(cached, if_none_match)
 
 @api_router.put("/pets/{pet_id}", response_model=PetDisplay)
-async def update_pet(
+def update_pet(
     pet_id: int,
     name: Optional[str] = Form(None),
     age: Optional[str] = Form(None),
@@ -224,6 +595,7 @@ async def update_pet(
 
     if current_user.role != 'shelter' or pet.owner_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to update this pet.")
+    old_key = pet_key(pet)
 
     update_data = {
         k: v for k, v in {
@@ -237,28 +609,21 @@ async def update_pet(
         setattr(pet, key, value)
 
     if image:
-        # Delete old image if it exists
-        if pet.image_url:
-            old_image_path = os.path.join("static", pet.image_url.replace("/static/", ""))
-            if os.path.exists(old_image_path):
-                os.remove(old_image_path)
-        
-        # Save new image
-        UPLOAD_DIRECTORY = "static/images/pets"
-        os.makedirs(UPLOAD_DIRECTORY, exist_ok=True)
-        file_extension = os.path.splitext(image.filename)[1]
-        unique_filename = f"{uuid.uuid4()}{file_extension}"
-        file_path = os.path.join(UPLOAD_DIRECTORY, unique_filename)
-        with open(file_path, "wb") as buffer:
-            buffer.write(await image.read())
-        pet.image_url = f"/static/images/pets/{unique_filename}"
+        # Save new image first so a rejected upload leaves the old one in place
+        with timed("upload"):
+            stored = save_upload(image)
+        enqueue(db, IMAGE_DERIVATIVES_JOB, source_path=stored.path, sha256=stored.sha256)
+        if stored.url != pet.image_url:
+            release_image(db, pet.image_url)
+        pet.image_url = stored.url
 
     db.commit()
     db.refresh(pet)
+    sync_pet_views(old_key, pet)
     return pet
 
 @api_router.delete("/pets/{pet_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_pet(pet_id: int, db: Session = Depends(get_db), current_user: UserProfileDisplay = Depends(get_current_user)):
+def delete_pet(pet_id: int, db: Session = Depends(get_db), current_user: UserProfileDisplay = Depends(get_current_user)):
     pet = db.query(Pet).filter(Pet.id == pet_id).first()
     if not pet:
         raise HTTPException(status_code=404, detail="Pet not found")
@@ -266,19 +631,18 @@ async def delete_pet(pet_id: int, db: Session = Depends(get_db), current_user: U
     if current_user.role != 'shelter' or pet.owner_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to delete this pet.")
     
-    # Delete image file
-    if pet.image_url:
-        image_path = os.path.join("static", pet.image_url.replace("/static/", ""))
-        if os.path.exists(image_path):
-            os.remove(image_path)
+    # Delete the image file after commit (unless another pet shares the same content-addressed image)
+    release_image(db, pet.image_url)
 
+    old_key = pet_key(pet)
     db.delete(pet)
     db.commit()
+    sync_pet_views(old_key, None)
     return {"message": "Pet deleted successfully"}
 
 
 @api_router.post("/applications", response_model=ApplicationDisplay, status_code=status.HTTP_201_CREATED)
-async def create_application(application_data: ApplicationCreate, db: Session = Depends(get_db), current_user: UserProfileDisplay = Depends(get_current_user)):
+def create_application(application_data: ApplicationCreate, db: Session = Depends(get_db), current_user: UserProfileDisplay = Depends(get_current_user)):
     if current_user.role != 'adopter':
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only adopters can submit applications.")
     
@@ -287,17 +651,320 @@ async def create_application(application_data: ApplicationCreate, db: Session =
     if not pet:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Pet not found.")
     
-    # Add applicant_id from current_user
-    db_application = Application(**application_data.model_dump(), applicant_id=current_user.id)
+    # The applicant is always the authenticated user and the shelter is the pet's owner,
+    # whatever the body says (the shelter dashboard lists applications by shelter_id).
+    db_application = Application(**{
+        **application_data.model_dump(),
+        "user_id": current_user.user_id,
+        "shelter_id": pet.owner_id if pet.owner_id is not None else application_data.shelter_id,
+        "status": ApplicationStatus.pending.value,
+    })
     db.add(db_application)
     db.commit()
     db.refresh(db_application)
     return db_application
 
+# --- Application dashboards ---
+# Every listing is a constant number of round trips however many applications there are:
+# one keyset-paginated page query, one batched (selectin) query for the page's pets, and
+# the per-status counts as a separate single GROUP BY query.
+DEFAULT_APPLICATION_PAGE_SIZE = 50
+
+def before_id_from(before: Optional[str]) -> Optional[int]:
+    try:
+        return decode_cursor(before)[0] if before else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def list_applications(query, limit: Optional[int], before: Optional[str], application_status: Optional[ApplicationStatus],
+                      response: Response, streaming: bool = False):
+    before_id = before_id_from(before)
+    if application_status:
+        query = query.filter(Application.status == application_status.value)
+    if before_id is not None:
+        query = query.filter(Application.id < before_id)
+    query = query.options(selectinload(Application.pet)).order_by(Application.id.desc())
+
+    if streaming:
+        # Exports: every matching application (limit is optional), streamed as NDJSON; pets
+        # are still loaded with one batched query per chunk.
+        if limit:
+            query = query.limit(limit)
+        return StreamingResponse(stream_ndjson(query.statement, encode_applications, scalars=True),
+                                 media_type=NDJSON_MEDIA_TYPE)
+
+    limit = limit or DEFAULT_APPLICATION_PAGE_SIZE
+    applications = query.limit(limit + 1).all()
+    if len(applications) > limit:
+        applications = applications[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(applications[-1].id)
+    return applications
+
+def encode_applications(applications: List[Application]) -> bytes:
+    return ndjson_lines(ApplicationWithPet.model_validate(a).model_dump(mode="json") for a in applications)
+
+def status_counts(db: Session, *criteria) -> ApplicationStatusCounts:
+    rows = db.query(Application.status, func.count(Application.id)).filter(*criteria).group_by(Application.status).all()
+    counts = {s.value: 0 for s in ApplicationStatus}
+    counts.update({application_status: count for application_status, count in rows})
+    return ApplicationStatusCounts(total=sum(counts.values()), counts=counts)
+
+def require_shelter(current_user: UserProfileDisplay):
+    if current_user.role != 'shelter':
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only shelters can manage applications.")
+
+@api_router.get("/applications/my", response_model=List[ApplicationWithPet])
+def get_my_applications(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    before: Optional[str] = None,
+    status: Optional[ApplicationStatus] = None,
+    format: Optional[str] = Query(None, pattern="^(json|ndjson)$"),
+    accept: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: UserProfileDisplay = Depends(get_current_user)
+):
+    """
+    The current adopter's applications with their pets, newest first (page back with `before`).
+    `format=ndjson` streams all of them instead of one page.
+    """
+    query = db.query(Application).filter(Application.user_id == current_user.user_id)
+    return list_applications(query, limit, before, status, response, wants_ndjson(format, accept))
+
+@api_router.get("/applications/my/counts", response_model=ApplicationStatusCounts)
+def get_my_application_counts(db: Session = Depends(get_db), current_user: UserProfileDisplay = Depends(get_current_user)):
+    return status_counts(db, Application.user_id == current_user.user_id)
+
+@api_router.get("/applications/shelter", response_model=List[ApplicationWithPet])
+def get_shelter_applications(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    before: Optional[str] = None,
+    status: Optional[ApplicationStatus] = None,
+    format: Optional[str] = Query(None, pattern="^(json|ndjson)$"),
+    accept: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: UserProfileDisplay = Depends(get_current_user)
+):
+    """
+    Applications for the current shelter's pets, newest first, optionally filtered by status.
+    `format=ndjson` streams all of them (e.g. for an export) instead of one page.
+    """
+    require_shelter(current_user)
+    query = db.query(Application).filter(Application.shelter_id == current_user.id)
+    return list_applications(query, limit, before, status, response, wants_ndjson(format, accept))
+
+@api_router.get("/applications/shelter/counts", response_model=ApplicationStatusCounts)
+def get_shelter_application_counts(db: Session = Depends(get_db), current_user: UserProfileDisplay = Depends(get_current_user)):
+    require_shelter(current_user)
+    return status_counts(db, Application.shelter_id == current_user.id)
+
+@api_router.put("/applications/{application_id}/status", response_model=ApplicationWithPet)
+def update_application_status(
+    application_id: int,
+    update: ApplicationStatusUpdate,
+    db: Session = Depends(get_db),
+    current_user: UserProfileDisplay = Depends(get_current_user)
+):
+    require_shelter(current_user)
+    outcome = transition_applications(db, current_user.id, {application_id: update.status.value})
+    return outcome.applications[0]
+
+@api_router.post("/applications/status", response_model=ApplicationBatchStatusResult)
+def update_application_statuses(
+    batch: ApplicationBatchStatusUpdate,
+    db: Session = Depends(get_db),
+    current_user: UserProfileDisplay = Depends(get_current_user)
+):
+    """
+    Apply many status changes in one transaction, all or nothing. Approving an application
+    marks the pet adopted and rejects its other open applications; see applications.py.
+    """
+    require_shelter(current_user)
+    transitions = {}
+    for transition in batch.transitions:
+        if transitions.setdefault(transition.id, transition.status.value) != transition.status.value:
+            raise HTTPException(status_code=400, detail=f"Conflicting statuses for application {transition.id}.")
+    outcome = transition_applications(db, current_user.id, transitions)
+    return ApplicationBatchStatusResult(
+        updated=outcome.applications,
+        auto_rejected=outcome.auto_rejected,
+        pet_status={pet.id: pet.status.value for _, pet in outcome.pet_changes},
+    )
+
+def transition_applications(db: Session, shelter_id: int, transitions: dict):
+    try:
+        outcome = apply_transitions(db, shelter_id, transitions)
+    except ApplicationTransitionError as e:
+        db.rollback()
+        raise HTTPException(status_code=e.status_code, detail=e.errors)
+    for old_key, pet in outcome.pet_changes:
+        sync_pet_views(old_key, pet)  # pet status changed: refresh caches, search and recommendations
+    return outcome
+
+# --- Messaging ---
+# New messages are pushed to the recipient's open WebSockets (/api/messages/ws); the inbox,
+# thread and unread endpoints are for the initial load, paging back and reconnects.
+
+def push_unread(db: Session, user_id: str):
+    if message_hub.is_connected(user_id):
+        message_hub.publish(user_id, unread_event(count_unread(db, user_id)))
+
+def page_of_messages(query, limit: int, response: Response) -> List[Message]:
+    # Newest first; the cursor carries the id of the oldest message on the page.
+    messages = query.limit(limit + 1).all()
+    if len(messages) > limit:
+        messages = messages[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(messages[-1].id)
+    return messages
+
+@api_router.post("/messages", response_model=MessageDisplay, status_code=status.HTTP_201_CREATED)
+def send_message(message_data: MessageCreate, db: Session = Depends(get_db), current_user: UserProfileDisplay = Depends(get_current_user)):
+    if message_data.receiver_id == current_user.user_id:
+        raise HTTPException(status_code=400, detail="Cannot send a message to yourself.")
+    if not db.query(UserProfile.id).filter(UserProfile.user_id == message_data.receiver_id).first():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Recipient not found.")
+    db_message = Message(**{**message_data.model_dump(), "sender_id": current_user.user_id})
+    db.add(db_message)
+    db.commit()
+    db.refresh(db_message)
+
+    event = message_event(db_message)
+    message_hub.publish(db_message.receiver_id, event)
+    message_hub.publish(db_message.sender_id, event)  # the sender's other tabs/devices
+    push_unread(db, db_message.receiver_id)
+    return db_message
+
+@api_router.get("/messages/inbox", response_model=List[MessageDisplay])
+def get_inbox(
+    response: Response,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    before: Optional[str] = None,
+    unread_only: bool = False,
+    db: Session = Depends(get_db),
+    current_user: UserProfileDisplay = Depends(get_current_user)
+):
+    """Messages received by the current user, newest first. Page back with `before` (from `X-Next-Cursor`)."""
+    return page_of_messages(inbox_query(db, current_user.user_id, before_id_from(before), unread_only), limit, response)
+
+@api_router.get("/messages/unread", response_model=UnreadCount)
+def get_unread_count(db: Session = Depends(get_db), current_user: UserProfileDisplay = Depends(get_current_user)):
+    by_sender = unread_by_sender(db, current_user.user_id)
+    return UnreadCount(unread=sum(by_sender.values()), by_sender=by_sender)
+
+@api_router.get("/messages/thread/{other_user_id}", response_model=List[MessageDisplay])
+def get_thread(
+    other_user_id: str,
+    response: Response,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    before: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: UserProfileDisplay = Depends(get_current_user)
+):
+    """The conversation between the current user and `other_user_id`, newest first."""
+    query = thread_query(db, current_user.user_id, other_user_id, before_id_from(before))
+    return page_of_messages(query, limit, response)
+
+@api_router.post("/messages/thread/{other_user_id}/read", response_model=UnreadCount)
+def mark_thread_read(
+    other_user_id: str,
+    up_to_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: UserProfileDisplay = Depends(get_current_user)
+):
+    """Mark messages from `other_user_id` (up to `up_to_id`, if given) as read; returns the new unread counts."""
+    if mark_read(db, current_user.user_id, sender_id=other_user_id, up_to_id=up_to_id):
+        db.commit()
+        push_unread(db, current_user.user_id)
+    by_sender = unread_by_sender(db, current_user.user_id)
+    return UnreadCount(unread=sum(by_sender.values()), by_sender=by_sender)
+
+def authenticate_socket(authorization: str) -> UserProfileDisplay:
+    db = SessionLocal()
+    try:
+        return authenticate(authorization, db)
+    finally:
+        db.close()
+
+def unread_for_socket(user_id: str) -> int:
+    db = SessionLocal()
+    try:
+        return count_unread(db, user_id)
+    finally:
+        db.close()
+
+@api_router.websocket("/messages/ws")
+async def messages_socket(websocket: WebSocket, token: Optional[str] = None):
+    """
+    Push channel for messages. Browsers cannot set headers on a WebSocket, so the ID token may
+    be passed as `?token=` instead of an Authorization header. The server sends
+    {"type": "unread", "count": n} on connect and whenever it changes, and
+    {"type": "message", "message": {...}} for every message sent to (or by) the user.
+    Clients may send {"type": "ping"} and get {"type": "pong"}.
+    """
+    authorization = token or websocket.headers.get("authorization")
+    if not authorization:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    try:
+        user = await to_thread.run_sync(authenticate_socket, authorization)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    connection = message_hub.register(user.user_id, websocket)
+    pump = asyncio.create_task(connection.pump())
+    try:
+        connection.offer(unread_event(await to_thread.run_sync(unread_for_socket, user.user_id)))
+        while True:
+            data = await websocket.receive_text()
+            try:
+                request = json.loads(data)
+            except ValueError:
+                continue
+            if isinstance(request, dict) and request.get("type") == "ping":
+                connection.offer('{"type":"pong"}')
+    except (WebSocketDisconnect, RuntimeError):
+        # RuntimeError: the pump already closed a client that fell too far behind.
+        pass
+    finally:
+        message_hub.unregister(connection)
+        pump.cancel()
+
 app.include_router(api_router)
 
-# Create database tables (if they don't exist)
-@app.on_event("startup")
-def on_startup():
-    Base.metadata.create_all(bind=engine)
-    print("Database tables created or already exist.")
\ No newline at end of file
+# Live connection pool numbers (checked out, overflow, checkout wait times) for pool sizing
+@app.get("/health/db-pool")
+def get_db_pool_stats():
+    return pool_stats()
+
+# Replica health (lag, connections in use, last error) and whether routing is on
+@app.get("/health/replicas")
+def get_replica_stats():
+    return replica_set.stats()
+
+# Background job queue: counts by status and the most recent dead-lettered jobs
+@app.get("/health/jobs")
+def get_job_stats():
+    return job_stats()
+
+# Pet change feed: connected SSE clients and the resumable history
+@app.get("/health/changes")
+def get_change_feed_stats():
+    return pet_change_feed.stats()
+
+# Cross-worker invalidation bus: transport and message counts
+@app.get("/health/invalidation")
+def get_invalidation_stats():
+    return invalidation_bus.stats()
+
+# Slowest statements (by total time) and the most recent ones, with their plans when sampled
+@app.get("/health/slow-queries")
+def get_slow_queries(limit: int = Query(50, ge=1, le=500)):
+    return {"enabled": SLOW_QUERY_LOG, **slow_query_log.snapshot(limit)}
+
+# Prometheus scrape endpoint (request latency histograms, status codes, SQL per request, pool state)
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    return PlainTextResponse(render_metrics(pool_stats()), media_type="text/plain; version=0.0.4; charset=utf-8")
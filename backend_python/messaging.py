@@ -0,0 +1,153 @@
+# backend_python/messaging.py
+# Adopter <-> shelter messaging: indexed inbox/thread/unread queries and the WebSocket hub
+# that pushes new messages to connected users (so chat UIs do not need to poll).
+import asyncio
+import json
+import os
+import threading
+from collections import defaultdict
+from typing import Dict, Optional, Set
+
+from sqlalchemy import and_, func, or_, update
+from sqlalchemy.orm import Session
+from starlette.websockets import WebSocket
+
+from .models import Message
+from .schemas import MessageDisplay
+
+# Pushes waiting for one slow WebSocket client; past this it is disconnected (code 1013)
+# and is expected to reconnect and re-read its inbox.
+MESSAGE_WS_QUEUE_SIZE = int(os.getenv("MESSAGE_WS_QUEUE_SIZE", "100"))
+
+
+# --- Queries ---
+# Each of these is served by one of the indexes on models.Message (inbox: receiver_id + id,
+# unread counts: receiver_id + is_read + sender_id, threads: sender_id + receiver_id + id),
+# so none of them scans the messages table.
+
+def inbox_query(db: Session, user_id: str, before_id: Optional[int] = None, unread_only: bool = False):
+    query = db.query(Message).filter(Message.receiver_id == user_id)
+    if unread_only:
+        query = query.filter(Message.is_read.is_(False))
+    if before_id is not None:
+        query = query.filter(Message.id < before_id)
+    return query.order_by(Message.id.desc())
+
+
+def thread_query(db: Session, user_id: str, other_user_id: str, before_id: Optional[int] = None):
+    query = db.query(Message).filter(or_(
+        and_(Message.sender_id == user_id, Message.receiver_id == other_user_id),
+        and_(Message.sender_id == other_user_id, Message.receiver_id == user_id),
+    ))
+    if before_id is not None:
+        query = query.filter(Message.id < before_id)
+    return query.order_by(Message.id.desc())
+
+
+def count_unread(db: Session, user_id: str) -> int:
+    return db.query(func.count(Message.id)).filter(
+        Message.receiver_id == user_id, Message.is_read.is_(False)
+    ).scalar()
+
+
+def unread_by_sender(db: Session, user_id: str) -> Dict[str, int]:
+    rows = db.query(Message.sender_id, func.count(Message.id)).filter(
+        Message.receiver_id == user_id, Message.is_read.is_(False)
+    ).group_by(Message.sender_id)
+    return {sender_id: count for sender_id, count in rows}
+
+
+def mark_read(db: Session, user_id: str, sender_id: Optional[str] = None, up_to_id: Optional[int] = None) -> int:
+    """Mark messages received by `user_id` (optionally only from one sender / up to an id) as read."""
+    statement = update(Message).where(Message.receiver_id == user_id, Message.is_read.is_(False))
+    if sender_id is not None:
+        statement = statement.where(Message.sender_id == sender_id)
+    if up_to_id is not None:
+        statement = statement.where(Message.id <= up_to_id)
+    result = db.execute(statement.values(is_read=True).execution_options(synchronize_session=False))
+    return result.rowcount
+
+
+# --- Push events ---
+# Encoded once per event, then sent as-is to every connection of the recipient.
+
+def message_event(message) -> str:
+    return '{"type":"message","message":' + MessageDisplay.model_validate(message).model_dump_json() + "}"
+
+
+def unread_event(count: int) -> str:
+    return json.dumps({"type": "unread", "count": count}, separators=(",", ":"))
+
+
+class HubConnection:
+    """One WebSocket with a bounded outgoing queue, drained by `pump()` on the event loop."""
+
+    def __init__(self, user_id: str, websocket: WebSocket, queue_size: int):
+        self.user_id = user_id
+        self.websocket = websocket
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = False
+
+    def offer(self, text: str) -> None:
+        # Runs on the event loop (see MessageHub.publish).
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(text)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            self.queue.get_nowait()          # make room for the close marker
+            self.queue.put_nowait(None)
+
+    async def pump(self) -> None:
+        while True:
+            text = await self.queue.get()
+            if text is None:
+                await self.websocket.close(code=1013)  # too slow: reconnect and refetch
+                return
+            await self.websocket.send_text(text)
+
+
+class MessageHub:
+    """
+    user_id -> open WebSocket connections in this process. `publish` is thread-safe, so the
+    (threadpool) message handlers can call it directly after committing.
+    """
+
+    def __init__(self, queue_size: int = MESSAGE_WS_QUEUE_SIZE):
+        self._lock = threading.Lock()
+        self._connections: Dict[str, Set[HubConnection]] = defaultdict(set)
+        self._queue_size = queue_size
+
+    def register(self, user_id: str, websocket: WebSocket) -> HubConnection:
+        """Call from the event loop that serves the WebSocket."""
+        connection = HubConnection(user_id, websocket, self._queue_size)
+        with self._lock:
+            self._connections[user_id].add(connection)
+        return connection
+
+    def unregister(self, connection: HubConnection) -> None:
+        with self._lock:
+            connections = self._connections.get(connection.user_id)
+            if connections is not None:
+                connections.discard(connection)
+                if not connections:
+                    del self._connections[connection.user_id]
+
+    def is_connected(self, user_id: str) -> bool:
+        with self._lock:
+            return user_id in self._connections
+
+    def connection_count(self) -> int:
+        with self._lock:
+            return sum(len(c) for c in self._connections.values())
+
+    def publish(self, user_id: str, text: str) -> None:
+        with self._lock:
+            connections = list(self._connections.get(user_id, ()))
+        for connection in connections:
+            connection.loop.call_soon_threadsafe(connection.offer, text)
+
+
+message_hub = MessageHub()
@@ -0,0 +1,291 @@
+# backend_python/metrics.py
+# Request metrics and SQL instrumentation, exposed in the Prometheus text format.
+# - MetricsMiddleware (plain ASGI): per-route latency histograms, status codes, in-flight requests.
+# - instrument_engine(): SQLAlchemy cursor events count queries and their time per request and
+#   flag requests that repeat the same statement (N+1 patterns).
+# - timed("segment"): time a named block of a handler (uploads, serialization, ...).
+# Per-request numbers can also be returned in a Server-Timing header (METRICS_SERVER_TIMING=1).
+import contextvars
+import logging
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+METRICS_SERVER_TIMING = os.getenv("METRICS_SERVER_TIMING", "0") == "1"
+# A request running the same SELECT this many times is reported as a likely N+1.
+METRICS_N_PLUS_ONE_THRESHOLD = int(os.getenv("METRICS_N_PLUS_ONE_THRESHOLD", "5"))
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: LabelValues) -> str:
+    if not names:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for v in values)
+    return "{" + ",".join(f'{n}="{v}"' for n, v in zip(names, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name, self.documentation, self.labelnames = name, documentation, tuple(labelnames)
+        self._values: Dict[LabelValues, float] = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] += amount
+
+    def expose(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels: str, value: float) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+    def expose(self) -> List[str]:
+        lines = super().expose()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name, self.documentation, self.labelnames = name, documentation, tuple(labelnames)
+        self.buckets = tuple(buckets) + (float("inf"),)
+        self._series: Dict[LabelValues, list] = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, *labels: str, value: float) -> None:
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1  # counts are stored per bucket and summed on exposition
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def expose(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((labels, list(series)) for labels, series in self._series.items())
+        names = self.labelnames + ("le",)
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(names, labels + (_format_value(bound),))} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{label_text} {series[-1]}")
+        return lines
+
+
+# --- Registry ---
+http_requests = Counter("petpals_http_requests_total", "HTTP requests by route and status code.",
+                        ("method", "route", "status"))
+http_latency = Histogram("petpals_http_request_duration_seconds", "HTTP request latency.", ("method", "route"))
+http_in_flight = Gauge("petpals_http_requests_in_flight", "HTTP requests currently being served.")
+db_queries = Histogram("petpals_db_queries_per_request", "SQL statements executed per request.", ("route",),
+                       buckets=QUERY_COUNT_BUCKETS)
+db_time = Histogram("petpals_db_time_per_request_seconds", "Time spent in SQL statements per request.", ("route",))
+db_statements = Histogram("petpals_db_statement_duration_seconds", "Duration of individual SQL statements.",
+                          ("operation",))
+n_plus_one = Counter("petpals_db_n_plus_one_requests_total",
+                     "Requests that repeated the same SELECT at least METRICS_N_PLUS_ONE_THRESHOLD times.", ("route",))
+segments = Histogram("petpals_request_segment_duration_seconds",
+                     "Time spent in named handler segments (upload, serialize, ...).", ("route", "segment"))
+pool_gauge = Gauge("petpals_db_pool", "Connection pool state (see /health/db-pool).", ("stat",))
+
+REGISTRY = [http_requests, http_latency, http_in_flight, db_queries, db_time, db_statements, n_plus_one, segments,
+            pool_gauge]
+
+
+# --- Per-request state ---
+
+class RequestMetrics:
+    """Collected for one request; shared (by reference) with the threadpool threads serving it."""
+
+    __slots__ = ("queries", "db_seconds", "statements", "segments")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.statements: Dict[str, int] = defaultdict(int)
+        self.segments: Dict[str, float] = defaultdict(float)
+
+
+_current: contextvars.ContextVar = contextvars.ContextVar("petpals_request_metrics", default=None)
+
+
+def current_request_metrics() -> Optional[RequestMetrics]:
+    return _current.get()
+
+
+@contextmanager
+def timed(segment: str) -> Iterator[None]:
+    """Attribute the time spent in a block to a named segment of the current request."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        state = _current.get()
+        if state is not None:
+            state.segments[segment] += time.perf_counter() - start
+
+
+# --- SQL ---
+
+_PLACEHOLDER = r"(?:\?|%s|%\(\w+\)s|:\w+|\$\d+|__\[POSTCOMPILE_\w+\])"  # every DBAPI paramstyle
+_IN_LIST_RE = re.compile(rf"\bIN\s*\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})*\s*\)", re.IGNORECASE)
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_sql(statement: str) -> str:
+    """
+    Reduce a statement to its shape: literals become ?, IN lists collapse to IN (...) and
+    whitespace is squeezed, so the same query with different values groups together.
+    """
+    statement = _LITERAL_RE.sub("?", statement)
+    statement = _IN_LIST_RE.sub("IN (...)", statement)
+    return _WHITESPACE_RE.sub(" ", statement).strip()
+
+
+def _operation(statement: str) -> str:
+    word = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+    return word if word in ("SELECT", "INSERT", "UPDATE", "DELETE") else "OTHER"
+
+
+def instrument_engine(engine) -> None:
+    """Time every statement on this engine and attribute it to the request that ran it."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("petpals_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["petpals_query_start"].pop()
+        db_statements.observe(_operation(statement), value=elapsed)
+        state = _current.get()
+        if state is not None:
+            state.queries += 1
+            state.db_seconds += elapsed
+            state.statements[statement] += 1
+
+
+# --- ASGI middleware ---
+
+def _route_label(scope) -> str:
+    # Label by route template (/api/pets/{pet_id}), never the raw path, to bound cardinality.
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    if scope.get("root_path"):
+        return scope["root_path"] + "/{path}"  # a Mount, e.g. /static
+    return "unmatched"
+
+
+def _server_timing(state: RequestMetrics, total: float) -> str:
+    parts = [f'db;dur={state.db_seconds * 1000:.1f};desc="{state.queries} queries"']
+    parts += [f"{name};dur={seconds * 1000:.1f}" for name, seconds in state.segments.items()]
+    parts.append(f"app;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+class MetricsMiddleware:
+    """
+    Plain ASGI middleware (no BaseHTTPMiddleware task/stream overhead). Everything is recorded
+    when the response finishes; the Server-Timing header is added as the response starts.
+    """
+
+    def __init__(self, app, server_timing: bool = METRICS_SERVER_TIMING):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        state = RequestMetrics()
+        token = _current.set(state)
+        start = time.perf_counter()
+        status_code = 500
+        http_in_flight.inc()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.server_timing:
+                    timing = _server_timing(state, time.perf_counter() - start)
+                    message["headers"] = list(message.get("headers", [])) + [(b"server-timing", timing.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_in_flight.dec()
+            _current.reset(token)
+            self._record(scope, state, status_code, elapsed)
+
+    def _record(self, scope, state: RequestMetrics, status_code: int, elapsed: float) -> None:
+        route, method = _route_label(scope), scope["method"]
+        http_requests.inc(method, route, str(status_code))
+        http_latency.observe(method, route, value=elapsed)
+        db_queries.observe(route, value=state.queries)
+        db_time.observe(route, value=state.db_seconds)
+        for name, seconds in state.segments.items():
+            segments.observe(route, name, value=seconds)
+
+        repeated = [(count, statement) for statement, count in state.statements.items()
+                    if count >= METRICS_N_PLUS_ONE_THRESHOLD and _operation(statement) == "SELECT"]
+        if repeated:
+            n_plus_one.inc(route)
+            count, statement = max(repeated)
+            logger.warning("Possible N+1 on %s %s: %d x %s", method, route, count, normalize_sql(statement)[:200])
+
+
+def render_metrics(pool: Optional[dict] = None) -> str:
+    """The whole registry in the Prometheus text exposition format (version 0.0.4)."""
+    if pool:
+        for stat, value in pool.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                pool_gauge.set(stat, value=value)
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.expose())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,158 @@
+# backend_python/migrations.py
+# Versioned schema migrations.
+#
+# The database records which migrations it has had in `schema_version`. Startup reads the
+# highest version in one query and, when it is current (the normal case), does nothing else:
+# no table reflection, no per-index existence checks. Only a database that is behind runs the
+# missing migrations, in order, in one transaction (serialized across workers on Postgres by
+# an advisory lock, so a fleet restarting at once migrates exactly once).
+#
+# Deploys that prefer migrating out of band run, from the repository root:
+#   python -m backend_python.migrations            # upgrade to the latest version
+#   python -m backend_python.migrations --check    # exit 1 if the database is behind
+# and set MIGRATE_ON_STARTUP=0 so workers only check the version.
+#
+# Adding a migration: append a function decorated with @migration(<next version>, "...").
+# It receives the migrating connection. Write it against the database as it was at the
+# previous version (not against the current models), and make DDL idempotent
+# (IF NOT EXISTS / checkfirst): the baseline creates tables from today's models, so on a
+# fresh database later migrations may find their change already in place.
+import argparse
+import logging
+import os
+import sys
+from datetime import datetime
+from typing import Callable, List, Tuple
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, insert, select, text
+from sqlalchemy.exc import OperationalError, ProgrammingError
+
+from .database import get_engine
+from .models import Base, Job, ensure_indexes
+from .search import ensure_search_schema
+
+logger = logging.getLogger("petpals.migrations")
+
+# 0 = only check the version at startup and refuse to start on an out-of-date database.
+MIGRATE_ON_STARTUP = os.getenv("MIGRATE_ON_STARTUP", "1") == "1"
+# Arbitrary, fixed key for pg_advisory_xact_lock.
+_ADVISORY_LOCK_KEY = 727_274_001
+
+# Kept out of Base.metadata: the baseline's create_all must not pre-create it.
+_version_metadata = MetaData()
+schema_version = Table(
+    "schema_version", _version_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String(200), nullable=False),
+    Column("applied_at", DateTime, nullable=False, default=datetime.utcnow),
+)
+
+MIGRATIONS: List[Tuple[int, str, Callable]] = []
+
+
+def migration(version: int, description: str):
+    def register(fn):
+        assert not MIGRATIONS or version == MIGRATIONS[-1][0] + 1, "migration versions must be consecutive"
+        MIGRATIONS.append((version, description, fn))
+        return fn
+    return register
+
+
+# --- Migrations ---
+
+@migration(1, "Baseline: tables and declared indexes")
+def _baseline(conn):
+    # What startup used to do on every boot. On a database created that way it finds
+    # everything in place and only records the version.
+    Base.metadata.create_all(conn)
+    ensure_indexes(conn)
+
+
+@migration(2, "Full-text search column and GIN index (Postgres only)")
+def _search_vector(conn):
+    ensure_search_schema(conn)
+
+
+@migration(3, "Background job queue table")
+def _jobs(conn):
+    Job.__table__.create(conn, checkfirst=True)
+    for index in Job.__table__.indexes:
+        index.create(conn, checkfirst=True)
+
+
+# --- Running them ---
+
+def latest_version() -> int:
+    return MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+
+def current_version(engine=None) -> int:
+    """The database's schema version: one indexed MAX() query; 0 if it has never been migrated."""
+    engine = engine or get_engine()
+    try:
+        with engine.connect() as conn:
+            return conn.execute(select(func.max(schema_version.c.version))).scalar() or 0
+    except (OperationalError, ProgrammingError):
+        # No schema_version table yet (a new database, or one created before migrations).
+        return 0
+
+
+def migrate(engine=None) -> int:
+    """Apply every pending migration in one transaction and return the resulting version."""
+    engine = engine or get_engine()
+    with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            # Held until commit; other workers wait here, then see the new version and skip.
+            conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+        schema_version.create(conn, checkfirst=True)
+        version = conn.execute(select(func.max(schema_version.c.version))).scalar() or 0
+        for number, description, apply in MIGRATIONS:
+            if number <= version:
+                continue
+            logger.info("Applying migration %d: %s", number, description)
+            apply(conn)
+            conn.execute(insert(schema_version).values(version=number, description=description))
+            version = number
+    return version
+
+
+def check_schema(engine=None, migrate_on_startup: bool = None) -> int:
+    """
+    Startup check. Costs one query when the database is current; migrates it when it is
+    behind (or raises RuntimeError with MIGRATE_ON_STARTUP=0).
+    """
+    migrate_on_startup = MIGRATE_ON_STARTUP if migrate_on_startup is None else migrate_on_startup
+    engine = engine or get_engine()
+    version, latest = current_version(engine), latest_version()
+    if version == latest:
+        return version
+    if version > latest:
+        # A newer release already migrated this database (e.g. mid rolling deploy); migrations
+        # are additive, so older code keeps working against it.
+        logger.warning("Database schema version %d is newer than this code's %d.", version, latest)
+        return version
+    if not migrate_on_startup:
+        raise RuntimeError(f"Database schema is at version {version}, this code needs {latest}. "
+                           f"Run `python -m backend_python.migrations`.")
+    return migrate(engine)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Apply or check PetPals schema migrations.")
+    parser.add_argument("--check", action="store_true", help="only report; exit 1 if migrations are pending")
+    args = parser.parse_args(argv)
+
+    version, latest = current_version(), latest_version()
+    if args.check:
+        print(f"Schema version {version}, latest {latest}.")
+        return 0 if version >= latest else 1
+    if version >= latest:
+        print(f"Schema is up to date (version {version}).")
+        return 0
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    print(f"Migrated schema from version {version} to {migrate()}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, TIMESTAMP, Enum, Boolean
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, TIMESTAMP, Enum, Boolean, Index
 from sqlalchemy.orm import relationship
 from .database import Base # <-- THIS IS THE CRUCIAL CHANGE
 import enum
@@ -54,6 +54,12 @@ class Pet(Base):
     applications = relationship("Application", back_populates="pet")
     messages = relationship("Message", back_populates="pet_ref")
 
+    __table_args__ = (
+        # GET /api/pets filters on status (almost always "available"), then species and gender,
+        # and pages in id order; this serves any leading subset of those filters.
+        Index("ix_pets_status_species_gender_id", "status", "species", "gender", "id"),
+    )
+
 
 class Application(Base):
     __tablename__ = 'applications'
@@ -75,6 +81,16 @@ class Application(Base):
 
     pet = relationship("Pet", back_populates="applications")
 
+    __table_args__ = (
+        # Dashboards: a shelter's / an adopter's applications newest first, optionally by status,
+        # and the per-status counts (GROUP BY status) — all index range scans.
+        Index("ix_applications_shelter_id_id", "shelter_id", "id"),
+        Index("ix_applications_shelter_id_status_id", "shelter_id", "status", "id"),
+        Index("ix_applications_user_id_id", "user_id", "id"),
+        Index("ix_applications_user_id_status", "user_id", "status"),
+        Index("ix_applications_pet_id_status", "pet_id", "status"),  # applications for one pet
+    )
+
 
 # --- Message Model ---
 class Message(Base):
@@ -91,6 +107,12 @@ class Message(Base):
     # Relationships
     pet_ref = relationship("Pet", back_populates="messages")
 
+    __table_args__ = (
+        Index("ix_messages_receiver_id_id", "receiver_id", "id"),                       # inbox, newest first
+        Index("ix_messages_receiver_id_is_read_sender_id", "receiver_id", "is_read", "sender_id"),  # unread counts
+        Index("ix_messages_sender_id_receiver_id_id", "sender_id", "receiver_id", "id"),  # conversation threads
+    )
+
 # --- UserProfile Model ---
 # This model is for storing user-specific profiles (adopter/shelter) linked to Firebase UIDs.
 class UserProfile(Base):
@@ -108,4 +130,36 @@ class UserProfile(Base):
     updated_at = Column(TIMESTAMP, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationship to applications (optional, if you want to link applications directly to profiles)
-    # applications = relationship("Application", back_populates="user_profile")
\ No newline at end of file
+    # applications = relationship("Application", back_populates="user_profile")
+
+# --- Background Job Model ---
+# Durable queue for request side-effects (see jobs.py). Finished jobs are deleted; jobs that
+# ran out of attempts stay behind with status "dead" for inspection and retry.
+class Job(Base):
+    __tablename__ = 'jobs'
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(100), nullable=False)           # handler name, e.g. "image.delete"
+    payload = Column(Text, nullable=False, default="{}")  # JSON keyword arguments for the handler
+    status = Column(String(20), nullable=False, default="queued")  # queued | running | dead
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False)
+    run_at = Column(TIMESTAMP, nullable=False, default=datetime.utcnow)  # not before (backoff)
+    locked_until = Column(TIMESTAMP, nullable=True)      # lease of the worker running it
+    last_error = Column(Text, nullable=True)
+    created_at = Column(TIMESTAMP, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Claiming: the oldest due job of a status, an index range scan.
+        Index("ix_jobs_status_run_at_id", "status", "run_at", "id"),
+    )
+
+
+def ensure_indexes(bind):
+    """
+    create_all() skips indexes on tables that already exist; create any declared index
+    that is missing (for databases created before the index was added).
+    """
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
@@ -0,0 +1,55 @@
+# backend_python/pagination.py
+import base64
+import json
+from typing import Any, List
+
+# Upper bound for `limit`. Paging is opt-in: a list request without `limit` still gets the
+# whole filtered list, as the existing clients (which do not follow cursors) expect.
+MAX_PAGE_SIZE = 200
+
+# Response header carrying the cursor of the next page (absent on the last page).
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(*values: Any) -> str:
+    """
+    Encode the sort key of the last row on a page into an opaque, URL-safe cursor.
+    Clients must treat the value as a black box and pass it back as `after`.
+    """
+    raw = json.dumps(list(values), separators=(",", ":"), default=str).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, arity: int = 1) -> List[Any]:
+    """
+    Decode a cursor produced by `encode_cursor`.
+    Raises ValueError if the cursor is malformed or does not carry `arity` integer ids.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except ValueError:  # covers binascii, unicode and JSON decoding errors
+        raise ValueError("Malformed cursor.")
+    if not isinstance(values, list) or len(values) != arity:
+        raise ValueError("Malformed cursor.")
+    # bool is an int subclass; anything else would only fail later, inside the query.
+    if not all(isinstance(v, int) and not isinstance(v, bool) for v in values):
+        raise ValueError("Malformed cursor.")
+    return values
+
+
+def parse_fields(fields: str, allowed, required=("id",)) -> List[str]:
+    """
+    Parse a comma separated `fields=` projection against the allowed field names.
+    The `required` fields (used for cursors/links) are always included first.
+    Raises ValueError on unknown field names.
+    """
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+    selected = list(required)
+    for f in requested:
+        if f not in selected:
+            selected.append(f)
+    return selected
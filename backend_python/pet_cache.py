@@ -0,0 +1,142 @@
+# backend_python/pet_cache.py
+import enum
+import hashlib
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+from fastapi import Response
+
+from .cache import LRUCache
+
+PET_CACHE_MAX_ENTRIES = int(os.getenv("PET_CACHE_MAX_ENTRIES", "2048"))
+PET_CACHE_TTL_SECONDS = float(os.getenv("PET_CACHE_TTL_SECONDS", "300"))
+
+
+@dataclass(frozen=True)
+class PetKey:
+    """The parts of a pet that decide which cached responses it can appear in."""
+    id: int
+    species: Optional[str]
+    status: Optional[str]
+    gender: Optional[str]
+    owner_id: Optional[int] = None  # for per-shelter aggregates (facets.py)
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: bytes
+    etag: str
+    headers: Dict[str, str] = field(default_factory=dict)
+    # For list entries: the filters and the (after_id, last_id] id window the page covers.
+    # last_id is None when the page is the final one (it covers every id above after_id).
+    filters: Optional[Tuple[Optional[str], Optional[str], Optional[str]]] = None
+    after_id: int = 0
+    last_id: Optional[int] = None
+
+    def covers(self, pet: PetKey) -> bool:
+        species, status, gender = self.filters
+        if species and species != pet.species:
+            return False
+        if status and status != pet.status:
+            return False
+        if gender and gender != pet.gender:
+            return False
+        return pet.id > self.after_id and (self.last_id is None or pet.id <= self.last_id)
+
+
+def _value(v):
+    return v.value if isinstance(v, enum.Enum) else v
+
+
+def pet_key(pet) -> PetKey:
+    return PetKey(id=pet.id, species=_value(pet.species), status=_value(pet.status), gender=_value(pet.gender),
+                  owner_id=pet.owner_id)
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+class PetResponseCache:
+    """
+    Serialized GET /api/pets and GET /api/pets/{id} responses, keyed on the filter
+    combination and on the pet id. Writes invalidate only the entries the changed
+    pet could appear in (see `invalidate`).
+
+    Every invalidation bumps a generation counter. Readers take `generation()` before
+    their query and pass it to `put_*`, which does not store the body if a write was
+    invalidated in between: that body may predate the write, and caching it would
+    serve stale data until the TTL.
+    """
+
+    def __init__(self, max_entries: int = PET_CACHE_MAX_ENTRIES, ttl_seconds: float = PET_CACHE_TTL_SECONDS):
+        self._cache = LRUCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self._lock = threading.Lock()  # orders generation checks in put_* against invalidations
+        self._generation = 0
+
+    @staticmethod
+    def list_key(species, status, gender, limit, after, fields) -> tuple:
+        return ("list", _value(species), _value(status), _value(gender), limit, after, fields)
+
+    @staticmethod
+    def detail_key(pet_id: int) -> tuple:
+        return ("detail", pet_id)
+
+    def get(self, key: tuple) -> Optional[CachedResponse]:
+        return self._cache.get(key)
+
+    def generation(self) -> int:
+        """Take before querying; pass to put_list/put_detail."""
+        return self._generation
+
+    def _put(self, key: tuple, entry: CachedResponse, generation: int) -> CachedResponse:
+        with self._lock:
+            if generation == self._generation:
+                self._cache.set(key, entry)
+        return entry  # served either way
+
+    def put_list(self, key: tuple, body: bytes, headers: Dict[str, str],
+                 after_id: Optional[int], last_id: Optional[int], generation: int) -> CachedResponse:
+        entry = CachedResponse(
+            body=body, etag=make_etag(body), headers=headers,
+            filters=key[1:4], after_id=after_id or 0, last_id=last_id,
+        )
+        return self._put(key, entry, generation)
+
+    def put_detail(self, pet_id: int, body: bytes, generation: int) -> CachedResponse:
+        return self._put(self.detail_key(pet_id), CachedResponse(body=body, etag=make_etag(body)), generation)
+
+    def invalidate(self, *pets: Optional[PetKey]) -> None:
+        """
+        Evict the detail entry of each pet and every list page it falls into.
+        Pass both the old and new state of an updated pet so pages it left are evicted too.
+        """
+        pets = [p for p in pets if p is not None]
+        with self._lock:
+            self._generation += 1
+            for p in pets:
+                self._cache.delete(self.detail_key(p.id))
+            self._cache.delete_where(
+                lambda key, entry: key[0] == "list" and any(entry.covers(p) for p in pets)
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._cache.clear()
+
+
+def cached_json_response(entry: CachedResponse, if_none_match: Optional[str]) -> Response:
+    """Build the response for a cache entry, answering a matching If-None-Match with 304."""
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache", **entry.headers}
+    if if_none_match:
+        tags = [t.strip() for t in if_none_match.split(",")]
+        tags = [t[2:] if t.startswith("W/") else t for t in tags]  # weak comparison
+        if "*" in tags or entry.etag in tags:
+            return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
+pet_response_cache = PetResponseCache()
@@ -0,0 +1,217 @@
+# backend_python/recommendations.py
+# Preference-based pet ranking over a precomputed NumPy feature matrix.
+import json
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from .models import Pet, PetSpecies, PetGender, PetStatus
+
+# --- Feature layout ---
+SPECIES = [s.value.lower() for s in PetSpecies]             # dog, cat, other
+GENDERS = [g.value.lower() for g in PetGender]              # male, female, unknown
+AGE_BUCKETS = ["baby", "young", "adult", "senior"]          # <1y, 1-3y, 3-8y, 8y+
+TEMPERAMENT_TAGS = [
+    "active", "affectionate", "calm", "cuddly", "curious", "docile", "energetic", "friendly",
+    "gentle", "graceful", "independent", "intelligent", "loyal", "observant", "outdoorsy",
+    "playful", "quiet", "shy", "social", "vocal",
+]
+
+FEATURES = (
+    [f"species:{s}" for s in SPECIES]
+    + [f"gender:{g}" for g in GENDERS]
+    + [f"age:{a}" for a in AGE_BUCKETS]
+    + [f"temperament:{t}" for t in TEMPERAMENT_TAGS]
+    + ["medical_needs"]
+)
+FEATURE_INDEX = {name: i for i, name in enumerate(FEATURES)}
+
+# How much each kind of matching preference adds to a pet's score.
+WEIGHTS = {"species": 3.0, "gender": 1.0, "age": 1.5, "temperament": 1.0, "medical_needs": -2.0}
+
+# Free-text words that map onto features.
+_KEYWORDS = {
+    "dog": "species:dog", "puppy": "species:dog", "pup": "species:dog",
+    "cat": "species:cat", "kitten": "species:cat", "kitty": "species:cat",
+    "rabbit": "species:other", "bunny": "species:other", "bird": "species:other",
+    "parrot": "species:other", "fish": "species:other", "other": "species:other",
+    "male": "gender:male", "boy": "gender:male",
+    "female": "gender:female", "girl": "gender:female",
+    "baby": "age:baby", "young": "age:young", "junior": "age:young",
+    "adult": "age:adult", "senior": "age:senior", "elderly": "age:senior", "older": "age:senior",
+}  # not "old": "2 year old dog" says nothing about wanting a senior
+_WORD_RE = re.compile(r"[a-z]+")
+_AGE_RE = re.compile(r"(\d+(?:\.\d+)?)\s*(year|yr|month|mo|week|wk)", re.IGNORECASE)
+_NO_MEDICAL_RE = re.compile(r"\b(no|without|avoid)\s+(special\s+|medical\s+)*(medical|special|health)\s*(needs|issues|conditions)?|\bhealthy\b")
+
+
+def _stem(word: str) -> str:
+    if len(word) > 3 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def age_bucket(age: Optional[str]) -> Optional[str]:
+    """Map free-form ages such as "2 years", "6 months" or "1.5 years" to an age bucket."""
+    match = _AGE_RE.search(age or "")
+    if not match:
+        return None
+    value, unit = float(match.group(1)), match.group(2).lower()
+    years = value if unit in ("year", "yr") else value / 12 if unit in ("month", "mo") else value / 52
+    if years < 1:
+        return "baby"
+    if years < 3:
+        return "young"
+    if years < 8:
+        return "adult"
+    return "senior"
+
+
+def has_medical_needs(medical_needs: Optional[str]) -> bool:
+    return bool(medical_needs) and medical_needs.strip().lower() not in ("none", "n/a", "no", "")
+
+
+def pet_features(pet) -> np.ndarray:
+    row = np.zeros(len(FEATURES), dtype=np.float32)
+    species = pet.species.value if hasattr(pet.species, "value") else pet.species
+    gender = pet.gender.value if hasattr(pet.gender, "value") else pet.gender
+    row[FEATURE_INDEX[f"species:{species.lower()}"]] = 1.0
+    row[FEATURE_INDEX[f"gender:{gender.lower()}"]] = 1.0
+    bucket = age_bucket(pet.age)
+    if bucket:
+        row[FEATURE_INDEX[f"age:{bucket}"]] = 1.0
+    for word in _WORD_RE.findall((pet.temperament or "").lower()):
+        index = FEATURE_INDEX.get(f"temperament:{_stem(word)}")
+        if index is not None:
+            row[index] = 1.0
+    if has_medical_needs(pet.medical_needs):
+        row[FEATURE_INDEX["medical_needs"]] = 1.0
+    return row
+
+
+def preference_vector(preferences: Optional[str]) -> np.ndarray:
+    """
+    Turn UserProfile.preferences into a weight per feature. Accepts free text
+    ("calm female cat, no medical needs") or a JSON object whose values are read the same way
+    (e.g. {"species": "Cat", "temperament": ["calm", "gentle"]}).
+    """
+    weights = np.zeros(len(FEATURES), dtype=np.float32)
+    if not preferences:
+        return weights
+    text = preferences
+    try:
+        parsed = json.loads(preferences)
+    except ValueError:
+        parsed = None
+    if isinstance(parsed, dict):
+        values = []
+        for value in parsed.values():
+            values.extend(value if isinstance(value, list) else [value])
+        text = " ".join(str(v) for v in values if v is not None and str(v).lower() != "all")
+    text = text.lower()
+
+    for word in _WORD_RE.findall(text):
+        word = _stem(word)
+        feature = _KEYWORDS.get(word) or (f"temperament:{word}" if f"temperament:{word}" in FEATURE_INDEX else None)
+        if feature:
+            weights[FEATURE_INDEX[feature]] = WEIGHTS[feature.split(":")[0]]
+    if _NO_MEDICAL_RE.search(text):
+        weights[FEATURE_INDEX["medical_needs"]] = WEIGHTS["medical_needs"]
+    return weights
+
+
+class PetRecommender:
+    """
+    Keeps one feature row per pet in a contiguous float32 matrix so that scoring every pet
+    against a preference vector is a single matrix-vector product. Rows are added, replaced
+    and removed in place (swap-with-last) as pets are created, updated, adopted or deleted.
+    """
+
+    def __init__(self, initial_capacity: int = 1024):
+        self._lock = threading.Lock()
+        self._built = False
+        self._matrix = np.zeros((initial_capacity, len(FEATURES)), dtype=np.float32)
+        self._ids = np.zeros(initial_capacity, dtype=np.int64)
+        self._available = np.zeros(initial_capacity, dtype=bool)
+        self._row_of: Dict[int, int] = {}
+        self._size = 0
+
+    def _grow(self) -> None:
+        capacity = self._matrix.shape[0] * 2
+        self._matrix = np.resize(self._matrix, (capacity, len(FEATURES)))
+        self._ids = np.resize(self._ids, capacity)
+        self._available = np.resize(self._available, capacity)
+
+    def _set_row(self, pet) -> None:
+        row = self._row_of.get(pet.id)
+        if row is None:
+            if self._size == self._matrix.shape[0]:
+                self._grow()
+            row = self._size
+            self._size += 1
+            self._row_of[pet.id] = row
+            self._ids[row] = pet.id
+        self._matrix[row] = pet_features(pet)
+        status = pet.status.value if hasattr(pet.status, "value") else pet.status
+        self._available[row] = status == PetStatus.available.value
+
+    def ensure_built(self, db: Session) -> None:
+        if self._built:
+            return
+        with self._lock:
+            if self._built:
+                return
+            columns = (Pet.id, Pet.species, Pet.gender, Pet.age, Pet.temperament, Pet.medical_needs, Pet.status)
+            for pet in db.query(*columns).yield_per(1000):
+                self._set_row(pet)
+            self._built = True
+
+    def reset(self) -> None:
+        """Forget all rows; the matrix is rebuilt from the table on next use (after bulk writes)."""
+        with self._lock:
+            self._row_of.clear()
+            self._size = 0
+            self._built = False
+
+    def upsert(self, pet) -> None:
+        """Refresh one pet's row after a committed create/update. No-op until built."""
+        with self._lock:
+            if self._built:
+                self._set_row(pet)
+
+    def remove(self, pet_id: int) -> None:
+        with self._lock:
+            if not self._built:
+                return
+            row = self._row_of.pop(pet_id, None)
+            if row is None:
+                return
+            last = self._size - 1
+            if row != last:
+                self._matrix[row] = self._matrix[last]
+                self._ids[row] = self._ids[last]
+                self._available[row] = self._available[last]
+                self._row_of[int(self._ids[row])] = row
+            self._size = last
+
+    def top_k(self, preferences: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        """(pet_id, score) for the k best available pets, highest score first."""
+        with self._lock:
+            n = self._size
+            scores = self._matrix[:n] @ preferences
+            scores[~self._available[:n]] = -np.inf
+            ids = self._ids[:n].copy()
+        candidates = np.flatnonzero(np.isfinite(scores))
+        if candidates.size > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        # Best score first; equal scores are listed in id order.
+        order = candidates[np.lexsort((ids[candidates], -scores[candidates]))]
+        return [(int(ids[i]), float(scores[i])) for i in order]
+
+
+pet_recommender = PetRecommender()
@@ -0,0 +1,307 @@
+# backend_python/replicas.py
+# Read/write session routing.
+#
+# Writes, and every endpoint on `get_db`, use the primary. Read-only endpoints take their
+# session from `read_session()`, which hands out a session on one of the replicas listed in
+# DATABASE_REPLICA_URLS (comma separated). It picks the healthy replica with the fewest
+# checked-out connections and falls back to the primary when none is healthy.
+#
+# Health: a background thread probes each replica every REPLICA_HEALTH_INTERVAL seconds
+# (SELECT 1; on Postgres also the replay lag, which must stay under REPLICA_MAX_LAG_SECONDS).
+# A connection error on a replica takes it out of rotation at once, until a probe succeeds.
+#
+# Read-your-writes: for READ_YOUR_WRITES_SECONDS after a request commits a write, that client's
+# reads go to the primary. Within this process that is tracked per request scope; across
+# workers it rides on the writing response as a short-lived cookie and a PIN_HEADER header. The
+# cookie covers same-site clients; the React app calls the API cross-origin, where the cookie
+# is not sent, so it echoes the header on its next requests instead (see petpalsApi.js).
+# Scoped pins (e.g. "pets")
+# additionally send every read of that scope in this process to the primary for the window,
+# so cached responses are never refilled from a replica that has not caught up yet.
+#
+# Trying it locally with two databases (SQLite files have no replication, but routing,
+# fallback and pinning can be observed with /health/replicas and the Server-Timing header):
+#   cp petpals.db replica.db
+#   DATABASE_URL=sqlite:///petpals.db DATABASE_REPLICA_URLS=sqlite:///replica.db uvicorn ...
+import contextvars
+import itertools
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from http.cookies import SimpleCookie
+from typing import Dict, List, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.orm import Session
+
+from .database import SessionLocal, create_db_engine
+
+logger = logging.getLogger("petpals.replicas")
+
+DATABASE_REPLICA_URLS = [u.strip() for u in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if u.strip()]
+REPLICA_HEALTH_INTERVAL = float(os.getenv("REPLICA_HEALTH_INTERVAL", "5"))   # seconds between probes
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "10"))  # Postgres only
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+
+PIN_COOKIE = "petpals_read_primary_until"
+PIN_HEADER = "X-Read-Primary-Until"  # same value as the cookie, for clients that echo it back
+PETS_SCOPE = "pets"
+
+# Lag of a Postgres standby; 0 on a primary or when everything received has been replayed
+# (an idle primary would otherwise make a caught-up standby look behind).
+_POSTGRES_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+class Replica:
+    def __init__(self, url: str):
+        self.url = url
+        self.name = make_url(url).render_as_string(hide_password=True)
+        self.engine = create_db_engine(url)
+        self.healthy = True  # until a probe or a query says otherwise
+        self.lag_seconds: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.checked_at: Optional[float] = None
+        event.listen(self.engine, "handle_error", self._on_error)
+
+    def _on_error(self, context) -> None:
+        # Drop out of rotation on connection-level failures (not on e.g. a bad query).
+        if context.is_disconnect or context.connection is None:
+            self.mark_down(str(context.original_exception))
+
+    def mark_down(self, error: str) -> None:
+        if self.healthy:
+            logger.warning("Replica %s out of rotation: %s", self.name, error)
+        self.healthy = False
+        self.last_error = error
+
+    def probe(self) -> None:
+        try:
+            with self.engine.connect() as conn:
+                if conn.dialect.name == "postgresql":
+                    self.lag_seconds = float(conn.execute(_POSTGRES_LAG_SQL).scalar())
+                else:
+                    conn.execute(text("SELECT 1"))
+                    self.lag_seconds = 0.0
+        except Exception as e:
+            self.mark_down(str(e))
+        else:
+            if self.lag_seconds > REPLICA_MAX_LAG_SECONDS:
+                self.mark_down(f"replication lag {self.lag_seconds:.1f}s")
+            else:
+                if not self.healthy:
+                    logger.info("Replica %s back in rotation", self.name)
+                self.healthy = True
+                self.last_error = None
+        self.checked_at = time.time()
+
+    def checked_out(self) -> int:
+        pool = self.engine.pool
+        return pool.checkedout() if hasattr(pool, "checkedout") else 0
+
+    def stats(self) -> dict:
+        return {"url": self.name, "healthy": self.healthy, "lag_seconds": self.lag_seconds,
+                "checked_out": self.checked_out(), "last_error": self.last_error, "checked_at": self.checked_at}
+
+
+class ReplicaSet:
+    """The configured replicas (engines built on first use) and their health-check thread."""
+
+    def __init__(self, urls: List[str] = DATABASE_REPLICA_URLS, interval: float = REPLICA_HEALTH_INTERVAL):
+        self._urls = list(urls)
+        self._interval = interval
+        self._replicas: Optional[List[Replica]] = None
+        self._lock = threading.Lock()
+        self._turn = itertools.count()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._urls)
+
+    @property
+    def replicas(self) -> List[Replica]:
+        if self._replicas is None:
+            with self._lock:
+                if self._replicas is None:
+                    self._replicas = [Replica(url) for url in self._urls]
+        return self._replicas
+
+    def choose(self) -> Optional[Replica]:
+        """The healthy replica with the fewest connections in use (ties rotate); None if none is healthy."""
+        healthy = [r for r in self.replicas if r.healthy]
+        if not healthy:
+            return None
+        start = next(self._turn) % len(healthy)
+        rotated = healthy[start:] + healthy[:start]
+        return min(rotated, key=Replica.checked_out)
+
+    def start(self) -> None:
+        if not self.enabled or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="petpals-replica-health", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            for replica in self.replicas:
+                replica.probe()
+            if self._stop.wait(self._interval):
+                return
+
+    def stats(self) -> dict:
+        return {"enabled": self.enabled, "replicas": [r.stats() for r in self.replicas] if self.enabled else []}
+
+
+replica_set = ReplicaSet()
+
+
+# --- Read-your-writes pinning ---
+
+@dataclass
+class RoutingState:
+    """Per request: until when this client's reads must hit the primary, and whether it wrote."""
+    pinned_until: float = 0.0
+    wrote: bool = False
+
+
+_routing: contextvars.ContextVar = contextvars.ContextVar("petpals_read_routing", default=None)
+_scope_pins: Dict[str, float] = {}
+
+
+def pin_scope(scope: str, seconds: float = READ_YOUR_WRITES_SECONDS) -> None:
+    """Send every read of `scope` in this process to the primary for the next `seconds`."""
+    _scope_pins[scope] = time.time() + seconds
+
+
+def _pinned(scope: Optional[str]) -> bool:
+    now = time.time()
+    state = _routing.get()
+    if state is not None and (state.wrote or state.pinned_until > now):
+        return True
+    return scope is not None and _scope_pins.get(scope, 0.0) > now
+
+
+# Any connection that commits an INSERT/UPDATE/DELETE marks the current request as a writer.
+# This is tracked on the engine rather than with a session "do_orm_execute" hook: merely having
+# such a hook makes SQLAlchemy refuse yield_per with selectinload ("Can't use the ORM yield_per
+# feature in conjunction with unique()"), which the NDJSON exports rely on. It also catches
+# Core writes, e.g. the bulk importer's batched INSERTs.
+@event.listens_for(Engine, "after_cursor_execute")
+def _executed(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and (context.isinsert or context.isupdate or context.isdelete):
+        conn.info["petpals_wrote"] = True
+
+
+@event.listens_for(Engine, "commit")
+def _committed(conn):
+    if conn.info.pop("petpals_wrote", False):
+        state = _routing.get()
+        if state is not None:
+            state.wrote = True
+
+
+@event.listens_for(Engine, "rollback")
+def _rolled_back(conn):
+    conn.info.pop("petpals_wrote", None)
+
+
+class ReadRoutingMiddleware:
+    """
+    Plain ASGI middleware: reads the pin cookie or header into the request's RoutingState and,
+    when the request committed a write, sets both on the response so the client's next reads
+    (on any worker) stay on the primary until the replicas have caught up.
+    """
+
+    def __init__(self, app, window: float = READ_YOUR_WRITES_SECONDS):
+        self.app = app
+        self.window = window
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        state = RoutingState(pinned_until=_requested_pin(scope))
+        token = _routing.set(state)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and state.wrote:
+                until = f"{time.time() + self.window:.3f}"
+                cookie = f"{PIN_COOKIE}={until}; Max-Age={max(1, round(self.window))}; Path=/; HttpOnly; SameSite=Lax"
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"set-cookie", cookie.encode("latin-1")),
+                    (PIN_HEADER.lower().encode("latin-1"), until.encode("latin-1")),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _routing.reset(token)
+
+
+def _requested_pin(scope) -> float:
+    """The later of the pin cookie and the echoed PIN_HEADER; 0 when neither is sent or parses."""
+    header = PIN_HEADER.lower().encode("latin-1")
+    pins = [0.0]
+    for name, value in scope.get("headers", ()):
+        if name == b"cookie" and PIN_COOKIE.encode() in value:
+            morsel = SimpleCookie(value.decode("latin-1")).get(PIN_COOKIE)
+            if morsel:
+                pins.append(_parse_pin(morsel.value))
+        elif name == header:
+            pins.append(_parse_pin(value.decode("latin-1")))
+    return max(pins)
+
+
+def _parse_pin(value: str) -> float:
+    try:
+        return float(value)
+    except ValueError:
+        return 0.0
+
+
+# --- Dependencies ---
+
+def read_session(scope: Optional[str] = None):
+    """
+    A get_db-style dependency for read-only endpoints: a session on a replica, or on the
+    primary when replicas are off, all unhealthy, or the client/scope is pinned.
+    """
+
+    def get_read_db():
+        replica = None
+        if replica_set.enabled and not _pinned(scope):
+            replica = replica_set.choose()
+        db = SessionLocal(bind=replica.engine) if replica is not None else SessionLocal()
+        db.info["replica"] = replica.name if replica is not None else None
+        try:
+            yield db
+        finally:
+            db.close()
+
+    return get_read_db
+
+
+def is_replica_session(db: Session) -> bool:
+    return db.info.get("replica") is not None
+
+
+def shutdown_replicas() -> None:
+    replica_set.stop()
@@ -1,8 +1,10 @@
-from pydantic import BaseModel, Field, ConfigDict
-from typing import Optional, List
+from pydantic import BaseModel, Field, ConfigDict, computed_field, field_validator
+from typing import Optional, List, Dict
 from datetime import datetime
 from enum import Enum
 
+from .images import content_hash, derivative_urls
+
 # Enums (should match models.py, or import directly if in a shared place)
 class PetSpecies(str, Enum):
     dog = "Dog"
@@ -34,6 +36,63 @@ class PetCreate(BaseModel):
 
     model_config = ConfigDict(use_enum_values=True) # Pydantic V2 syntax for class Config
 
+    def model_columns(self) -> dict:
+        """
+        Column values for models.Pet. The database enums store member *names* ("dog")
+        while the API speaks values ("Dog"), so the enums are converted here.
+        """
+        data = self.model_dump()
+        data["species"] = PetSpecies(data["species"]).name
+        data["status"] = PetStatus(data["status"]).name
+        data["gender"] = PetGender(data["gender"]).name
+        return data
+
+
+class PetImportRow(PetCreate):
+    # One row of a shelter's bulk import; unlike the multipart create, rows may carry an image URL.
+    image_url: Optional[str] = None
+
+    @field_validator("image_url")
+    @classmethod
+    def image_url_is_an_upload(cls, v: Optional[str]) -> Optional[str]:
+        # Only URLs of already uploaded (content-addressed) images: the stored URL is later
+        # turned into a file path when the image is released (images.delete_image).
+        if v and not content_hash(v):
+            raise ValueError("must be the URL of an uploaded image (/static/images/pets/<sha256>.<ext>)")
+        return v or None
+
+
+class PetImportError(BaseModel):
+    row: int # 1-based data row (CSV header and blank lines excluded) or NDJSON line number
+    errors: List[str]
+
+
+class PetImportResult(BaseModel):
+    inserted: int
+    failed: int
+    errors: List[PetImportError] # Capped; `failed` has the full count
+
+
+class PetFacetCount(BaseModel):
+    species: PetSpecies
+    status: PetStatus
+    gender: PetGender
+    count: int
+
+
+class OwnerPetFacets(BaseModel):
+    total: int
+    by_status: Dict[str, int]
+
+
+class PetFacets(BaseModel):
+    total: int
+    by_species: Dict[str, int]
+    by_status: Dict[str, int]
+    by_gender: Dict[str, int]
+    counts: List[PetFacetCount] # Every non-empty species x status x gender combination
+    by_owner: Dict[int, OwnerPetFacets] # Keyed by owner_id (the shelter's profile id)
+
 
 class PetDisplay(BaseModel):
     id: int
@@ -50,6 +109,12 @@ class PetDisplay(BaseModel):
 
     model_config = ConfigDict(from_attributes=True) # Pydantic V2 syntax
 
+    @computed_field
+    @property
+    def image_variants(self) -> Optional[Dict[str, str]]:
+        # Resized thumb/card URLs (JPEG + WebP) for list views; None for legacy images and until they are built
+        return derivative_urls(self.image_url)
+
 class ApplicationCreate(BaseModel):
     pet_id: int
     user_id: str # This would typically come from the authenticated user's Firebase UID
@@ -84,9 +149,38 @@ class ApplicationDisplay(BaseModel):
 
     model_config = ConfigDict(from_attributes=True) # Pydantic V2 syntax
 
+# Application statuses a shelter can set (new applications start as "pending")
+class ApplicationStatus(str, Enum):
+    pending = "pending"
+    under_review = "under_review"
+    approved = "approved"
+    rejected = "rejected"
+
+class ApplicationWithPet(ApplicationDisplay):
+    pet: Optional[PetDisplay] = None # Loaded for the whole page in one batched query
+
+class ApplicationStatusUpdate(BaseModel):
+    status: ApplicationStatus
+
+class ApplicationTransition(BaseModel):
+    id: int
+    status: ApplicationStatus
+
+class ApplicationBatchStatusUpdate(BaseModel):
+    transitions: List[ApplicationTransition] = Field(..., min_length=1, max_length=500)
+
+class ApplicationBatchStatusResult(BaseModel):
+    updated: List[ApplicationDisplay]
+    auto_rejected: List[int] # Competing applications rejected because another one for the pet was approved
+    pet_status: Dict[int, PetStatus] # New status of every pet whose status changed
+
+class ApplicationStatusCounts(BaseModel):
+    total: int
+    counts: Dict[str, int] # status -> number of applications
+
 # --- New Message Schemas ---
 class MessageCreate(BaseModel):
-    sender_id: str
+    sender_id: Optional[str] = None # Ignored: the sender is always the authenticated user
     receiver_id: str
     pet_id: Optional[int] = None # Optional association with a pet
     content: str = Field(..., min_length=1)
@@ -104,6 +198,10 @@ class MessageDisplay(BaseModel):
 
     model_config = ConfigDict(from_attributes=True)
 
+class UnreadCount(BaseModel):
+    unread: int
+    by_sender: Dict[str, int] # Sender UID -> unread messages from them
+
 # --- NEW: UserProfile Schemas ---
 class UserProfileBase(BaseModel):
     user_id: str # Firebase UID
@@ -0,0 +1,181 @@
+# backend_python/search.py
+# Ranked full-text search over pets.
+# - Postgres: a generated, GIN-indexed tsvector column (`pets.search_vector`), kept in sync
+#   by the database itself on every INSERT/UPDATE.
+# - Anything else (SQLite in development): an in-memory inverted index, built once from the
+#   table and then updated incrementally by the pet write handlers.
+import math
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from .models import Pet
+
+# Searched columns and their weight (Postgres weights A > B > C > D).
+SEARCH_FIELDS = {
+    "name": "A",
+    "breed": "B",
+    "temperament": "B",
+    "description": "C",
+}
+_WEIGHT_FACTORS = {"A": 3.0, "B": 2.0, "C": 1.0, "D": 0.5}
+
+_TSVECTOR_EXPRESSION = " || ".join(
+    f"setweight(to_tsvector('english'::regconfig, coalesce({column}, '')), '{weight}')"
+    for column, weight in SEARCH_FIELDS.items()
+)
+
+POSTGRES_SEARCH_DDL = [
+    f"ALTER TABLE pets ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    f"GENERATED ALWAYS AS ({_TSVECTOR_EXPRESSION}) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_pets_search_vector ON pets USING GIN (search_vector)",
+]
+
+# Terms are OR-ed so partial matches still rank (by how many terms, and where, they hit).
+_POSTGRES_SEARCH_SQL = text("""
+    SELECT id, ts_rank_cd(search_vector, query) AS rank
+    FROM pets, CAST(replace(plainto_tsquery('english', :q)::text, '&', '|') AS tsquery) AS query
+    WHERE search_vector @@ query
+    ORDER BY rank DESC, id
+    LIMIT :limit
+""")
+
+
+def ensure_search_schema(conn) -> None:
+    """
+    Add the tsvector column and its GIN index on Postgres (idempotent, no-op elsewhere).
+    Runs on the caller's connection, inside its transaction (see migrations.py).
+    """
+    if conn.dialect.name != "postgresql":
+        return
+    for statement in POSTGRES_SEARCH_DDL:
+        conn.execute(text(statement))
+
+
+# --- In-memory fallback ---
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have he her his in is it its of on or she that the "
+    "their they this to was were will with".split()
+)
+
+
+def tokenize(value: str) -> List[str]:
+    """Lowercase, split, drop stopwords and apply a light plural stemmer ("kids" -> "kid")."""
+    tokens = []
+    for token in _TOKEN_RE.findall((value or "").lower()):
+        if token in _STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+class InMemorySearchIndex:
+    """
+    A weighted inverted index with BM25 ranking. Built lazily from the `pets` table on the
+    first query, then kept current through `upsert`/`remove` calls after each committed write.
+    """
+
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._built = False
+        self._postings: Dict[str, Dict[int, float]] = defaultdict(dict)  # term -> {pet_id: weighted tf}
+        self._doc_terms: Dict[int, Dict[str, float]] = {}                 # pet_id -> {term: weighted tf}
+        self._doc_length: Dict[int, float] = {}
+        self._total_length = 0.0
+
+    def _index_document(self, pet_id: int, values: Dict[str, str]) -> None:
+        terms: Dict[str, float] = defaultdict(float)
+        for column, weight in SEARCH_FIELDS.items():
+            for token in tokenize(values.get(column)):
+                terms[token] += _WEIGHT_FACTORS[weight]
+        self._remove_document(pet_id)
+        self._doc_terms[pet_id] = terms
+        length = sum(terms.values())
+        self._doc_length[pet_id] = length
+        self._total_length += length
+        for term, tf in terms.items():
+            self._postings[term][pet_id] = tf
+
+    def _remove_document(self, pet_id: int) -> None:
+        terms = self._doc_terms.pop(pet_id, None)
+        if terms is None:
+            return
+        self._total_length -= self._doc_length.pop(pet_id, 0.0)
+        for term in terms:
+            posting = self._postings.get(term)
+            if posting is not None:
+                posting.pop(pet_id, None)
+                if not posting:
+                    del self._postings[term]
+
+    def ensure_built(self, db: Session) -> None:
+        if self._built:
+            return
+        with self._lock:
+            if self._built:
+                return
+            columns = [getattr(Pet, c) for c in SEARCH_FIELDS]
+            for row in db.query(Pet.id, *columns).yield_per(1000):
+                self._index_document(row.id, row._asdict())
+            self._built = True
+
+    def reset(self) -> None:
+        """Drop everything; the index is rebuilt from the table on the next search (after bulk writes)."""
+        with self._lock:
+            self._postings.clear()
+            self._doc_terms.clear()
+            self._doc_length.clear()
+            self._total_length = 0.0
+            self._built = False
+
+    def upsert(self, pet) -> None:
+        """Re-index one pet after a committed create/update. No-op until the index is built."""
+        with self._lock:
+            if self._built:
+                self._index_document(pet.id, {c: getattr(pet, c) for c in SEARCH_FIELDS})
+
+    def remove(self, pet_id: int) -> None:
+        with self._lock:
+            if self._built:
+                self._remove_document(pet_id)
+
+    def search(self, q: str, limit: int) -> List[Tuple[int, float]]:
+        terms = set(tokenize(q))
+        with self._lock:
+            n_docs = len(self._doc_terms)
+            if not n_docs or not terms:
+                return []
+            avg_length = self._total_length / n_docs or 1.0
+            scores: Dict[int, float] = defaultdict(float)
+            for term in terms:
+                posting = self._postings.get(term)
+                if not posting:
+                    continue
+                idf = math.log(1 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+                for pet_id, tf in posting.items():
+                    norm = self.K1 * (1 - self.B + self.B * self._doc_length[pet_id] / avg_length)
+                    scores[pet_id] += idf * tf * (self.K1 + 1) / (tf + norm)
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:limit]
+
+
+pet_search_index = InMemorySearchIndex()
+
+
+def search_pet_ids(db: Session, q: str, limit: int) -> List[Tuple[int, float]]:
+    """Return (pet_id, rank) pairs, best match first."""
+    if db.get_bind().dialect.name == "postgresql":
+        return [(row.id, float(row.rank)) for row in db.execute(_POSTGRES_SEARCH_SQL, {"q": q, "limit": limit})]
+    pet_search_index.ensure_built(db)
+    return pet_search_index.search(q, limit)
@@ -1,36 +1,25 @@
 # backend_python/seed_db.py
-import os
-from dotenv import load_dotenv
-from datetime import datetime
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from models import Base, Pet, PetSpecies, PetStatus, PetGender # Import your models
-from schemas import PetCreate # Import your PetCreate schema
-
-# Load environment variables
-load_dotenv()
-
-DATABASE_URL = os.getenv("DATABASE_URL")
-if not DATABASE_URL:
-    raise ValueError("DATABASE_URL environment variable not set. Please create a .env file.")
-
-engine = create_engine(DATABASE_URL, echo=False)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# Run from the repository root:
+#   python -m backend_python.seed_db                      # small demo catalogue
+#   python -m backend_python.seed_db --synthetic --pets 1000000 --profiles 100000 --applications 500000
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import func, text
+from .database import engine, get_db # Shared engine/pool, configured from the environment
+from .models import Owner, Pet, PetSpecies, PetStatus, PetGender, UserProfile, Application # Import your models
+from .schemas import PetCreate # Import your PetCreate schema
+from .bulk_import import bulk_insert
+from .migrations import migrate
 
 def seed_data():
     db = next(get_db()) # Get a session
     try:
-        # Create tables if they don't exist
-        print("Creating database tables if they don't exist...")
-        Base.metadata.create_all(bind=engine)
-        print("Tables created.")
+        # Create tables if they don't exist (by bringing the schema up to the latest migration)
+        print("Migrating database schema...")
+        migrate(engine)
+        print("Schema up to date.")
 
         # Check if pets already exist to avoid duplicates on multiple runs
         if db.query(Pet).count() > 0:
@@ -161,7 +150,7 @@ def seed_data():
             image_url = f"http://127.0.0.1:8000/static/images/pets/{image_filename}" if image_filename else None
 
             db_pet = Pet(
-                **pet_data.model_dump(),
+                **pet_data.model_columns(),
                 image_url=image_url # Assign the generated URL
             )
             db.add(db_pet)
@@ -179,5 +168,160 @@ def seed_data():
     finally:
         db.close()
 
+# --- Synthetic data for capacity testing ---
+_NAMES = ["Bella", "Max", "Luna", "Charlie", "Lucy", "Cooper", "Daisy", "Milo", "Nala", "Rocky",
+          "Coco", "Leo", "Zoe", "Toby", "Ruby", "Oscar", "Willow", "Bear", "Pepper", "Ziggy"]
+_BREEDS = {
+    "dog": ["Labrador Retriever", "Beagle", "German Shepherd", "Golden Retriever", "Poodle", "Mixed"],
+    "cat": ["Siamese", "Tabby", "Ragdoll", "Maine Coon", "Persian", "Domestic Shorthair"],
+    "other": ["Domestic Rabbit", "Budgerigar", "Guinea Pig", "Goldfish", "Blue-fronted Amazon"],
+}
+_TEMPERAMENTS = ["Playful", "Calm", "Affectionate", "Energetic", "Gentle", "Curious", "Independent",
+                 "Loyal", "Friendly", "Shy", "Social", "Vocal"]
+_DESCRIPTIONS = ["Loves long walks and belly rubs.", "Great with kids and other pets.",
+                 "Enjoys quiet afternoons in the sun.", "Needs an experienced, patient home.",
+                 "House trained and very food motivated.", "Shy at first but warms up quickly."]
+_MEDICAL = ["None", "None", "None", "Needs daily medication", "Special diet", "Recovering from surgery"]
+
+
+def _next_id(db, model) -> int:
+    return (db.query(func.max(model.id)).scalar() or 0) + 1
+
+
+def _insert_batches(db, table, rows, batch_size: int) -> int:
+    """Insert an iterator of rows batch by batch, committing each batch."""
+    batch, count = [], 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            bulk_insert(db.connection(), table, batch)
+            db.commit()
+            count += len(batch)
+            batch = []
+    bulk_insert(db.connection(), table, batch)
+    db.commit()
+    return count + len(batch)
+
+
+def _reset_sequence(db, table_name: str):
+    # Rows are inserted with explicit ids; move the Postgres sequence past them.
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text(f"SELECT setval(pg_get_serial_sequence('{table_name}', 'id'), "
+                        f"(SELECT COALESCE(MAX(id), 1) FROM {table_name}))"))
+        db.commit()
+
+
+def seed_synthetic(pets: int, profiles: int, applications: int, batch_size: int = 10000,
+                   shelter_ratio: float = 0.05, seed: int = 42):
+    """
+    Generate and bulk insert synthetic profiles, shelters (owners), pets and applications.
+    Rows are produced lazily and written in batches (COPY on Postgres), so memory use is
+    flat regardless of the requested sizes. Can be run repeatedly; ids continue from the max.
+    """
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    migrate(engine)
+    db = next(get_db())
+    try:
+        run = int(time.time())
+        shelters = max(1, int(profiles * shelter_ratio))
+        adopters = max(1, profiles - shelters)
+        # The app compares pets.owner_id and applications.shelter_id with UserProfile.id, so
+        # shelter i owns its pets as profile `profile_start + i`. An Owner row with the same
+        # id keeps the pets.owner_id foreign key valid, hence one start for both tables.
+        profile_start = max(_next_id(db, UserProfile), _next_id(db, Owner))
+        pet_start, application_start = _next_id(db, Pet), _next_id(db, Application)
+
+        def profile_rows():
+            for i in range(profiles):
+                is_shelter = i < shelters
+                species = rng.choice(["Dog", "Cat", "all"])
+                yield {
+                    "id": profile_start + i,
+                    "user_id": f"synthetic-{run}-{i}",
+                    "email": f"synthetic-{run}-{i}@example.com",
+                    "full_name": f"{rng.choice(_NAMES)} {'Shelter' if is_shelter else 'Adopter'} {i}",
+                    "role": "shelter" if is_shelter else "adopter",
+                    "preferences": None if is_shelter else f"{rng.choice(_TEMPERAMENTS).lower()} {species.lower()}",
+                    "contact_phone": f"555-{i % 10000:04d}",
+                    "address": f"{i} Synthetic Street",
+                    "created_at": now,
+                    "updated_at": now,
+                }
+
+        def owner_rows():
+            for i in range(shelters):
+                yield {"id": profile_start + i, "name": f"Synthetic Shelter {i}",
+                       "email": f"shelter-{run}-{i}@example.com", "phone": f"555-{i % 10000:04d}"}
+
+        def pet_rows():
+            statuses = ["available"] * 7 + ["pending"] * 2 + ["adopted"]
+            for i in range(pets):
+                species = rng.choice(["dog", "cat", "other"])
+                yield {
+                    "id": pet_start + i,
+                    "name": rng.choice(_NAMES),
+                    "age": f"{rng.randint(1, 14)} years" if rng.random() > 0.2 else f"{rng.randint(2, 11)} months",
+                    "species": species,
+                    "breed": rng.choice(_BREEDS[species]),
+                    "description": rng.choice(_DESCRIPTIONS),
+                    "temperament": ", ".join(rng.sample(_TEMPERAMENTS, 3)),
+                    "medical_needs": rng.choice(_MEDICAL),
+                    "status": rng.choice(statuses),
+                    "gender": rng.choice(["male", "female", "unknown"]),
+                    "image_url": None,
+                    "owner_id": profile_start + i % shelters,
+                }
+
+        def application_rows():
+            for i in range(applications):
+                pet_offset = rng.randrange(pets)
+                adopter = shelters + rng.randrange(adopters)
+                yield {
+                    "id": application_start + i,
+                    "pet_id": pet_start + pet_offset,
+                    "user_id": f"synthetic-{run}-{adopter}",
+                    "shelter_id": profile_start + pet_offset % shelters,
+                    "full_name": f"Adopter {adopter}",
+                    "email": f"synthetic-{run}-{adopter}@example.com",
+                    "phone": "555-0100",
+                    "address": f"{adopter} Synthetic Street",
+                    "living_situation": "House with garden",
+                    "previous_pet_experience": None,
+                    "why_adopt": "Looking for a companion.",
+                    "home_description": None,
+                    "status": rng.choice(["pending", "pending", "approved", "rejected"]),
+                    "created_at": now - timedelta(minutes=rng.randrange(60 * 24 * 365)),
+                }
+
+        plan = [
+            (UserProfile, profile_rows(), profiles),
+            (Owner, owner_rows(), shelters if pets else 0),
+            (Pet, pet_rows(), pets),
+            (Application, application_rows(), applications if pets else 0),
+        ]
+        for model, rows, count in plan:
+            if not count:
+                continue
+            started = time.perf_counter()
+            inserted = _insert_batches(db, model.__table__, rows, batch_size)
+            _reset_sequence(db, model.__tablename__)
+            elapsed = time.perf_counter() - started
+            print(f"Inserted {inserted} {model.__tablename__} in {elapsed:.1f}s ({inserted / max(elapsed, 1e-9):,.0f} rows/s)")
+    finally:
+        db.close()
+
+
 if __name__ == "__main__":
-    seed_data()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Seed the PetPals database.")
+    parser.add_argument("--synthetic", action="store_true", help="generate synthetic data for capacity testing")
+    parser.add_argument("--pets", type=int, default=100000)
+    parser.add_argument("--profiles", type=int, default=10000)
+    parser.add_argument("--applications", type=int, default=50000)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    if args.synthetic:
+        seed_synthetic(args.pets, args.profiles, args.applications, batch_size=args.batch_size, seed=args.seed)
+    else:
+        seed_data()
\ No newline at end of file
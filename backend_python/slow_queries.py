@@ -0,0 +1,228 @@
+# backend_python/slow_queries.py
+# Opt-in slow-query log (SLOW_QUERY_LOG=1).
+# Statements slower than SLOW_QUERY_THRESHOLD_MS are recorded with their normalized SQL, the
+# shape (not the values) of their bind parameters and their duration. A sampled fraction of
+# slow SELECTs is re-run under EXPLAIN on a background thread and the plan is stored with the
+# entry, with sequential scans called out, so missing indexes show up as they happen.
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+
+from .metrics import normalize_sql
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_LOG = os.getenv("SLOW_QUERY_LOG", "0") == "1"
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "100"))
+# Fraction of slow SELECTs re-run under EXPLAIN (0 disables plans, 1 explains every one).
+SLOW_QUERY_EXPLAIN_SAMPLE_RATE = float(os.getenv("SLOW_QUERY_EXPLAIN_SAMPLE_RATE", "0.1"))
+# EXPLAIN ANALYZE executes the query a second time; set to 0 to only collect the estimated plan.
+# Locking SELECTs (FOR UPDATE/SHARE) only ever get the estimated plan: re-running one would take
+# row locks on another connection and could wait behind the transaction that issued it. So do
+# SELECTs calling functions with side effects (nextval, pg_advisory_lock, pg_notify, ...), and
+# SELECTs without a FROM (a bare function call: nothing to plan) are not explained at all.
+SLOW_QUERY_EXPLAIN_ANALYZE = os.getenv("SLOW_QUERY_EXPLAIN_ANALYZE", "1") == "1"
+SLOW_QUERY_MAX_ENTRIES = int(os.getenv("SLOW_QUERY_MAX_ENTRIES", "500"))  # recent entries kept in memory
+SLOW_QUERY_MAX_SHAPES = int(os.getenv("SLOW_QUERY_MAX_SHAPES", "200"))    # distinct normalized statements
+
+# Marks our own EXPLAIN connections so they are not timed (and explained) in turn.
+_SKIP_OPTION = "petpals_slow_query_skip"
+
+_LOCKING_CLAUSE = re.compile(r"\bFOR\s+(NO\s+KEY\s+UPDATE|UPDATE|KEY\s+SHARE|SHARE)\b", re.IGNORECASE)
+
+
+_SIDE_EFFECT_CALL = re.compile(
+    r"\b(nextval|setval|pg_(try_)?advisory\w*|pg_notify|pg_sleep\w*|pg_terminate_backend|pg_cancel_backend"
+    r"|lo_\w+|dblink\w*)\s*\(",
+    re.IGNORECASE,
+)
+_FROM_CLAUSE = re.compile(r"\bFROM\b", re.IGNORECASE)
+
+
+def takes_row_locks(statement: str) -> bool:
+    return _LOCKING_CLAUSE.search(statement) is not None
+
+
+def has_side_effects(statement: str) -> bool:
+    """Row locks, or a call to a function that changes state (running it twice is not harmless)."""
+    return takes_row_locks(statement) or _SIDE_EFFECT_CALL.search(statement) is not None
+
+
+def is_explainable(statement: str) -> bool:
+    """A SELECT that reads from a table; `SELECT pg_notify(...)` and the like have no plan worth keeping."""
+    return statement.lstrip()[:6].upper() == "SELECT" and _FROM_CLAUSE.search(statement) is not None
+
+
+def postgres_explain_options(statement: str) -> str:
+    if SLOW_QUERY_EXPLAIN_ANALYZE and not has_side_effects(statement):
+        return "ANALYZE, BUFFERS, FORMAT JSON"
+    return "FORMAT JSON"  # estimated plan only: the statement is not executed
+
+
+def bind_shape(parameters: Any, executemany: bool) -> Any:
+    """Parameter names and Python types only: values may be personal data."""
+    if executemany:
+        rows = list(parameters or [])
+        return {"executemany": len(rows), "row": bind_shape(rows[0], False) if rows else None}
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__ if parameters is not None else None
+
+
+def _sequential_scans(dialect: str, plan: Any) -> List[str]:
+    """Tables read by a full scan, per the plan (these are the candidates for an index)."""
+    scans = []
+    if dialect == "postgresql":
+        def walk(node):
+            if node.get("Node Type") == "Seq Scan":
+                scans.append(node.get("Relation Name"))
+            for child in node.get("Plans", []):
+                walk(child)
+        for entry in plan:
+            walk(entry["Plan"])
+    else:
+        # SQLite EXPLAIN QUERY PLAN rows: "SCAN pets" (full scan) vs "SEARCH pets USING INDEX ..."
+        for detail in plan:
+            words = detail.split()
+            if len(words) >= 2 and words[0] == "SCAN" and "USING" not in words:
+                scans.append(words[1])
+    return scans
+
+
+class SlowQueryLog:
+    """
+    Recent slow statements plus per-shape aggregates (count, total and max time, latest plan).
+    Bounded in both dimensions, so it is safe to leave enabled.
+    """
+
+    def __init__(self, max_entries: int = SLOW_QUERY_MAX_ENTRIES, max_shapes: int = SLOW_QUERY_MAX_SHAPES):
+        self._lock = threading.Lock()
+        self._recent: deque = deque(maxlen=max_entries)
+        self._shapes: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._max_shapes = max_shapes
+
+    def record(self, sql: str, params: Any, duration_ms: float) -> Dict[str, Any]:
+        entry = {"at": datetime.utcnow().isoformat() + "Z", "sql": sql, "params": params,
+                 "duration_ms": round(duration_ms, 3), "plan": None, "seq_scans": None}
+        with self._lock:
+            self._recent.append(entry)
+            shape = self._shapes.get(sql)
+            if shape is None:
+                shape = self._shapes[sql] = {"sql": sql, "count": 0, "total_ms": 0.0, "max_ms": 0.0,
+                                             "plan": None, "seq_scans": None}
+                if len(self._shapes) > self._max_shapes:
+                    self._shapes.popitem(last=False)
+            else:
+                self._shapes.move_to_end(sql)
+            shape["count"] += 1
+            shape["total_ms"] = round(shape["total_ms"] + duration_ms, 3)
+            shape["max_ms"] = max(shape["max_ms"], entry["duration_ms"])
+        return entry
+
+    def attach_plan(self, entry: Dict[str, Any], plan: Any, seq_scans: List[str]) -> None:
+        with self._lock:
+            entry["plan"], entry["seq_scans"] = plan, seq_scans
+            shape = self._shapes.get(entry["sql"])
+            if shape is not None:
+                shape["plan"], shape["seq_scans"] = plan, seq_scans
+
+    def snapshot(self, limit: int = 50) -> Dict[str, Any]:
+        with self._lock:
+            shapes = sorted(self._shapes.values(), key=lambda s: s["total_ms"], reverse=True)[:limit]
+            recent = list(self._recent)[-limit:]
+        return {
+            "threshold_ms": SLOW_QUERY_THRESHOLD_MS,
+            "explain_sample_rate": SLOW_QUERY_EXPLAIN_SAMPLE_RATE,
+            "by_statement": [dict(s) for s in shapes],
+            "recent": [dict(e) for e in reversed(recent)],
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._recent.clear()
+            self._shapes.clear()
+
+
+slow_query_log = SlowQueryLog()
+
+# One background thread runs the EXPLAINs, off the request path.
+_explain_executor: Optional[ThreadPoolExecutor] = None
+_explain_executor_lock = threading.Lock()
+
+
+def _get_explain_executor() -> ThreadPoolExecutor:
+    global _explain_executor
+    with _explain_executor_lock:
+        if _explain_executor is None:
+            _explain_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-explain")
+        return _explain_executor
+
+
+def explain(engine, statement: str, parameters: Any):
+    """Run EXPLAIN for a SELECT on its own connection and roll back. Returns (plan, sequential scans)."""
+    dialect = engine.dialect.name
+    with engine.connect().execution_options(**{_SKIP_OPTION: True}) as conn:
+        try:
+            if dialect == "postgresql":
+                options = postgres_explain_options(statement)
+                plan = conn.exec_driver_sql(f"EXPLAIN ({options}) {statement}", parameters).scalar()
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+            elif dialect == "sqlite":
+                plan = [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+            else:
+                plan = [list(row) for row in conn.exec_driver_sql(f"EXPLAIN {statement}", parameters)]
+        finally:
+            conn.rollback()
+    return plan, _sequential_scans(dialect, plan)
+
+
+def _explain_and_attach(engine, entry, statement, parameters):
+    try:
+        plan, seq_scans = explain(engine, statement, parameters)
+    except Exception as exc:
+        logger.warning("EXPLAIN failed for slow query %s: %s", entry["sql"][:200], exc)
+        return
+    slow_query_log.attach_plan(entry, plan, seq_scans)
+    if seq_scans:
+        logger.warning("Slow query does a sequential scan of %s: %s", ", ".join(seq_scans), entry["sql"][:200])
+
+
+def install_slow_query_log(engine, threshold_ms: float = None, sample_rate: float = None) -> None:
+    """Time every statement on this engine and record the ones over the threshold."""
+    threshold = (SLOW_QUERY_THRESHOLD_MS if threshold_ms is None else threshold_ms) / 1000.0
+    rate = SLOW_QUERY_EXPLAIN_SAMPLE_RATE if sample_rate is None else sample_rate
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("petpals_slow_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["petpals_slow_query_start"].pop()
+        if elapsed < threshold or conn.get_execution_options().get(_SKIP_OPTION):
+            return
+        entry = slow_query_log.record(normalize_sql(statement), bind_shape(parameters, executemany), elapsed * 1000)
+        logger.warning("Slow query (%.1f ms): %s params=%s", entry["duration_ms"], entry["sql"][:500], entry["params"])
+        if is_explainable(statement) and not executemany and rate > 0 and random.random() < rate:
+            _get_explain_executor().submit(_explain_and_attach, engine, entry, statement, parameters)
+
+
+def shutdown_slow_query_log() -> None:
+    global _explain_executor
+    with _explain_executor_lock:
+        if _explain_executor is not None:
+            _explain_executor.shutdown(wait=False)
+            _explain_executor = None
@@ -0,0 +1,115 @@
+# backend_python/static_files.py
+import hashlib
+import os
+import re
+import stat
+from mimetypes import guess_type
+from typing import Dict, Optional, Tuple
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from .cache import LRUCache
+
+# Content-addressed files (uploads.save_upload / images derivatives) never change under the
+# same name, so browsers and proxies may keep them for a year without revalidating.
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+DEFAULT_CACHE_CONTROL = os.getenv("STATIC_DEFAULT_CACHE_CONTROL", "public, no-cache")
+STATIC_PRECOMPRESSED = os.getenv("STATIC_PRECOMPRESSED", "0") == "1"
+
+# <sha256>.<ext> or <sha256>-<variant>.<ext>
+_CONTENT_ADDRESSED_NAME = re.compile(r"^([0-9a-f]{64})(?:-(\w+))?\.\w+$")
+
+# Precompressed siblings looked up next to a file, in order of preference.
+_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+class _FileInfo:
+    __slots__ = ("etag", "variants")
+
+    def __init__(self, etag: str, variants: Dict[str, Tuple[str, os.stat_result]]):
+        self.etag = etag
+        self.variants = variants  # encoding -> (path, stat) of a precompressed sibling
+
+
+class CachedStaticFiles(StaticFiles):
+    """
+    StaticFiles with cache-friendly headers:
+
+    - content-addressed names get a far-future `immutable` Cache-Control;
+    - strong ETags from the file content, computed once per (path, mtime, size) and remembered;
+    - Range requests (handled by FileResponse, which honours If-Range against our ETag);
+    - optionally, `.br`/`.gz` siblings served to clients that accept them.
+    """
+
+    def __init__(self, *args, precompressed: Optional[bool] = None, etag_cache_size: int = 4096, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.precompressed = STATIC_PRECOMPRESSED if precompressed is None else precompressed
+        self._info = LRUCache(max_entries=etag_cache_size, ttl_seconds=float("inf"))
+
+    def lookup_path(self, path: str):
+        # Runs in a worker thread (see StaticFiles.get_response), so this is where we do the
+        # blocking work of hashing the file and probing for precompressed siblings.
+        full_path, stat_result = super().lookup_path(path)
+        if stat_result is not None and stat.S_ISREG(stat_result.st_mode):
+            key = self._info_key(full_path, stat_result)
+            if self._info.get(key) is None:
+                self._info.set(key, self._build_info(full_path, stat_result))
+        return full_path, stat_result
+
+    @staticmethod
+    def _info_key(full_path, stat_result: os.stat_result) -> tuple:
+        return (str(full_path), stat_result.st_mtime_ns, stat_result.st_size)
+
+    def _build_info(self, full_path, stat_result: os.stat_result) -> _FileInfo:
+        match = _CONTENT_ADDRESSED_NAME.match(os.path.basename(full_path))
+        if match:
+            # The name already is the content hash; no need to read the file.
+            sha256, variant = match.groups()
+            etag = f'"{sha256[:32]}-{variant}"' if variant else f'"{sha256[:32]}"'
+        else:
+            digest = hashlib.blake2b(digest_size=16)
+            with open(full_path, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(chunk)
+            etag = f'"{digest.hexdigest()}"'
+
+        variants = {}
+        if self.precompressed:
+            for encoding, suffix in _ENCODINGS:
+                try:
+                    variant_stat = os.stat(f"{full_path}{suffix}")
+                except OSError:
+                    continue
+                variants[encoding] = (f"{full_path}{suffix}", variant_stat)
+        return _FileInfo(etag, variants)
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope, status_code: int = 200) -> Response:
+        request_headers = Headers(scope=scope)
+        info = self._info.get(self._info_key(full_path, stat_result))
+        name = os.path.basename(full_path)
+        headers = {
+            "cache-control": IMMUTABLE_CACHE_CONTROL if _CONTENT_ADDRESSED_NAME.match(name) else DEFAULT_CACHE_CONTROL,
+        }
+        path, serve_stat, media_type = full_path, stat_result, guess_type(name)[0] or "text/plain"
+
+        if info is not None:
+            headers["etag"] = info.etag
+            if info.variants:
+                headers["vary"] = "Accept-Encoding"
+                accepted = {t.split(";")[0].strip() for t in request_headers.get("accept-encoding", "").split(",")}
+                for encoding, _ in _ENCODINGS:
+                    if encoding in info.variants and encoding in accepted:
+                        path, serve_stat = info.variants[encoding]
+                        headers["content-encoding"] = encoding
+                        # Each representation needs its own strong ETag.
+                        headers["etag"] = f'{info.etag[:-1]}-{encoding}"'
+                        break
+
+        response = FileResponse(path, status_code=status_code, stat_result=serve_stat,
+                                headers=headers, media_type=media_type)
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
@@ -0,0 +1,98 @@
+# backend_python/tests/conftest.py
+# Shared fixtures: the app against a throwaway SQLite database in a temporary working directory
+# (uploads land in its static/), with the background job workers and the invalidation bus off.
+import os
+import sys
+import tempfile
+
+import pytest
+
+_WORKDIR = tempfile.mkdtemp(prefix="petpals-tests-")
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{os.path.join(_WORKDIR, 'test.db')}",
+    JOB_ENABLED="0",
+    INVALIDATION_BUS="off",
+)
+os.chdir(_WORKDIR)
+os.makedirs("static/images/pets", exist_ok=True)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+
+@pytest.fixture(scope="session")
+def workdir():
+    return _WORKDIR
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+    from backend_python import main
+
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+@pytest.fixture(scope="session")
+def make_profile(client):
+    """Create a UserProfile and return its Authorization header (the dev token is the user id)."""
+    from backend_python.database import SessionLocal
+    from backend_python.models import UserProfile
+
+    def make(user_id, role, **fields):
+        with SessionLocal() as db:
+            db.add(UserProfile(user_id=user_id, email=f"{user_id}@example.com", full_name=user_id, role=role,
+                               **fields))
+            db.commit()
+        return {"Authorization": user_id}
+
+    return make
+
+
+@pytest.fixture(scope="session")
+def shelter(make_profile):
+    """Authorization header of the shelter account that make_pet creates pets for."""
+    return make_profile("shelter-uid", "shelter")
+
+
+@pytest.fixture(scope="session")
+def adopter(make_profile):
+    return make_profile("adopter-uid", "adopter")
+
+
+@pytest.fixture
+def make_pet(client, shelter):
+    """
+    Insert a pet owned by the test shelter, or by the shelter profile `owner` (keeping the
+    in-process views in sync); returns its id.
+    """
+    from backend_python import main
+    from backend_python.database import SessionLocal
+    from backend_python.models import Pet, PetGender, PetSpecies, PetStatus, UserProfile
+
+    def make(owner="shelter-uid", **fields):
+        with SessionLocal() as db:
+            owner_id = db.query(UserProfile.id).filter(UserProfile.user_id == owner).scalar()
+            values = dict(name="Rex", age="2", species=PetSpecies.dog, breed="Mixed", gender=PetGender.male,
+                          status=PetStatus.available)
+            values.update(fields)
+            pet = Pet(owner_id=owner_id, **values)
+            db.add(pet)
+            db.commit()
+            db.refresh(pet)
+            main.sync_pet_views(None, pet)  # as the API handlers do after a committed write
+            return pet.id
+
+    return make
+
+
+@pytest.fixture
+def make_application(client):
+    """Submit an application for `pet_id` as the adopter behind `headers`; returns its id."""
+    def make(pet_id, headers):
+        response = client.post("/api/applications", headers=headers, json=dict(
+            pet_id=pet_id, user_id="ignored", shelter_id=0, full_name="Applicant", email="applicant@example.com",
+            phone="555-0100", address="1 Test Street", why_adopt="Looking for a companion."))
+        assert response.status_code == 201, response.text
+        return response.json()["id"]
+
+    return make
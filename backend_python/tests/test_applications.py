@@ -0,0 +1,70 @@
+# backend_python/tests/test_applications.py
+import itertools
+
+import pytest
+
+_run = itertools.count()
+
+
+@pytest.fixture
+def pet_with_applications(make_profile, make_pet, make_application):
+    """A pet of a fresh shelter with three pending applications; returns (shelter headers, pet id, ids)."""
+    n = next(_run)
+    shelter = make_profile(f"apps-shelter-{n}", "shelter")
+    pet_id = make_pet(owner=shelter["Authorization"])
+    ids = [make_application(pet_id, make_profile(f"apps-adopter-{n}-{i}", "adopter")) for i in range(3)]
+    return shelter, pet_id, ids
+
+
+def _batch(client, headers, **transitions):
+    return client.post("/api/applications/status", headers=headers,
+                       json={"transitions": [{"id": int(i), "status": s} for i, s in transitions.items()]})
+
+
+def _statuses(client, headers, ids):
+    by_id = {a["id"]: a["status"] for a in client.get("/api/applications/shelter", headers=headers).json()}
+    return [by_id[i] for i in ids]
+
+
+def test_approving_rejects_the_other_open_applications_and_adopts_the_pet(client, pet_with_applications):
+    shelter, pet_id, (a, b, c) = pet_with_applications
+    response = _batch(client, shelter, **{str(a): "approved", str(b): "rejected"})
+    assert response.status_code == 200, response.text
+    assert response.json()["auto_rejected"] == [c]
+    assert response.json()["pet_status"] == {str(pet_id): "adopted"}
+    assert _statuses(client, shelter, [a, b, c]) == ["approved", "rejected", "rejected"]
+
+
+def test_two_approvals_for_one_pet_are_refused(client, pet_with_applications):
+    shelter, _, (a, b, c) = pet_with_applications
+    response = _batch(client, shelter, **{str(a): "approved", str(b): "approved"})
+    assert response.status_code == 409
+    assert sorted(e["id"] for e in response.json()["detail"]) == [a, b]
+    assert _statuses(client, shelter, [a, b, c]) == ["pending"] * 3
+
+
+@pytest.mark.parametrize("other", ["under_review", "pending"])
+def test_an_approval_cannot_leave_another_application_for_the_pet_open(client, pet_with_applications, other):
+    shelter, _, (a, b, c) = pet_with_applications
+    response = _batch(client, shelter, **{str(a): "approved", str(b): other})
+    assert response.status_code == 409
+    assert [e["id"] for e in response.json()["detail"]] == [b]
+    assert _statuses(client, shelter, [a, b, c]) == ["pending"] * 3
+
+
+def test_final_statuses_cannot_be_reopened(client, pet_with_applications):
+    shelter, _, (a, b, _) = pet_with_applications
+    assert _batch(client, shelter, **{str(a): "rejected"}).status_code == 200
+    response = _batch(client, shelter, **{str(a): "pending", str(b): "under_review"})
+    assert response.status_code == 409
+    assert response.json()["detail"] == [{"id": a, "error": "Cannot change status from rejected to pending."}]
+    assert _statuses(client, shelter, [a, b]) == ["rejected", "pending"]  # all or nothing
+
+
+def test_a_shelter_cannot_act_on_another_shelters_applications(client, make_profile, pet_with_applications):
+    shelter, _, (a, _, _) = pet_with_applications
+    intruder = make_profile(f"apps-intruder-{next(_run)}", "shelter")
+    response = _batch(client, intruder, **{str(a): "approved"})
+    assert response.status_code == 403
+    assert client.put(f"/api/applications/{a}/status", json={"status": "rejected"}, headers=intruder).status_code == 403
+    assert _statuses(client, shelter, [a]) == ["pending"]
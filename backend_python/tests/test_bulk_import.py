@@ -0,0 +1,66 @@
+# backend_python/tests/test_bulk_import.py
+import json
+
+import pytest
+
+ROW = dict(name="Imported", age="1", species="Cat", breed="Tabby", gender="Female")
+UPLOADED = "/static/images/pets/" + "ab" * 32 + ".jpg"
+
+
+def _import(client, shelter, rows):
+    body = "\n".join(json.dumps(row) for row in rows).encode("utf-8")
+    response = client.post("/api/pets/import", files={"file": ("pets.ndjson", body, "application/x-ndjson")},
+                           headers=shelter)
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.mark.parametrize("image_url", [
+    "/static/../victim.txt",
+    "/static/images/pets/../../../victim.txt",
+    "/etc/passwd",
+    "static/images/pets/" + "ab" * 32 + ".jpg",
+    "/static/images/pets/" + "ab" * 32 + ".jpg/../../x",
+    "https://example.com/pet.jpg",
+])
+def test_import_rejects_image_urls_that_are_not_uploads(client, shelter, image_url):
+    result = _import(client, shelter, [dict(ROW, image_url=image_url)])
+    assert (result["inserted"], result["failed"]) == (0, 1)
+    assert result["errors"][0]["errors"][0].startswith("image_url")
+
+
+def test_import_accepts_uploaded_image_urls_and_no_image(client, shelter):
+    result = _import(client, shelter, [dict(ROW, image_url=UPLOADED), dict(ROW), dict(ROW, image_url="")])
+    assert (result["inserted"], result["failed"]) == (3, 0)
+
+
+def test_ndjson_rows_that_are_not_utf8_are_row_errors(client, shelter):
+    body = (json.dumps(ROW) + "\n").encode() + b'{"name": "Caf\xe9"}\n' + (json.dumps(ROW) + "\n").encode()
+    response = client.post("/api/pets/import", files={"file": ("pets.ndjson", body, "application/x-ndjson")},
+                           headers=shelter)
+    assert response.status_code == 200
+    result = response.json()
+    assert (result["inserted"], result["failed"]) == (2, 1)
+    assert result["errors"] == [{"row": 2, "errors": ["Row is not valid UTF-8."]}]
+
+
+def test_a_csv_that_is_not_utf8_stops_the_import_with_a_400(client, shelter, monkeypatch):
+    from backend_python import bulk_import
+
+    monkeypatch.setattr(bulk_import, "IMPORT_BATCH_SIZE", 2)  # one batch is committed before the bad row
+    body = b"\xef\xbb\xbfname,age,species,breed,gender\n" + b"Rex,1,Dog,Mixed,Male\n" * 3 + b"Ren\xe9,1,Dog,x,Male\n"
+    before = len(client.get("/api/pets").json())
+    response = client.post("/api/pets/import", files={"file": ("pets.csv", body, "text/csv")}, headers=shelter)
+    assert response.status_code == 400
+    assert response.json()["detail"] == \
+        "Import stopped at row 4: the file is not valid UTF-8. 2 rows before it were imported."
+    assert len(client.get("/api/pets").json()) == before + 2  # the committed batch; the cached list was reset
+
+
+def test_malformed_csv_stops_the_import_with_a_400(client, shelter):
+    import csv
+
+    body = b"name,age,species,breed,gender\n" + b"Rex,1,Dog," + b"x" * (csv.field_size_limit() + 1) + b",Male\n"
+    response = client.post("/api/pets/import", files={"file": ("pets.csv", body, "text/csv")}, headers=shelter)
+    assert response.status_code == 400
+    assert "malformed CSV" in response.json()["detail"]
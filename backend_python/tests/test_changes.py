@@ -0,0 +1,104 @@
+# backend_python/tests/test_changes.py
+import asyncio
+
+from backend_python.changes import PetChangeFeed
+
+
+def _ids(payloads):
+    return [line[4:] for p in payloads for line in p.decode().splitlines() if line.startswith("id: ")]
+
+
+def _events(payloads):
+    return [line[7:] for p in payloads for line in p.decode().splitlines() if line.startswith("event: ")]
+
+
+def _backlog(feed, last_event_id, owner_id=None):
+    async def subscribe():
+        subscriber, backlog = feed.subscribe(last_event_id, owner_id)
+        feed.unsubscribe(subscriber)
+        return backlog
+    return asyncio.run(subscribe())
+
+
+def test_resume_replays_only_what_was_missed():
+    feed = PetChangeFeed()
+    feed.publish("create", 1, owner_ids={7})
+    seen = _ids([feed._history[-1].payload])[0]  # what the client got last
+    feed.publish("update", 1, owner_ids={7})
+    feed.publish("delete", 2, owner_ids={8})
+    backlog = _backlog(feed, seen)
+    assert _events(backlog) == ["pet", "pet"]
+    assert _ids(backlog) == [f"{feed.epoch}:2", f"{feed.epoch}:3"]
+    assert _ids(_backlog(feed, seen, owner_id=8)) == [f"{feed.epoch}:3"]
+
+
+def test_ids_from_another_worker_get_a_reset_even_when_the_seq_overlaps():
+    worker_a, worker_b = PetChangeFeed(), PetChangeFeed()
+    for pet_id in range(5):
+        worker_a.publish("update", pet_id)
+        worker_b.publish("update", pet_id)
+    seen_on_b = f"{worker_b.epoch}:2"  # seq 2 is also inside worker A's history window
+    backlog = _backlog(worker_a, seen_on_b)
+    assert _events(backlog) == ["reset"]
+    assert _ids(backlog) == [f"{worker_a.epoch}:5"]  # resuming from the reset works on A
+
+
+def test_unknown_ids_get_a_reset():
+    feed = PetChangeFeed(history=2)
+    for pet_id in range(5):
+        feed.publish("update", pet_id)
+    for last in ("1008", "garbage", f"{feed.epoch}:1", f"{feed.epoch}:99", f"{feed.epoch}:-1"):
+        assert _events(_backlog(feed, last)) == ["reset"], last
+    assert _backlog(feed, f"{feed.epoch}:5") == []  # up to date
+
+
+def test_slow_subscribers_are_dropped():
+    async def run():
+        feed = PetChangeFeed(queue_size=3)
+        subscriber, _ = feed.subscribe(None, None)
+        for pet_id in range(10):
+            feed.publish("update", pet_id)
+        await asyncio.sleep(0)  # let the fan-out callbacks run
+        return subscriber, feed
+
+    subscriber, feed = asyncio.run(run())
+    assert subscriber.dropped
+    assert subscriber.queue.get_nowait() is None  # end of stream; the client resumes by id
+
+
+def test_feed_streams_uncompressed_through_the_app_for_gzip_clients(client):
+    from backend_python import main
+
+    async def run():
+        scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+                 "scheme": "http", "path": "/api/pets/changes", "raw_path": b"/api/pets/changes",
+                 "query_string": b"", "root_path": "", "client": ("127.0.0.1", 1), "server": ("test", 80),
+                 "headers": [(b"host", b"test"), (b"accept-encoding", b"gzip, deflate, br")]}
+        disconnected = asyncio.Event()
+        start, bodies = {}, []
+
+        async def receive():
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                start.update((k.decode(), v.decode()) for k, v in message["headers"])
+            elif message["type"] == "http.response.body":
+                bodies.append(message["body"])
+                if b"event: pet" in message["body"]:
+                    disconnected.set()  # got a live event while the stream is still open
+
+        task = asyncio.ensure_future(main.app(scope, receive, send))
+        while main.pet_change_feed.stats()["subscribers"] == 0:
+            await asyncio.sleep(0.01)
+        main.pet_change_feed.publish("update", 123)
+        await asyncio.wait_for(disconnected.wait(), timeout=5)
+        await asyncio.wait_for(task, timeout=5)
+        return start, bodies
+
+    start, bodies = asyncio.run(run())
+    assert start["content-type"].startswith("text/event-stream")
+    assert "content-encoding" not in start
+    assert bodies[0].startswith(b"retry: ")
+    assert any(b'"id":123' in b for b in bodies)
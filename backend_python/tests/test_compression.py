@@ -0,0 +1,111 @@
+# backend_python/tests/test_compression.py
+# Drives the middleware at the ASGI level, so what each `send` carries (and when) is visible.
+import asyncio
+import gzip
+import zlib
+
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Route
+
+from backend_python.compression import CompressionMiddleware, accepts_gzip
+
+CHUNK = b'{"id": 1, "name": "Rex"}\n' * 10
+
+
+def _app(step: asyncio.Event = None):
+    async def stream(chunks_sent):
+        for _ in range(3):
+            yield CHUNK
+            chunks_sent.append(1)
+            if step is not None:
+                await step.wait()
+                step.clear()
+
+    async def ndjson(request):
+        return StreamingResponse(stream(request.state.__dict__.setdefault("sent", [])),
+                                 media_type="application/x-ndjson")
+
+    async def events(request):
+        return StreamingResponse(stream([]), media_type="text/event-stream")
+
+    async def big(request):
+        return Response(CHUNK * 10, media_type="application/json")
+
+    async def small(request):
+        return Response(b"{}", media_type="application/json")
+
+    routes = [Route("/ndjson", ndjson), Route("/events", events), Route("/big", big), Route("/small", small)]
+    return CompressionMiddleware(Starlette(routes=routes), minimum_size=100)
+
+
+async def _request(app, path, on_body=None, accept_encoding=b"gzip, br"):
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+             "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+             "headers": [(b"host", b"test"), (b"accept-encoding", accept_encoding)],
+             "client": ("127.0.0.1", 1), "server": ("test", 80)}
+    messages = []
+
+    async def receive():
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        messages.append(message)
+        if on_body is not None and message["type"] == "http.response.body":
+            on_body(message)
+
+    await app(scope, receive, send)
+    start = messages[0]
+    return dict((k.decode().lower(), v.decode()) for k, v in start["headers"]), messages[1:]
+
+
+def test_streamed_chunks_are_flushed_as_they_are_produced():
+    step = asyncio.Event()
+    decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    decoded_per_send = []
+
+    def on_body(message):
+        decoded_per_send.append(decoder.decompress(message["body"]))
+        step.set()  # let the generator produce its next chunk only after this one went out
+
+    headers, bodies = asyncio.run(_request(_app(step), "/ndjson", on_body))
+    assert headers["content-encoding"] == "gzip"
+    assert "content-length" not in headers
+    # Every chunk is decodable on arrival: nothing is held back until the end of the stream.
+    assert decoded_per_send[:3] == [CHUNK, CHUNK, CHUNK]
+    assert b"".join(decoded_per_send) + decoder.flush() == CHUNK * 3
+    assert bodies[-1]["more_body"] is False
+
+
+def test_event_streams_are_never_compressed():
+    headers, bodies = asyncio.run(_request(_app(), "/events"))
+    assert "content-encoding" not in headers
+    assert [m["body"] for m in bodies if m["body"]] == [CHUNK, CHUNK, CHUNK]
+
+
+def test_whole_bodies_are_compressed_above_the_threshold_only():
+    headers, bodies = asyncio.run(_request(_app(), "/big"))
+    assert headers["content-encoding"] == "gzip"
+    assert gzip.decompress(bodies[0]["body"]) == CHUNK * 10
+    assert headers["content-length"] == str(len(bodies[0]["body"]))
+    assert "accept-encoding" in headers["vary"].lower()
+
+    headers, bodies = asyncio.run(_request(_app(), "/small"))
+    assert "content-encoding" not in headers
+    assert bodies[0]["body"] == b"{}"
+
+
+@pytest.mark.parametrize("header, accepted", [
+    ("gzip", True), ("br, GZIP;q=0.5", True), ("*", True), ("br, *;q=0.1", True),
+    ("gzip;q=0", False), ("gzip; q=0.0, *", False), ("*;q=0", False), ("br, identity", False), ("", False),
+    ("gzip;q=nope", False),
+])
+def test_accept_encoding_q_values(header, accepted):
+    assert accepts_gzip(header) is accepted
+
+
+def test_a_refused_gzip_is_not_sent():
+    headers, bodies = asyncio.run(_request(_app(), "/big", accept_encoding=b"gzip;q=0, identity"))
+    assert "content-encoding" not in headers
+    assert bodies[0]["body"] == CHUNK * 10
@@ -0,0 +1,83 @@
+# backend_python/tests/test_dashboards.py
+import itertools
+import json
+
+import pytest
+from sqlalchemy import event
+
+from backend_python.pagination import NEXT_CURSOR_HEADER
+
+
+_run = itertools.count()
+
+
+@pytest.fixture
+def dashboard(make_profile):
+    """Fresh profiles for each test, so counts do not pile up across tests."""
+    n = next(_run)
+    return dict(shelter=make_profile(f"dash-shelter-{n}", "shelter"),
+                other_shelter=make_profile(f"dash-other-{n}", "shelter"),
+                first=make_profile(f"dash-first-{n}", "adopter"), second=make_profile(f"dash-second-{n}", "adopter"))
+
+
+@pytest.fixture
+def applications(dashboard, make_pet, make_application):
+    pets = [make_pet(owner=dashboard["shelter"]["Authorization"], name=name) for name in ("Ada", "Bo")]
+    ids = [make_application(pets[0], dashboard["first"]), make_application(pets[1], dashboard["first"]),
+           make_application(pets[0], dashboard["second"])]
+    return pets, ids
+
+
+def _statements(client, url, headers):
+    from backend_python.database import get_engine
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(get_engine(), "before_cursor_execute", listener)
+    try:
+        assert client.get(url, headers=headers).status_code == 200
+    finally:
+        event.remove(get_engine(), "before_cursor_execute", listener)
+    return statements
+
+
+def test_shelter_dashboard_pages_newest_first_with_pets(client, dashboard, applications):
+    pets, ids = applications
+    first_page = client.get("/api/applications/shelter?limit=2", headers=dashboard["shelter"])
+    assert [a["id"] for a in first_page.json()] == [ids[2], ids[1]]
+    assert [a["pet"]["id"] for a in first_page.json()] == [pets[0], pets[1]]
+    rest = client.get("/api/applications/shelter", params={"limit": 2, "before": first_page.headers[NEXT_CURSOR_HEADER]},
+                      headers=dashboard["shelter"])
+    assert [a["id"] for a in rest.json()] == [ids[0]]
+    assert NEXT_CURSOR_HEADER not in rest.headers
+
+    assert client.get("/api/applications/shelter", headers=dashboard["other_shelter"]).json() == []
+
+
+def test_counts_and_status_filter(client, dashboard, applications):
+    _, ids = applications
+    client.put(f"/api/applications/{ids[1]}/status", json={"status": "rejected"}, headers=dashboard["shelter"])
+
+    counts = client.get("/api/applications/shelter/counts", headers=dashboard["shelter"]).json()
+    assert counts["total"] == 3
+    assert counts["counts"] == {"pending": 2, "under_review": 0, "approved": 0, "rejected": 1}
+    mine = client.get("/api/applications/my/counts", headers=dashboard["first"]).json()
+    assert mine["counts"]["pending"] == 1 and mine["counts"]["rejected"] == 1
+
+    pending = client.get("/api/applications/my?status=pending", headers=dashboard["first"]).json()
+    assert [a["id"] for a in pending] == [ids[0]]
+
+
+def test_ndjson_export_streams_every_application(client, dashboard, applications):
+    _, ids = applications
+    response = client.get("/api/applications/shelter?format=ndjson", headers=dashboard["shelter"])
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["id"] for row in rows] == [ids[2], ids[1], ids[0]]
+    assert all(row["pet"] is not None for row in rows)
+
+
+def test_a_page_costs_the_same_number_of_queries_however_long_it_is(client, dashboard, applications):
+    url = "/api/applications/shelter?limit={}"
+    _statements(client, url.format(1), dashboard["shelter"])  # warm the profile cache
+    assert len(_statements(client, url.format(1), dashboard["shelter"])) == \
+        len(_statements(client, url.format(50), dashboard["shelter"]))
@@ -0,0 +1,26 @@
+# backend_python/tests/test_database.py
+import os
+
+from backend_python.database import InstrumentedQueuePool, create_db_engine, pool_stats
+
+
+def test_pool_stats_report_the_configured_overflow(workdir):
+    engine = create_db_engine(f"sqlite:///{os.path.join(workdir, 'pool.db')}", pool_size=2, max_overflow=7)
+    try:
+        assert isinstance(engine.pool, InstrumentedQueuePool)
+        stats = pool_stats(engine)
+        assert (stats["pool_size"], stats["max_overflow"]) == (2, 7)
+        assert engine.pool.recreate().max_overflow == 7  # e.g. after engine.dispose()
+    finally:
+        engine.dispose()
+
+
+def test_pool_settings_are_read_when_the_engine_is_built(workdir, monkeypatch):
+    monkeypatch.setenv("DB_POOL_SIZE", "3")
+    monkeypatch.setenv("DB_MAX_OVERFLOW", "4")
+    monkeypatch.setenv("DB_POOL_TIMEOUT", "1.5")
+    engine = create_db_engine(f"sqlite:///{os.path.join(workdir, 'settings.db')}")
+    try:
+        assert (engine.pool.size(), engine.pool.max_overflow, engine.pool.timeout()) == (3, 4, 1.5)
+    finally:
+        engine.dispose()
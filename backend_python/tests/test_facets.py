@@ -0,0 +1,89 @@
+# backend_python/tests/test_facets.py
+import itertools
+
+import pytest
+
+from backend_python.facets import PetFacetCounts
+
+_run = itertools.count()
+
+
+@pytest.fixture
+def fresh_shelter(make_profile):
+    """Headers and UserProfile id of a shelter with no pets yet."""
+    from backend_python.database import SessionLocal
+    from backend_python.models import UserProfile
+
+    headers = make_profile(f"facets-shelter-{next(_run)}", "shelter")
+    with SessionLocal() as db:
+        profile_id = db.query(UserProfile.id).filter(UserProfile.user_id == headers["Authorization"]).scalar()
+    return headers, profile_id
+
+
+def _facets(client, *owner_ids):
+    response = client.get("/api/pets/facets", params={"owner_id": list(owner_ids)} if owner_ids else None)
+    assert response.status_code == 200
+    return response.json()
+
+
+def _combination(facets, species, status, gender):
+    return next((c["count"] for c in facets["counts"]
+                 if (c["species"], c["status"], c["gender"]) == (species, status, gender)), 0)
+
+
+def test_writes_move_pets_between_buckets(client, make_pet, fresh_shelter):
+    headers, owner = fresh_shelter
+    before = _facets(client)
+
+    pet_id = make_pet(owner=headers["Authorization"])  # a Male Dog, available
+    created = _facets(client)
+    assert created["total"] == before["total"] + 1
+    assert _combination(created, "Dog", "available", "Male") == _combination(before, "Dog", "available", "Male") + 1
+    assert created["by_owner"][str(owner)] == {"total": 1, "by_status": {"available": 1}}
+
+    assert client.put(f"/api/pets/{pet_id}", data={"species": "Cat", "status": "pending"},
+                      headers=headers).status_code == 200
+    updated = _facets(client)
+    assert updated["total"] == created["total"]
+    assert _combination(updated, "Dog", "available", "Male") == _combination(before, "Dog", "available", "Male")
+    assert _combination(updated, "Cat", "pending", "Male") == _combination(before, "Cat", "pending", "Male") + 1
+    assert updated["by_owner"][str(owner)] == {"total": 1, "by_status": {"pending": 1}}
+
+    assert client.delete(f"/api/pets/{pet_id}", headers=headers).status_code in (200, 204)
+    deleted = _facets(client)
+    assert {k: v for k, v in deleted.items() if k != "by_owner"} == {k: v for k, v in before.items() if k != "by_owner"}
+    assert str(owner) not in deleted["by_owner"]
+
+
+def test_by_owner_can_be_limited_to_some_shelters(client, make_pet, fresh_shelter):
+    headers, owner = fresh_shelter
+    make_pet(owner=headers["Authorization"])
+    make_pet(owner=headers["Authorization"], status="adopted")
+    make_pet()  # another shelter's pet
+
+    everything = _facets(client)
+    mine = _facets(client, owner)
+    assert list(mine["by_owner"]) == [str(owner)]
+    assert mine["by_owner"][str(owner)] == {"total": 2, "by_status": {"adopted": 1, "available": 1}}
+    assert {k: v for k, v in mine.items() if k != "by_owner"} == {k: v for k, v in everything.items() if k != "by_owner"}
+    assert _facets(client, 10 ** 9)["by_owner"] == {}
+
+
+def test_a_reset_between_build_and_read_rebuilds_instead_of_failing(client, make_pet):
+    from backend_python.database import SessionLocal
+
+    make_pet()
+    facets = PetFacetCounts()
+    build = facets.ensure_built
+    builds = []
+
+    def build_then_reset(db):  # a bulk import resets the aggregate right after this request built it
+        build(db)
+        builds.append(1)
+        if len(builds) == 1:
+            facets.reset()
+
+    facets.ensure_built = build_then_reset
+    with SessionLocal() as db:
+        body = facets.response(db).body
+    assert len(builds) == 2 and b'"total"' in body
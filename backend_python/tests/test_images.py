@@ -0,0 +1,127 @@
+# backend_python/tests/test_images.py
+import io
+import os
+
+import pytest
+
+from backend_python.images import DERIVED_DIRECTORY, delete_image, stored_image_path
+from backend_python.uploads import UPLOAD_DIRECTORY
+
+SHA = "cd" * 32
+
+
+@pytest.fixture
+def victim(workdir):
+    path = os.path.join(workdir, "victim.txt")
+    with open(path, "w") as f:
+        f.write("keep me")
+    yield path
+    if os.path.exists(path):
+        os.remove(path)
+
+
+@pytest.mark.parametrize("url", [
+    "/static/../victim.txt",
+    "/static/images/pets/../../../victim.txt",
+    "/static/images/pets/" + SHA + ".jpg/../../../../victim.txt",
+    "/static/images/pets/" + SHA + ".jpg\n",
+    "static/images/pets/" + SHA + ".jpg",
+    "/static/images/pets/..",
+    "/static/images/pets/derived/" + SHA + "-thumb.jpg",
+    "https://example.com/static/images/pets/" + SHA + ".jpg",
+])
+def test_urls_that_are_not_uploads_have_no_path(url):
+    assert stored_image_path(url) is None
+
+
+def test_traversal_and_absolute_urls_delete_nothing(victim):
+    delete_image("/static/../victim.txt")
+    delete_image(victim)  # absolute: os.path.join would have discarded "static"
+    delete_image("/static/images/pets/../../victim.txt")
+    assert os.path.exists(victim)
+
+
+def test_symlinked_upload_pointing_outside_is_not_followed(victim):
+    link = os.path.join(UPLOAD_DIRECTORY, SHA + ".png")
+    os.symlink(victim, link)
+    try:
+        assert stored_image_path("/static/images/pets/" + SHA + ".png") is None
+        delete_image("/static/images/pets/" + SHA + ".png")
+        assert os.path.exists(victim)
+    finally:
+        os.remove(link)
+
+
+def test_uploaded_image_and_derivatives_are_deleted():
+    os.makedirs(DERIVED_DIRECTORY, exist_ok=True)
+    image = os.path.join(UPLOAD_DIRECTORY, SHA + ".jpg")
+    thumb = os.path.join(DERIVED_DIRECTORY, SHA + "-thumb.webp")
+    for path in (image, thumb):
+        open(path, "wb").close()
+    delete_image("/static/images/pets/" + SHA + ".jpg")
+    assert not os.path.exists(image) and not os.path.exists(thumb)
+
+
+def test_legacy_uuid_named_uploads_are_deleted_too():
+    legacy = os.path.join(UPLOAD_DIRECTORY, "0b6f3c1e-5d2a-4e8f-9a7b-2c4d6e8f0a1b.png")
+    open(legacy, "wb").close()
+    assert stored_image_path("/static/images/pets/" + os.path.basename(legacy)) == os.path.realpath(legacy)
+    delete_image("/static/images/pets/" + os.path.basename(legacy))
+    assert not os.path.exists(legacy)
+
+
+def test_deleting_a_pet_with_a_hostile_image_url_keeps_the_file(client, shelter, make_pet, victim):
+    from backend_python import main
+    from backend_python.database import SessionLocal
+
+    for url in ("/static/../victim.txt", victim):
+        pet_id = make_pet(image_url=url)  # e.g. a row stored before import URLs were validated
+        assert client.delete(f"/api/pets/{pet_id}", headers=shelter).status_code in (200, 204)
+        with SessionLocal() as db:
+            main.delete_unused_image(db, image_url=url)  # what the image.delete job runs
+        assert os.path.exists(victim)
+
+
+def test_deleting_a_pet_releases_its_upload(client, shelter):
+    from PIL import Image
+    from backend_python import main
+    from backend_python.database import SessionLocal
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (8, 8), (1, 2, 3)).save(buffer, "JPEG")
+    pet = client.post("/api/pets", data=dict(name="Pic", age="1", species="Dog", breed="x", gender="Male"),
+                      files={"image": ("pic.jpg", buffer.getvalue(), "image/jpeg")}, headers=shelter).json()
+    path = stored_image_path(pet["image_url"])
+    assert path is not None and os.path.exists(path)
+
+    client.delete(f"/api/pets/{pet['id']}", headers=shelter)
+    with SessionLocal() as db:
+        main.delete_unused_image(db, image_url=pet["image_url"])
+    assert not os.path.exists(path)
+
+
+def test_variants_are_advertised_once_the_derivatives_job_has_built_them(client, shelter):
+    from PIL import Image
+    from backend_python import main
+    from backend_python.database import SessionLocal
+    from backend_python.images import content_hash
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (1200, 600), (200, 100, 50)).save(buffer, "PNG")
+    pet = client.post("/api/pets", data=dict(name="Wide", age="1", species="Cat", breed="x", gender="Female"),
+                      files={"image": ("wide.png", buffer.getvalue(), "image/png")}, headers=shelter).json()
+    assert pet["image_variants"] is None  # not built yet: clients fall back to image_url
+    assert client.get(f"/api/pets/{pet['id']}").json()["image_variants"] is None
+
+    with SessionLocal() as db:  # what the image.derivatives job runs
+        main.build_image_derivatives(db, source_path=stored_image_path(pet["image_url"]),
+                                     sha256=content_hash(pet["image_url"]))
+
+    variants = client.get(f"/api/pets/{pet['id']}").json()["image_variants"]  # cached detail was refreshed
+    assert set(variants) == {"thumb", "thumb_webp", "card", "card_webp"}
+    listed = next(p for p in client.get("/api/pets").json() if p["id"] == pet["id"])
+    assert listed["image_variants"] == variants
+    for key, box in (("thumb", (160, 160)), ("card_webp", (480, 360))):
+        with Image.open(variants[key].lstrip("/")) as image:
+            assert image.size[0] <= box[0] and image.size[1] <= box[1]
+            assert image.size[0] == box[0] or image.size[1] == box[1]  # aspect ratio kept, fitted to the box
@@ -0,0 +1,51 @@
+# backend_python/tests/test_invalidation.py
+import threading
+
+import pytest
+
+from backend_python import invalidation
+from backend_python.invalidation import InvalidationBus, UnixSocketTransport, invalidation_handler, make_transport
+
+
+@pytest.fixture
+def buses(tmp_path, monkeypatch):
+    monkeypatch.setattr(invalidation, "INVALIDATION_SOCKET_DIR", str(tmp_path / "bus"))
+    started = []
+
+    def start():
+        bus = InvalidationBus(mode="socket")
+        bus.start()
+        started.append(bus)
+        return bus
+
+    yield start
+    for bus in started:
+        bus.stop()
+
+
+def test_sockets_are_the_only_transport(tmp_path, monkeypatch):
+    monkeypatch.setattr(invalidation, "INVALIDATION_SOCKET_DIR", str(tmp_path))
+    assert isinstance(make_transport("auto"), UnixSocketTransport)
+    assert isinstance(make_transport("socket"), UnixSocketTransport)
+    assert make_transport("postgres") is None  # no longer offered
+    assert make_transport("off") is None
+
+
+def test_other_workers_apply_a_published_change_and_the_publisher_does_not(buses):
+    received = {}
+    delivered = threading.Event()
+
+    @invalidation_handler("test.pet_changed")
+    def on_pet_changed(pet_id):
+        received.setdefault(threading.current_thread().name, []).append(pet_id)
+        delivered.set()
+
+    try:
+        writer, reader = buses(), buses()
+        assert writer.stats()["transport"] == "socket"
+        writer.publish("test.pet_changed", pet_id=42)
+        assert delivered.wait(timeout=5)
+        assert writer.sent == 1 and reader.received == 1 and writer.received == 0
+        assert received == {"petpals-invalidation": [42]}
+    finally:
+        invalidation._handlers.pop("test.pet_changed", None)
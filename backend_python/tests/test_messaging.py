@@ -0,0 +1,69 @@
+# backend_python/tests/test_messaging.py
+import asyncio
+
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+from backend_python.messaging import HubConnection
+
+
+@pytest.fixture(scope="module")
+def users(make_profile):
+    return {name: make_profile(f"ws-{name}", role)
+            for name, role in (("alice", "adopter"), ("bob", "shelter"), ("carol", "adopter"))}
+
+
+@pytest.mark.parametrize("url", ["/api/messages/ws", "/api/messages/ws?token=nobody"])
+def test_sockets_without_a_valid_token_are_refused(client, url):
+    with pytest.raises(WebSocketDisconnect) as refused:
+        with client.websocket_connect(url):
+            pass
+    assert refused.value.code == 1008
+
+
+def test_messages_fan_out_to_every_socket_of_the_receiver_and_sender_only(client, users):
+    with client.websocket_connect("/api/messages/ws?token=ws-alice") as alice_phone, \
+            client.websocket_connect("/api/messages/ws?token=ws-alice") as alice_laptop, \
+            client.websocket_connect("/api/messages/ws", headers=users["bob"]) as bob, \
+            client.websocket_connect("/api/messages/ws?token=ws-carol") as carol:
+        for socket in (alice_phone, alice_laptop, bob, carol):
+            assert socket.receive_json() == {"type": "unread", "count": 0}
+
+        response = client.post("/api/messages", json={"receiver_id": "ws-alice", "content": "Hi from the shelter"},
+                               headers=users["bob"])
+        assert response.status_code == 201
+        for socket in (alice_phone, alice_laptop):
+            event = socket.receive_json()
+            assert event["type"] == "message" and event["message"]["content"] == "Hi from the shelter"
+            assert socket.receive_json() == {"type": "unread", "count": 1}
+        assert bob.receive_json()["message"]["id"] == response.json()["id"]  # the sender's other tabs
+
+        carol.send_json({"type": "ping"})
+        assert carol.receive_json() == {"type": "pong"}  # nothing was pushed to carol before it
+
+        client.post("/api/messages/thread/ws-bob/read", headers=users["alice"])
+        assert alice_phone.receive_json() == {"type": "unread", "count": 0}
+
+
+def test_a_client_that_falls_behind_is_closed_instead_of_buffering_without_bound():
+    class Socket:
+        def __init__(self):
+            self.sent, self.closed = [], None
+
+        async def send_text(self, text):
+            self.sent.append(text)
+
+        async def close(self, code):
+            self.closed = code
+
+    async def run():
+        socket = Socket()
+        connection = HubConnection("slow", socket, queue_size=3)
+        for i in range(10):
+            connection.offer(f"event {i}")
+        await connection.pump()
+        return socket
+
+    socket = asyncio.run(run())
+    assert socket.sent == ["event 1", "event 2"]  # the oldest made room for the close marker; the rest never queued
+    assert socket.closed == 1013
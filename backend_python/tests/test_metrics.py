@@ -0,0 +1,72 @@
+# backend_python/tests/test_metrics.py
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from backend_python import metrics
+from backend_python.metrics import Histogram, MetricsMiddleware, instrument_engine, normalize_sql
+
+
+def _series(counter, *labels):
+    return counter._values.get(labels, 0)
+
+
+def test_normalize_sql_groups_statements_by_shape():
+    assert normalize_sql("SELECT * FROM pets WHERE id IN (?, ?, ?) AND name = 'Rex'\n  LIMIT 10") == \
+        "SELECT * FROM pets WHERE id IN (...) AND name = ? LIMIT ?"
+    assert normalize_sql("SELECT x FROM t WHERE a IN (%(a_1)s, %(a_2)s)") == normalize_sql("SELECT x FROM t WHERE a IN (:a)")
+
+
+def test_histogram_buckets_are_cumulative_on_exposition():
+    histogram = Histogram("test_seconds", "Test.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe("/x", value=value)
+    lines = histogram.expose()
+    assert 'test_seconds_bucket{route="/x",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{route="/x",le="1.0"} 3' in lines
+    assert 'test_seconds_bucket{route="/x",le="+Inf"} 4' in lines
+    assert 'test_seconds_count{route="/x"} 4' in lines
+
+
+def test_requests_are_labelled_by_route_template_not_raw_path(client, make_pet):
+    ids = [make_pet(), make_pet()]
+    before = _series(metrics.http_requests, "GET", "/api/pets/{pet_id}", "200")
+    for pet_id in ids:
+        client.get(f"/api/pets/{pet_id}")
+    client.get("/no/such/path/1")
+    client.get("/no/such/path/2")
+
+    assert _series(metrics.http_requests, "GET", "/api/pets/{pet_id}", "200") == before + 2
+    body = client.get("/metrics").text
+    assert not any(f'route="/api/pets/{pet_id}"' in body for pet_id in ids)
+    assert "/no/such/path" not in body  # unmatched paths share one series
+    assert 'petpals_http_requests_total{method="GET",route="unmatched",status="404"}' in body
+
+
+def test_queries_are_counted_per_request_and_repeats_flagged_as_n_plus_one():
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    app = FastAPI()
+
+    @app.get("/pets/{pet_id}/owners")
+    async def lazy_loads(pet_id: int):
+        with engine.connect() as conn:
+            for owner_id in range(metrics.METRICS_N_PLUS_ONE_THRESHOLD):
+                conn.execute(text("SELECT :id"), {"id": owner_id})
+        return {}
+
+    @app.get("/pets/{pet_id}")
+    async def one_query(pet_id: int):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        return {}
+
+    route = "/pets/{pet_id}/owners"
+    flagged = _series(metrics.n_plus_one, route)
+    with TestClient(MetricsMiddleware(app)) as test_client:
+        test_client.get("/pets/1/owners")
+        test_client.get("/pets/1")
+    assert _series(metrics.n_plus_one, route) == flagged + 1
+    assert _series(metrics.n_plus_one, "/pets/{pet_id}") == 0
+    *_, queries, requests = metrics.db_queries._series[(route,)]
+    assert (queries, requests) == (metrics.METRICS_N_PLUS_ONE_THRESHOLD, 1)
@@ -0,0 +1,47 @@
+# backend_python/tests/test_pagination.py
+import pytest
+
+from backend_python.pagination import MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+
+
+def test_list_without_limit_returns_every_pet(client, make_pet):
+    for _ in range(3):
+        make_pet()
+    expected = len(client.get("/api/pets?format=ndjson").text.splitlines())
+
+    response = client.get("/api/pets")
+    assert response.status_code == 200
+    assert len(response.json()) == expected
+    assert NEXT_CURSOR_HEADER not in response.headers
+
+
+def test_pages_follow_the_cursor(client, make_pet):
+    for _ in range(3):
+        make_pet()
+    every_id = [pet["id"] for pet in client.get("/api/pets").json()]
+
+    seen, after = [], None
+    while True:
+        response = client.get("/api/pets", params={"limit": 2, **({"after": after} if after else {})})
+        seen += [pet["id"] for pet in response.json()]
+        after = response.headers.get(NEXT_CURSOR_HEADER)
+        if after is None:
+            break
+        assert decode_cursor(after) == [seen[-1]]
+    assert seen == every_id
+
+
+def test_limit_above_max_is_rejected(client):
+    assert client.get(f"/api/pets?limit={MAX_PAGE_SIZE + 1}").status_code == 422
+
+
+@pytest.mark.parametrize("values", [["x"], [{}], [None], [True], [1.5], [1, 2], []])
+def test_cursors_carrying_anything_but_one_integer_id_are_a_400(client, values):
+    cursor = encode_cursor(*values)
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+    assert client.get("/api/pets", params={"limit": 5, "after": cursor}).status_code == 400
+
+
+def test_garbage_cursor_is_a_400(client):
+    assert client.get("/api/pets", params={"after": "%%%not-base64"}).status_code == 400
@@ -0,0 +1,57 @@
+# backend_python/tests/test_pet_cache.py
+import contextlib
+
+from backend_python.pet_cache import PetKey, PetResponseCache
+
+
+def _key(pet_id):
+    return PetKey(id=pet_id, species="Dog", status="available", gender="Male")
+
+
+def test_put_after_invalidation_is_not_cached():
+    cache = PetResponseCache()
+    generation = cache.generation()          # reader, before its query
+    cache.invalidate(_key(1))                # a write commits meanwhile
+    entry = cache.put_detail(1, b'{"id":1}', generation)
+    assert entry.body == b'{"id":1}'         # still served to that reader
+    assert cache.get(cache.detail_key(1)) is None
+
+    cache.put_detail(1, b'{"id":1}', cache.generation())
+    assert cache.get(cache.detail_key(1)) is not None
+
+
+def test_clear_also_bumps_the_generation():
+    cache = PetResponseCache()
+    generation = cache.generation()
+    cache.clear()
+    cache.put_list(cache.list_key(None, None, None, 20, None, None), b"[]", {}, None, None, generation)
+    assert cache.get(cache.list_key(None, None, None, 20, None, None)) is None
+
+
+def test_read_racing_a_write_does_not_cache_the_old_body(client, make_pet, monkeypatch):
+    from backend_python import main
+    from backend_python.database import SessionLocal
+    from backend_python.models import Pet
+    from backend_python.pet_cache import pet_key
+
+    pet_id = make_pet(name="Before")
+    real_timed = main.timed
+
+    @contextlib.contextmanager
+    def write_during_serialize(segment):
+        # Runs after the reader's query, before it fills the cache: commit a rename then.
+        if segment == "serialize":
+            monkeypatch.setattr(main, "timed", real_timed)
+            with SessionLocal() as db:
+                pet = db.get(Pet, pet_id)
+                old_key = pet_key(pet)
+                pet.name = "After"
+                db.commit()
+                db.refresh(pet)
+                main.sync_pet_views(old_key, pet)
+        with real_timed(segment):
+            yield
+
+    monkeypatch.setattr(main, "timed", write_during_serialize)
+    assert client.get(f"/api/pets/{pet_id}").json()["name"] == "Before"  # read before the write
+    assert client.get(f"/api/pets/{pet_id}").json()["name"] == "After"   # not the stale body from the cache
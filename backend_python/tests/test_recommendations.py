@@ -0,0 +1,70 @@
+# backend_python/tests/test_recommendations.py
+from types import SimpleNamespace
+
+import numpy as np
+
+from backend_python.models import PetGender, PetSpecies, PetStatus
+from backend_python.recommendations import FEATURE_INDEX, WEIGHTS, PetRecommender, age_bucket, preference_vector
+
+
+def _pet(pet_id, species=PetSpecies.dog, gender=PetGender.male, age="2 years", temperament=None,
+         medical_needs=None, status=PetStatus.available):
+    return SimpleNamespace(id=pet_id, species=species, gender=gender, age=age, temperament=temperament,
+                           medical_needs=medical_needs, status=status)
+
+
+def _recommender(*pets):
+    recommender = PetRecommender(initial_capacity=2)  # small, so adding pets exercises _grow
+    recommender._built = True
+    for pet in pets:
+        recommender.upsert(pet)
+    return recommender
+
+
+def test_age_buckets():
+    assert [age_bucket(a) for a in ("6 months", "2 years", "1.5 yr", "5 years", "10 years", "young")] == \
+        ["baby", "young", "young", "adult", "senior", None]
+
+
+def test_preferences_from_free_text_and_json():
+    weights = preference_vector("Calm female cats, no medical needs")
+    assert weights[FEATURE_INDEX["species:cat"]] == WEIGHTS["species"]
+    assert weights[FEATURE_INDEX["gender:female"]] == WEIGHTS["gender"]
+    assert weights[FEATURE_INDEX["temperament:calm"]] == WEIGHTS["temperament"]
+    assert weights[FEATURE_INDEX["medical_needs"]] == WEIGHTS["medical_needs"]
+    assert np.array_equal(preference_vector('{"species": "Cat", "gender": "Female", "temperament": ["calm"]}'),
+                          preference_vector("cat female calm"))
+
+
+def test_an_age_in_years_old_is_not_a_senior_preference():
+    weights = preference_vector("2 year old dog")
+    assert weights[FEATURE_INDEX["age:senior"]] == 0
+    assert weights[FEATURE_INDEX["species:dog"]] == WEIGHTS["species"]
+    assert preference_vector("an elderly dog")[FEATURE_INDEX["age:senior"]] == WEIGHTS["age"]
+
+
+def test_top_k_ranks_available_pets_and_follows_updates():
+    recommender = _recommender(
+        _pet(1),
+        _pet(2, species=PetSpecies.cat, gender=PetGender.female, temperament="Calm"),
+        _pet(3, species=PetSpecies.cat, temperament="calm", medical_needs="Daily insulin"),
+        _pet(4, species=PetSpecies.cat, gender=PetGender.female, temperament="calm", status=PetStatus.adopted),
+    )
+    preferences = preference_vector("calm female cat, no medical needs")
+    assert [pet_id for pet_id, _ in recommender.top_k(preferences, 10)] == [2, 3, 1]  # 4 is adopted
+    assert [pet_id for pet_id, _ in recommender.top_k(preferences, 1)] == [2]
+
+    recommender.remove(2)  # swap-with-last keeps the other rows addressable
+    recommender.upsert(_pet(4, species=PetSpecies.cat, gender=PetGender.female, temperament="calm"))
+    assert [pet_id for pet_id, _ in recommender.top_k(preferences, 10)] == [4, 3, 1]
+
+
+def test_recommendations_endpoint_uses_the_callers_preferences(client, make_profile, make_pet):
+    headers = make_profile("picky-adopter", "adopter", preferences="calm female cat, no medical needs")
+    best = make_pet(name="Miso", species=PetSpecies.cat, gender=PetGender.female, temperament="calm, gentle")
+    adopted = make_pet(name="Tofu", species=PetSpecies.cat, gender=PetGender.female, temperament="calm",
+                       status=PetStatus.adopted)
+
+    ids = [pet["id"] for pet in client.get("/api/recommendations", headers=headers).json()]
+    assert ids[0] == best
+    assert adopted not in ids
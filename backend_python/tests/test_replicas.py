@@ -0,0 +1,80 @@
+# backend_python/tests/test_replicas.py
+import os
+import time
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+
+from backend_python import replicas
+from backend_python.replicas import PIN_COOKIE, PIN_HEADER, ReadRoutingMiddleware, ReplicaSet, read_session
+
+
+@pytest.fixture
+def routed(client, workdir, monkeypatch):
+    """A small app behind ReadRoutingMiddleware with one SQLite "replica"; reads report where they ran."""
+    from backend_python.database import get_db
+    from backend_python.models import Owner
+
+    monkeypatch.setattr(replicas, "replica_set", ReplicaSet([f"sqlite:///{os.path.join(workdir, 'replica.db')}"]))
+    app = FastAPI()
+
+    @app.get("/read")
+    def read(db=Depends(read_session())):
+        return {"replica": db.info["replica"]}
+
+    @app.post("/write")
+    def write(db=Depends(get_db)):
+        db.add(Owner(name="Routed", email=f"routed-{time.time()}@example.com"))
+        db.commit()
+        return {}
+
+    @app.post("/bulk-update")
+    def bulk_update(db=Depends(get_db)):
+        db.execute(update(Owner).where(Owner.name == "Routed").values(phone="555"))
+        db.commit()
+        return {}
+
+    @app.post("/write-then-read")
+    def write_then_read(db=Depends(get_db)):
+        write(db)
+        sessions = read_session()()
+        try:
+            return read(next(sessions))
+        finally:
+            sessions.close()
+
+    return TestClient(ReadRoutingMiddleware(app, window=30))
+
+
+def test_reads_go_to_a_replica_until_the_client_writes(routed):
+    replica = replicas.replica_set.replicas[0].name
+    assert routed.get("/read").json() == {"replica": replica}
+    assert PIN_HEADER not in routed.get("/read").headers  # reads do not pin
+
+    response = routed.post("/write")
+    until = float(response.headers[PIN_HEADER])
+    assert until > time.time() + 20
+    assert routed.cookies[PIN_COOKIE] == response.headers[PIN_HEADER]
+    assert routed.get("/read").json() == {"replica": None}  # the cookie pins it to the primary
+
+    routed.cookies.clear()
+    assert routed.get("/read").json() == {"replica": replica}
+
+
+def test_an_echoed_pin_header_routes_to_the_primary_without_the_cookie(routed):
+    until = routed.post("/bulk-update").headers[PIN_HEADER]  # update() statements count as writes too
+    routed.cookies.clear()
+    assert routed.get("/read", headers={PIN_HEADER: until}).json() == {"replica": None}
+    assert routed.get("/read", headers={PIN_HEADER: str(time.time() - 1)}).json()["replica"] is not None
+    assert routed.get("/read", headers={PIN_HEADER: "soon"}).json()["replica"] is not None
+
+
+def test_reads_after_a_write_in_the_same_request_use_the_primary(routed):
+    assert routed.post("/write-then-read").json() == {"replica": None}
+
+
+def test_without_healthy_replicas_reads_fall_back_to_the_primary(routed):
+    replicas.replica_set.replicas[0].mark_down("test")
+    assert routed.get("/read").json() == {"replica": None}
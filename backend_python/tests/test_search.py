@@ -0,0 +1,57 @@
+# backend_python/tests/test_search.py
+from types import SimpleNamespace
+
+from backend_python.search import InMemorySearchIndex, tokenize
+
+
+def _pet(pet_id, name="", breed="", temperament="", description=""):
+    return SimpleNamespace(id=pet_id, name=name, breed=breed, temperament=temperament, description=description)
+
+
+def _index(*pets):
+    index = InMemorySearchIndex()
+    index._built = True  # as after ensure_built on an empty table
+    for pet in pets:
+        index.upsert(pet)
+    return index
+
+
+def test_tokenize_drops_stopwords_and_plurals():
+    assert tokenize("Good with the Kids and cats!") == ["good", "kid", "cat"]
+
+
+def test_name_hits_outrank_description_hits_and_more_terms_rank_higher():
+    index = _index(
+        _pet(1, name="Biscuit", description="A calm terrier"),
+        _pet(2, name="Max", description="Loves biscuit treats"),
+        _pet(3, name="Biscuit", breed="Terrier"),
+        _pet(4, name="Luna", breed="Beagle"),
+    )
+    # 1 and 3 tie (same weighted tf and length; ties go by id), the description-only hit comes last.
+    assert [pet_id for pet_id, _ in index.search("biscuit", 10)] == [1, 3, 2]
+    ranked = [pet_id for pet_id, _ in index.search("biscuit terrier", 10)]
+    assert ranked[0] == 3  # both terms, in the higher weighted fields
+    assert 4 not in ranked
+    assert index.search("biscuit terrier", 1) == index.search("biscuit terrier", 10)[:1]
+
+
+def test_updates_and_removals_change_the_results():
+    index = _index(_pet(1, name="Pepper"), _pet(2, name="Salt"))
+    index.upsert(_pet(1, name="Ginger"))
+    assert index.search("pepper", 10) == []
+    assert [pet_id for pet_id, _ in index.search("ginger", 10)] == [1]
+    index.remove(2)
+    assert index.search("salt", 10) == []
+    assert index._total_length == sum(index._doc_length.values())
+
+
+def test_search_endpoint_follows_pet_writes(client, shelter, make_pet):
+    pet_id = make_pet(name="Zanzibar", temperament="playful")
+    assert [p["id"] for p in client.get("/api/pets/search", params={"q": "zanzibar"}).json()] == [pet_id]
+
+    client.put(f"/api/pets/{pet_id}", data={"name": "Quixote"}, headers=shelter)
+    assert client.get("/api/pets/search", params={"q": "zanzibar"}).json() == []
+    assert [p["id"] for p in client.get("/api/pets/search", params={"q": "quixote"}).json()] == [pet_id]
+
+    client.delete(f"/api/pets/{pet_id}", headers=shelter)
+    assert client.get("/api/pets/search", params={"q": "quixote"}).json() == []
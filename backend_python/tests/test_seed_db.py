@@ -0,0 +1,35 @@
+# backend_python/tests/test_seed_db.py
+from sqlalchemy import func
+
+
+def test_synthetic_shelters_own_their_pets_and_applications(client):
+    from backend_python import main
+    from backend_python.database import SessionLocal
+    from backend_python.models import Application, Owner, Pet, UserProfile
+    from backend_python.seed_db import seed_synthetic
+
+    with SessionLocal() as db:
+        first_pet = (db.query(func.max(Pet.id)).scalar() or 0) + 1
+        # Not a fresh database: owners and profiles ids no longer line up by coincidence.
+        db.add_all(Owner(name=f"Legacy {i}", email=f"legacy-{i}@example.com") for i in range(7))
+        db.commit()
+    seed_synthetic(pets=60, profiles=40, applications=80, batch_size=25, seed=7)
+    main.reset_pet_views()  # bulk inserted behind the in-process views
+
+    with SessionLocal() as db:
+        pets = db.query(Pet).filter(Pet.id >= first_pet).all()
+        owner_ids = {pet.owner_id for pet in pets}
+        shelters = {p.id: p for p in db.query(UserProfile).filter(UserProfile.id.in_(owner_ids))}
+        assert set(shelters) == owner_ids
+        assert {p.role for p in shelters.values()} == {"shelter"}
+        assert all(p.user_id.startswith("synthetic-") for p in shelters.values())
+        assert db.query(Owner).filter(Owner.id.in_(shelters)).count() == len(shelters)  # the FK target exists
+        applications = db.query(Application).filter(Application.pet_id >= first_pet).all()
+        assert applications and all(a.shelter_id == a.pet.owner_id for a in applications)
+        shelter = next(iter(shelters.values()))
+        expected = sum(1 for a in applications if a.shelter_id == shelter.id)
+
+    headers = {"Authorization": shelter.user_id}
+    assert client.get("/api/applications/shelter/counts", headers=headers).json()["total"] == expected
+    own_pet = next(pet for pet in pets if pet.owner_id == shelter.id)
+    assert client.put(f"/api/pets/{own_pet.id}", data={"name": "Renamed"}, headers=headers).status_code == 200
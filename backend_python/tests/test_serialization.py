@@ -0,0 +1,49 @@
+# backend_python/tests/test_serialization.py
+import json
+from typing import List
+
+import pytest
+from pydantic import TypeAdapter
+
+from backend_python import images, serialization
+from backend_python.models import PetGender, PetSpecies, PetStatus
+from backend_python.schemas import PetDisplay
+from backend_python.serialization import PET_DISPLAY_COLUMNS, pet_rows_to_json, pet_rows_to_ndjson
+
+SHA = "ab" * 32
+
+
+@pytest.fixture
+def pets(make_pet, monkeypatch):
+    monkeypatch.setattr(images, "_ready", {SHA})  # derivatives "built", so image_variants is filled in
+    ids = [
+        make_pet(),
+        make_pet(name="Zoë", species=PetSpecies.cat, gender=PetGender.female, status=PetStatus.pending,
+                 description='Says "mrrp" — a lot', temperament="calm", medical_needs="Daily insulin",
+                 image_url=f"/static/images/pets/{SHA}.jpg"),
+        make_pet(name="Legacy", image_url="/static/images/pets/3f2a-uuid.png"),
+    ]
+    from backend_python.database import SessionLocal
+    from backend_python.models import Pet
+
+    with SessionLocal() as db:
+        rows = db.query(*PET_DISPLAY_COLUMNS).filter(Pet.id.in_(ids)).order_by(Pet.id).all()
+        models = db.query(Pet).filter(Pet.id.in_(ids)).order_by(Pet.id).all()
+        return rows, [PetDisplay.model_validate(pet) for pet in models]
+
+
+@pytest.mark.parametrize("encoder", ["orjson", "json"])
+def test_fast_path_matches_pydantic_byte_for_byte(pets, encoder, monkeypatch):
+    if encoder == "json":
+        monkeypatch.setattr(serialization, "orjson", None)
+    rows, models = pets
+    expected = TypeAdapter(List[PetDisplay]).dump_json(models)
+    assert pet_rows_to_json(rows) == expected  # same values, same field order, image_variants included
+    assert json.loads(expected)[1]["image_variants"]["card_webp"].endswith(".webp")
+    assert json.loads(expected)[2]["image_variants"] is None
+
+
+def test_ndjson_lines_match_the_json_items(pets):
+    rows, models = pets
+    lines = pet_rows_to_ndjson()(rows).splitlines()
+    assert lines == [model.model_dump_json().encode() for model in models]
@@ -0,0 +1,65 @@
+# backend_python/tests/test_slow_queries.py
+import pytest
+
+from backend_python import slow_queries
+
+
+@pytest.mark.parametrize("statement", [
+    "SELECT applications.id FROM applications WHERE applications.pet_id = %(pet_id)s FOR UPDATE",
+    "SELECT pets.id FROM pets WHERE pets.id IN (1, 2)\nFOR UPDATE SKIP LOCKED",
+    "SELECT id FROM jobs FOR NO KEY UPDATE",
+    "select id from pets for share",
+    "SELECT id FROM pets FOR KEY SHARE NOWAIT",
+])
+def test_locking_selects_are_never_explain_analyzed(monkeypatch, statement):
+    monkeypatch.setattr(slow_queries, "SLOW_QUERY_EXPLAIN_ANALYZE", True)
+    assert slow_queries.takes_row_locks(statement)
+    assert slow_queries.postgres_explain_options(statement) == "FORMAT JSON"
+
+
+def test_plain_selects_are_analyzed_only_when_enabled(monkeypatch):
+    statement = "SELECT pets.id, pets.name FROM pets WHERE pets.status = %(status)s ORDER BY pets.id"
+    assert not slow_queries.takes_row_locks(statement)
+    monkeypatch.setattr(slow_queries, "SLOW_QUERY_EXPLAIN_ANALYZE", True)
+    assert slow_queries.postgres_explain_options(statement) == "ANALYZE, BUFFERS, FORMAT JSON"
+    monkeypatch.setattr(slow_queries, "SLOW_QUERY_EXPLAIN_ANALYZE", False)
+    assert slow_queries.postgres_explain_options(statement) == "FORMAT JSON"
+
+
+@pytest.mark.parametrize("statement", [
+    "SELECT setval(pg_get_serial_sequence('pets', 'id'), (SELECT COALESCE(MAX(id), 1) FROM pets))",
+    "SELECT nextval('jobs_id_seq') FROM generate_series(1, 10)",
+    "SELECT pg_advisory_xact_lock(727274001) FROM schema_version",
+    "SELECT pg_notify(channel, payload) FROM outbox",
+])
+def test_selects_calling_side_effect_functions_are_never_analyzed(monkeypatch, statement):
+    monkeypatch.setattr(slow_queries, "SLOW_QUERY_EXPLAIN_ANALYZE", True)
+    assert slow_queries.has_side_effects(statement)
+    assert slow_queries.postgres_explain_options(statement) == "FORMAT JSON"
+
+
+@pytest.mark.parametrize("statement, explainable", [
+    ("SELECT pg_notify(%(channel)s, %(payload)s)", False),
+    ("SELECT pg_advisory_xact_lock(727274001)", False),
+    ("select 1", False),
+    ("UPDATE pets SET name = %(name)s WHERE pets.id = %(id)s", False),
+    ("SELECT pets.id FROM pets WHERE pets.name = %(name)s", True),
+])
+def test_only_selects_reading_tables_are_explained(statement, explainable):
+    assert slow_queries.is_explainable(statement) is explainable
+
+
+def test_a_slow_bare_function_call_is_logged_but_not_explained(monkeypatch):
+    from sqlalchemy import create_engine, text
+
+    submitted = []
+    monkeypatch.setattr(slow_queries, "_get_explain_executor",
+                        lambda: type("Executor", (), {"submit": lambda self, *args: submitted.append(args)})())
+    engine = create_engine("sqlite://")
+    slow_queries.install_slow_query_log(engine, threshold_ms=0, sample_rate=1)
+    slow_queries.slow_query_log.clear()
+    with engine.connect() as conn:
+        conn.execute(text("SELECT abs(-1)"))
+        conn.execute(text("SELECT name FROM sqlite_master"))
+    assert [args[3] for args in submitted] == ["SELECT name FROM sqlite_master"]  # (fn, engine, entry, statement, ...)
+    assert len(slow_queries.slow_query_log.snapshot()["recent"]) == 2
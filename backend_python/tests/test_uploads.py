@@ -0,0 +1,72 @@
+# backend_python/tests/test_uploads.py
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+
+from backend_python.uploads import UPLOAD_FORM_OVERHEAD_BYTES, UPLOAD_MAX_BYTES, UploadSizeLimitMiddleware
+
+LIMIT = 1000
+
+
+def _limited_app(calls):
+    app = FastAPI()
+    app.add_middleware(UploadSizeLimitMiddleware, max_bytes=LIMIT)
+
+    @app.post("/api/pets")
+    def upload(image: UploadFile = File(...)):
+        calls.append(image.filename)
+        return {"ok": True}
+
+    @app.post("/api/pets/import")
+    def bulk_import(file: UploadFile = File(...)):
+        calls.append(file.filename)
+        return {"ok": True}
+
+    return app
+
+
+def test_content_length_over_the_limit_is_rejected_before_the_handler():
+    calls = []
+    with TestClient(_limited_app(calls)) as client:
+        response = client.post("/api/pets", files={"image": ("a.jpg", b"x" * (LIMIT * 2), "image/jpeg")})
+    assert response.status_code == 413
+    assert calls == []
+
+
+def test_chunked_body_over_the_limit_is_rejected_while_streaming():
+    calls = []
+
+    def body():  # no Content-Length: sent with chunked transfer encoding
+        for _ in range(50):
+            yield b"x" * 100
+
+    with TestClient(_limited_app(calls)) as client:
+        response = client.post("/api/pets", content=body(),
+                               headers={"Content-Type": "multipart/form-data; boundary=b"})
+    assert response.status_code == 413
+    assert calls == []
+
+
+def test_small_uploads_and_other_routes_pass():
+    calls = []
+    with TestClient(_limited_app(calls)) as client:
+        assert client.post("/api/pets", files={"image": ("a.jpg", b"x" * 10, "image/jpeg")}).status_code == 200
+        big = b"x" * (LIMIT * 2)
+        assert client.post("/api/pets/import", files={"file": ("p.csv", big, "text/csv")}).status_code == 200
+    assert calls == ["a.jpg", "p.csv"]
+
+
+def test_app_rejects_oversized_pet_image(client, shelter):
+    image = b"x" * (UPLOAD_MAX_BYTES + UPLOAD_FORM_OVERHEAD_BYTES + 1)
+    response = client.post("/api/pets", data=dict(name="Big", age="1", species="Dog", breed="x", gender="Male"),
+                           files={"image": ("big.jpg", image, "image/jpeg")}, headers=shelter)
+    assert response.status_code == 413
+
+
+def test_app_rejects_a_file_that_is_not_an_image(client, shelter, workdir):
+    import os
+
+    before = sorted(os.listdir(os.path.join(workdir, "static/images/pets")))
+    response = client.post("/api/pets", data=dict(name="Fake", age="1", species="Dog", breed="x", gender="Male"),
+                           files={"image": ("fake.jpg", b"<?php echo 'hi'; ?>", "image/jpeg")}, headers=shelter)
+    assert response.status_code == 400
+    assert sorted(os.listdir(os.path.join(workdir, "static/images/pets"))) == before  # nothing stored or queued
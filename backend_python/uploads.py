@@ -0,0 +1,146 @@
+# backend_python/uploads.py
+import hashlib
+import json
+import os
+import re
+import uuid
+from dataclasses import dataclass
+from typing import Optional
+
+from fastapi import HTTPException, UploadFile, status
+from starlette.datastructures import Headers
+
+UPLOAD_DIRECTORY = "static/images/pets"
+UPLOAD_URL_PREFIX = "/static/images/pets"
+
+# Uploads are copied in fixed-size chunks so memory use does not grow with the file size.
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(10 * 1024 * 1024)))
+# Room for the multipart boundaries, part headers and the text fields sent along with the image.
+UPLOAD_FORM_OVERHEAD_BYTES = int(os.getenv("UPLOAD_FORM_OVERHEAD_BYTES", str(64 * 1024)))
+# Requests carrying a pet image (POST /api/pets, PUT /api/pets/{id}); bulk imports are not limited here.
+IMAGE_UPLOAD_PATH = re.compile(r"^/api/pets(/\d+)?/?$")
+
+
+@dataclass
+class StoredUpload:
+    path: str      # path on disk, relative to the working directory
+    url: str       # URL the file is served from
+    size: int      # bytes written
+    sha256: str    # hex digest of the content
+    created: bool  # False when identical content was already stored
+
+
+def save_upload(image: UploadFile, directory: str = UPLOAD_DIRECTORY, url_prefix: str = UPLOAD_URL_PREFIX,
+                max_bytes: Optional[int] = None) -> StoredUpload:
+    """
+    Stream an uploaded image to disk chunk by chunk, hashing it on the way.
+
+    Files are content addressed: the stored name is the sha256 of the content plus the
+    original extension, so uploading the same image twice stores it once.
+
+    This does blocking file I/O and must be called from a threadpool handler
+    (plain `def` route), never directly on the event loop. The file is written to a
+    temporary name and only moved into place once complete; if it grows past
+    `max_bytes` the partial file is removed and a 413 is raised. That check only runs
+    once Starlette has spooled the whole request: UploadSizeLimitMiddleware is what
+    turns away an oversized body before it is received. Content Pillow cannot read as an
+    image is removed and rejected with a 400, so no derivative job is ever queued for it.
+    """
+    max_bytes = UPLOAD_MAX_BYTES if max_bytes is None else max_bytes
+    os.makedirs(directory, exist_ok=True)
+    file_extension = os.path.splitext(image.filename or "")[1].lower()
+    tmp_path = os.path.join(directory, f".{uuid.uuid4()}.part")
+
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(tmp_path, "wb") as buffer:
+            while True:
+                chunk = image.file.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=f"Image exceeds the maximum upload size of {max_bytes} bytes."
+                    )
+                digest.update(chunk)
+                buffer.write(chunk)
+        verify_image(tmp_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    sha256 = digest.hexdigest()
+    filename = f"{sha256}{file_extension}"
+    file_path = os.path.join(directory, filename)
+    created = not os.path.exists(file_path)
+    if created:
+        os.replace(tmp_path, file_path)
+    else:
+        os.remove(tmp_path)
+    return StoredUpload(path=file_path, url=f"{url_prefix}/{filename}", size=size, sha256=sha256, created=created)
+
+
+def verify_image(path: str) -> None:
+    """Raise a 400 unless the file is an image Pillow can decode (verify() reads it without decoding pixels)."""
+    from PIL import Image
+
+    try:
+        with Image.open(path) as image:
+            image.verify()
+    except Exception:  # UnidentifiedImageError, truncated or corrupt data, decompression bombs
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="The uploaded file is not a valid image.")
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Plain ASGI middleware: a 413 for image upload requests whose body exceeds `max_bytes`,
+    before the form is parsed and spooled to disk. A Content-Length over the limit is rejected
+    without reading the body; otherwise (or with chunked encoding) the bytes are counted as
+    they arrive, and the request is failed as soon as the count passes the limit.
+    """
+
+    def __init__(self, app, max_bytes: int = None, path_pattern=IMAGE_UPLOAD_PATH):
+        self.app = app
+        self.max_bytes = UPLOAD_MAX_BYTES + UPLOAD_FORM_OVERHEAD_BYTES if max_bytes is None else max_bytes
+        self.path_pattern = path_pattern
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] != "http" or scope["method"] not in ("POST", "PUT", "PATCH")
+                or not self.path_pattern.match(scope["path"])):
+            await self.app(scope, receive, send)
+            return
+
+        content_length = Headers(scope=scope).get("content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_bytes:
+            await self._reject(send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # Raised inside the form parsing; FastAPI passes HTTPExceptions through.
+                    raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                                        detail=self._detail())
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    def _detail(self) -> str:
+        return f"Request body exceeds the maximum upload size of {self.max_bytes} bytes."
+
+    async def _reject(self, send) -> None:
+        body = json.dumps({"detail": self._detail()}).encode("utf-8")
+        await send({"type": "http.response.start", "status": status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()),
+                                (b"connection", b"close")]})
+        await send({"type": "http.response.body", "body": body})
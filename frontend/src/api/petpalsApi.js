@@ -12,6 +12,12 @@ const petpalsApi = axios.create({
     },
 });
 
+// Read-your-writes: after a write the backend answers with this header (a Unix timestamp).
+// Until then our reads must go to the primary database, not a replica that may lag behind.
+// The backend also sets a cookie for this, but browsers don't send it cross-origin, so we echo the header.
+const READ_PIN_HEADER = 'X-Read-Primary-Until';
+let readPrimaryUntil = 0;
+
 // Request interceptor to add the authorization token to every outgoing request
 petpalsApi.interceptors.request.use(
     (config) => {
@@ -22,6 +28,9 @@ petpalsApi.interceptors.request.use(
         if (token) {
             config.headers.Authorization = `Bearer ${token}`;
         }
+        if (readPrimaryUntil > Date.now() / 1000) {
+            config.headers[READ_PIN_HEADER] = readPrimaryUntil;
+        }
         return config;
     },
     (error) => {
@@ -32,7 +41,13 @@ petpalsApi.interceptors.request.use(
 
 // Optional: Response interceptor for handling 401s globally (e.g., redirect to login)
 petpalsApi.interceptors.response.use(
-    (response) => response,
+    (response) => {
+        const pin = parseFloat(response.headers[READ_PIN_HEADER.toLowerCase()]);
+        if (pin > readPrimaryUntil) {
+            readPrimaryUntil = pin;
+        }
+        return response;
+    },
     (error) => {
         if (error.response && error.response.status === 401) {
             // Handle 401 Unauthorized errors